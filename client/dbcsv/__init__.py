@@ -1,3 +1,7 @@
+# PEP 249 module globals: ? placeholders (named :name placeholders are accepted as well)
+apilevel = "2.0"
+paramstyle = "qmark"
+
 from .connection import (
     Connection,
     Cursor,
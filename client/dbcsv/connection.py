@@ -1,16 +1,23 @@
-from typing import Optional, List, Any, Tuple, Union
+from typing import Optional, List, Any, Tuple, Union, Dict, Sequence, Callable, Iterator
 from requests.exceptions import ConnectionError, Timeout
 
-from dbcsv.utils import validate_dsn_url, login, validate_token, execute_query, fetch_one, fetch_many, fetch_all, close
-from dbcsv.exception import InternalError, NotSupportedError, InterfaceError
+from dbcsv.utils import (validate_dsn_url, login, validate_token, execute_query, fetch_one, fetch_many, fetch_stream, close,
+                         prepare_statement, execute_prepared, execute_many, fetch_many_columnar, fetch_stream_columnar)
+from dbcsv.exception import InternalError, NotSupportedError, InterfaceError, OperationalError
+from dbcsv.schemas.response import ExecuteQueryResponse
+from dbcsv.wire_format import Frame
 
 # Flow: connection.execute -> utils.execute_query -> [/query/execute] -> execute_query endpoint -> database_engine.execute -> executor.execute_sql
 class Connection:
-    def __init__(self, token: str):
+    def __init__(self, token: str, columnar: bool = True):
         self.token = token
+        # Fetch rows in the binary columnar encoding rather than JSON
+        self.columnar = columnar
         self._url = None
         self._is_online = True
         self._schema = None
+        # Query -> id of its prepared statement on the engine side
+        self._statements: Dict[str, str] = {}
 
     @property
     def url(self):
@@ -32,6 +39,18 @@ class Connection:
     def schema(self, schema):
         self._schema = schema
 
+    def _run_prepared(self, q: str, run: Callable[[str], ExecuteQueryResponse]) -> ExecuteQueryResponse:
+        """Run `q` as a prepared statement, preparing it on first use and again if the engine dropped it."""
+        statement_id = self._statements.get(q)
+        if statement_id is not None:
+            try:
+                return run(statement_id)
+            except OperationalError:
+                pass
+        statement_id = prepare_statement(self._url, self._schema, q).statement_id
+        self._statements[q] = statement_id
+        return run(statement_id)
+
     def cursor(self) -> "Cursor":
         if not self._is_online:
             raise InternalError("Cannot create any cursor from a closed connection")
@@ -101,8 +120,13 @@ class Cursor:
         if new_token is not None:
             self._connection.token = new_token.access_token
 
-        # Call to /execute endpoint and create an iterator on engine side
-        cursor = execute_query(self._connection.url, self._connection.schema, q)
+        if parameters is None:
+            # Call to /execute endpoint and create an iterator on engine side
+            cursor = execute_query(self._connection.url, self._connection.schema, q, self._connection.token)
+        else:
+            # Prepared once per connection, later executions only send the bound values
+            url, token = self._connection.url, self._connection.token
+            cursor = self._connection._run_prepared(q, lambda statement_id: execute_prepared(url, statement_id, parameters, token))
 
         if cursor.cursor_id is None:
             raise InternalError("Failed to create cursor on server side")
@@ -112,6 +136,30 @@ class Cursor:
 
         # Set cursor id and rowcount
         self._cursor_id = cursor.cursor_id
+        self._describe(cursor)
+        self._rowcount = cursor.position
+
+
+    def executemany(self, q: str, seq_of_parameters: Sequence[Union[Sequence[Any], Dict[str, Any]]]) -> None:
+        """Execute `q` for every parameter set in one request, the rows of all executions are fetched in order."""
+        if not self._connection.is_online:
+            raise InternalError("Cannot perform executemany() on cursor of a closed connection")
+        if self._cursor_id is not None:
+            self.close()
+
+        new_token = validate_token(self._connection.url, self._connection.token)
+        if new_token is not None:
+            self._connection.token = new_token.access_token
+
+        url, token = self._connection.url, self._connection.token
+        seq_of_parameters = list(seq_of_parameters)
+        cursor = self._connection._run_prepared(q, lambda statement_id: execute_many(url, statement_id, seq_of_parameters, token))
+
+        if cursor.cursor_id is None:
+            raise InternalError("Failed to create cursor on server side")
+
+        self._cursor_id = cursor.cursor_id
+        self._describe(cursor)
         self._rowcount = cursor.position
 
 
@@ -123,6 +171,10 @@ class Cursor:
         if not self._cursor_id:
             raise InterfaceError("Cursor is not open or has been closed. Call execute() first to create an ID for this cursor before fetching results.")
         
+        if self._connection.columnar:
+            # As the other fetches, so that a column has the same Python type whichever fetched it
+            rows = self._fetch_frame(1).rows()
+            return rows[0] if rows else None
         result = fetch_one(self._connection.url, self._cursor_id)
         self._rowcount = result.position
         return result.data
@@ -143,11 +195,32 @@ class Cursor:
         if size <= 0:
             raise InterfaceError("Size must be a positive integer")
         
+        if self._connection.columnar:
+            return self._fetch_frame(size).rows()
         result = fetch_many(self._connection.url, self._cursor_id, size)
         self._rowcount = result.position
         return result.data
 
 
+    def fetchmany_columns(self, size: Optional[int] = None) -> Dict[str, List[Any]]:
+        """fetchmany() as a list of values per column name, decoded straight from the columnar encoding."""
+        if not self._connection.is_online:
+            raise InternalError(
+                "Cannot perform fetchmany_columns() on cursor of a closed connection"
+            )
+        if not self._cursor_id:
+            raise InterfaceError("Cursor is not open or has been closed. Call execute() first to create an ID for this cursor before fetching results.")
+
+        if size is None:
+            size = self.arraysize
+        if not isinstance(size, int):
+            raise InterfaceError("Size must be an integer")
+        if size <= 0:
+            raise InterfaceError("Size must be a positive integer")
+
+        return self._fetch_frame(size).as_dict()
+
+
     def fetchall(self) -> List[List[Any]]:
         if not self._connection.is_online:
             raise InternalError(
@@ -155,10 +228,69 @@ class Cursor:
             )
         if not self._cursor_id:
             raise InterfaceError("Cursor is not open or has been closed. Call execute() first to create an ID for this cursor before fetching results.")
-            
-        result = fetch_all(self._connection.url, self._cursor_id)
-        self._rowcount = result.position
-        return result.data
+
+        return list(self._stream())
+
+
+    def fetchall_columns(self) -> Dict[str, List[Any]]:
+        """fetchall() as a list of values per column name, decoded straight from the columnar encoding."""
+        if not self._connection.is_online:
+            raise InternalError(
+                "Cannot perform fetchall_columns() on cursor of a closed connection"
+            )
+        if not self._cursor_id:
+            raise InterfaceError("Cursor is not open or has been closed. Call execute() first to create an ID for this cursor before fetching results.")
+
+        columns: Dict[str, List[Any]] = {}
+        for frame in self._stream_frames():
+            for name, values in frame.as_dict().items():
+                columns.setdefault(name, []).extend(values)
+        return columns
+
+
+    def __iter__(self) -> Iterator[List[Any]]:
+        """
+        Iterate over the remaining rows, fetched `arraysize` rows at a time (raise it for fewer round
+        trips). Leaving the loop early leaves the rows not yielded yet to the next fetch.
+        """
+        if not self._connection.is_online:
+            raise InternalError(
+                "Cannot iterate over a cursor of a closed connection"
+            )
+        if not self._cursor_id:
+            raise InterfaceError("Cursor is not open or has been closed. Call execute() first to create an ID for this cursor before fetching results.")
+
+        return self._pages()
+
+
+    def _pages(self) -> Iterator[List[Any]]:
+        # Not the stream: the engine moves the cursor past every row it sends, read or not
+        while rows := self.fetchmany():
+            yield from rows
+
+
+    def _stream(self) -> Iterator[List[Any]]:
+        if self._connection.columnar:
+            for frame in self._stream_frames():
+                yield from frame.rows()
+            return
+        self._rowcount = yield from fetch_stream(self._connection.url, self._cursor_id)
+
+
+    def _stream_frames(self) -> Iterator[Frame]:
+        self._rowcount = yield from fetch_stream_columnar(self._connection.url, self._cursor_id)
+
+
+    def _fetch_frame(self, size: int) -> Frame:
+        frame = fetch_many_columnar(self._connection.url, self._cursor_id, size)
+        self._rowcount = frame.position
+        return frame
+
+
+    def _describe(self, cursor: ExecuteQueryResponse) -> None:
+        # PEP 249 description: name and declared type of each column, the other five items are not known
+        self._description = tuple((name, dtype, None, None, None, None, None)
+                                  for name, dtype in zip(cursor.columns, cursor.column_types)) or None
     
 
     def setinputsizes(self, sizes: List[Any]) -> None:
@@ -173,6 +305,7 @@ def connect(
     dsn: str,
     user: str,
     password: str,
+    columnar: bool = True,
 ) -> Connection:
     """
     Initializes a connection to the database.
@@ -180,6 +313,8 @@ def connect(
     Returns a Connection Object. It takes a number of parameters which are database dependent.
 
     E.g. a connect could look like this: connect(dsn='https://localhost:1234/schema', user='guido', password='1234')
+
+    Rows are fetched in a binary columnar encoding, pass columnar=False to fetch them as JSON.
     """
     # Check if schema exists in database
 
@@ -191,7 +326,7 @@ def connect(
     token = login(url, schema, user, password)
 
     # Create connection
-    conn = Connection(token=token.access_token)
+    conn = Connection(token=token.access_token, columnar=columnar)
 
     conn.schema = schema
     conn.url = url
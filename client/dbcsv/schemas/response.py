@@ -9,6 +9,9 @@ class BaseResponse(BaseModel):
 class ExecuteQueryResponse(BaseResponse):
     cursor_id: str
     position: int
+    # Names and declared types of the result columns
+    columns: List[str] = []
+    column_types: List[Optional[str]] = []
 
 # For fetch operations
 class FetchResponse(BaseResponse):
@@ -17,4 +20,9 @@ class FetchResponse(BaseResponse):
 
 # For /close endpoint
 class CloseCursorResponse(BaseResponse):
-    pass
\ No newline at end of file
+    pass
+
+# For /prepare endpoint
+class PrepareResponse(BaseResponse):
+    statement_id: str
+    parameter_count: int
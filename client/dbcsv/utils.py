@@ -1,9 +1,12 @@
+import datetime
+import json
 import re
 from urllib.parse import urlparse, urlunparse
 import requests
 from requests.exceptions import ConnectionError, Timeout
-from typing import Union, Tuple
+from typing import Any, Dict, Generator, List, Optional, Sequence, Union, Tuple
 import jwt
+from pydantic_core import from_json
 import time
 import os
 
@@ -12,13 +15,16 @@ from dbcsv.schemas.response import (
     ExecuteQueryResponse,
     FetchResponse,
     CloseCursorResponse,
+    PrepareResponse,
 )
+from dbcsv.wire_format import MEDIA_TYPE, Frame, decode_frame, iter_stream_frames, paused_gc
 from dbcsv.exception import (
     InterfaceError,
     OperationalError,
     ProgrammingError,
     AuthenticationError,
-    NetworkError
+    NetworkError,
+    DatabaseError
 )
 
 ACCESS_TOKEN_EXPIRE_MINUTES=30
@@ -124,20 +130,116 @@ def validate_token(url: str, token: str) -> Union[Token, None]:
     return Token(**r.json())
 
 
+def _auth_header(token: Optional[str]) -> Dict[str, str]:
+    """The engine counts the cursors a request opens against the user of its token."""
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
 # Execute SQL query, but does not fetch any result yet
-def execute_query(url: str, schema: str, query: str) -> ExecuteQueryResponse:
+def execute_query(url: str, schema: str, query: str, token: Optional[str] = None) -> ExecuteQueryResponse:
     data = {"sql_statement": query, "schema": schema}
-    r = requests.post(f"{url}/query/execute", json=data)
+    r = requests.post(f"{url}/query/execute", json=data, headers=_auth_header(token))
     response_status = r.status_code
     
+    # 429 -> too many open cursors on engine side
+    if response_status == 429:
+        error_message = r.json().get("detail", "Too many open cursors")
+        raise OperationalError(error_message)
+    # 500 -> syntax error in SQL query
+    if response_status == 500:
+        error_message = r.json().get("detail", "Internal Server Error")
+        raise ProgrammingError(error_message)
+
+    return ExecuteQueryResponse(**r.json())
+
+
+def _json_parameters(parameters: Union[Sequence[Any], Dict[str, Any]]) -> Union[List[Any], Dict[str, Any]]:
+    """Parameters as JSON values, dates are sent as ISO strings which the engine compares as dates."""
+    def convert(value):
+        return value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value
+    if isinstance(parameters, dict):
+        return {name: convert(value) for name, value in parameters.items()}
+    return [convert(value) for value in parameters]
+
+
+# Parse and plan a query with ? or :name placeholders once on the engine side
+def prepare_statement(url: str, schema: str, query: str) -> PrepareResponse:
+    data = {"sql_statement": query, "schema": schema}
+    r = requests.post(f"{url}/query/prepare", json=data)
+    response_status = r.status_code
+
     # 500 -> syntax error in SQL query
     if response_status == 500:
         error_message = r.json().get("detail", "Internal Server Error")
         raise ProgrammingError(error_message)
 
+    return PrepareResponse(**r.json())
+
+
+# Execute a prepared statement with bound parameters, but does not fetch any result yet
+def execute_prepared(url: str, statement_id: str, parameters: Union[Sequence[Any], Dict[str, Any]],
+                     token: Optional[str] = None) -> ExecuteQueryResponse:
+    data = {"statement_id": statement_id, "parameters": _json_parameters(parameters)}
+    r = requests.post(f"{url}/query/execute_prepared", json=data, headers=_auth_header(token))
+    response_status = r.status_code
+
+    # 404 -> the statement was dropped on engine side and has to be prepared again
+    if response_status == 404:
+        error_message = r.json().get("detail", "Internal Server Error")
+        raise OperationalError(error_message)
+    # 429 -> too many open cursors on engine side, not an OperationalError which means preparing again
+    if response_status == 429:
+        error_message = r.json().get("detail", "Too many open cursors")
+        raise DatabaseError(error_message)
+    # 500 -> wrong parameters
+    if response_status == 500:
+        error_message = r.json().get("detail", "Internal Server Error")
+        raise ProgrammingError(error_message)
+
+    return ExecuteQueryResponse(**r.json())
+
+
+# Execute a prepared statement once per parameter set, all results are fetched from one cursor
+def execute_many(url: str, statement_id: str, seq_of_parameters: Sequence[Union[Sequence[Any], Dict[str, Any]]],
+                 token: Optional[str] = None) -> ExecuteQueryResponse:
+    data = {"statement_id": statement_id, "parameters": [_json_parameters(parameters) for parameters in seq_of_parameters]}
+    r = requests.post(f"{url}/query/executemany", json=data, headers=_auth_header(token))
+    response_status = r.status_code
+
+    if response_status == 404:
+        error_message = r.json().get("detail", "Internal Server Error")
+        raise OperationalError(error_message)
+    if response_status == 429:
+        error_message = r.json().get("detail", "Too many open cursors")
+        raise DatabaseError(error_message)
+    if response_status == 500:
+        error_message = r.json().get("detail", "Internal Server Error")
+        raise ProgrammingError(error_message)
+
     return ExecuteQueryResponse(**r.json())
 
 
+def _fetch_response(content: bytes) -> FetchResponse:
+    """FetchResponse of a fetch body, trusted as the engine wrote it: validating every cell of the rows costs more than parsing them."""
+    with paused_gc():
+        payload = from_json(content)
+    return FetchResponse.model_construct(status=payload.get("status", "success"), message=payload.get("message"),
+                                         data=payload["data"], position=payload["position"])
+
+
+def _raise_for_fetch_status(r: requests.Response) -> None:
+    """Raise the error of a fetch response that carries no rows: 404 for a closed cursor, any other failure."""
+    if r.status_code == 200:
+        return
+    try:
+        error_message = r.json().get("detail", r.reason)
+    except ValueError:
+        error_message = r.text or r.reason
+    if r.status_code == 404:
+        raise OperationalError(error_message)
+    raise DatabaseError(error_message)
+
+
 # Fetch one row from the query results
 def fetch_one(url: str, cursor_id: str) -> FetchResponse:
     r = requests.get(f"{url}/query/fetchone/{cursor_id}")
@@ -147,7 +249,7 @@ def fetch_one(url: str, cursor_id: str) -> FetchResponse:
         error_message = r.json().get("detail", "Internal Server Error")
         raise OperationalError(error_message)
     
-    return FetchResponse(**r.json())
+    return _fetch_response(r.content)
 
 
 # Fetch many rows from the query results
@@ -159,10 +261,18 @@ def fetch_many(url: str, cursor_id: str, size: int = 1) -> FetchResponse:
         error_message = r.json().get("detail", "Internal Server Error")
         raise OperationalError(error_message)
 
-    return FetchResponse(**r.json())
+    return _fetch_response(r.content)
     
 
 
+# Fetch many rows from the query results in the binary columnar encoding
+def fetch_many_columnar(url: str, cursor_id: str, size: int = 1) -> Frame:
+    r = requests.get(f"{url}/query/fetchmany/{cursor_id}?size={size}", headers={"Accept": MEDIA_TYPE})
+    _raise_for_fetch_status(r)
+
+    return decode_frame(r.content)
+
+
 # Fetch all rows from the query results
 def fetch_all(url: str, cursor_id: str) -> FetchResponse:
     r = requests.get(f"{url}/query/fetchall/{cursor_id}")
@@ -172,7 +282,41 @@ def fetch_all(url: str, cursor_id: str) -> FetchResponse:
         error_message = r.json().get("detail", "Internal Server Error")
         raise OperationalError(error_message)
 
-    return FetchResponse(**r.json())
+    return _fetch_response(r.content)
+
+
+# Stream all remaining rows of the query results, returns the cursor position once they are all read
+def fetch_stream(url: str, cursor_id: str) -> Generator[List[Any], None, int]:
+    # Closing the generator early closes the connection, the engine then stops sending rows
+    with requests.get(f"{url}/query/stream/{cursor_id}", stream=True) as r:
+        _raise_for_fetch_status(r)
+
+        for line in r.iter_lines():
+            if not line:
+                continue
+            row = from_json(line)
+            if isinstance(row, list):
+                yield row
+                continue
+            # Last line: where the cursor stopped, and why when the query failed midway
+            if "error" in row:
+                raise DatabaseError(row["error"])
+            return row["position"]
+    raise OperationalError(f"Stream of cursor id={cursor_id} ended before its last line")
+
+
+# Stream all remaining rows of the query results as columnar frames, returns the cursor position once they are all read
+def fetch_stream_columnar(url: str, cursor_id: str) -> Generator[Frame, None, int]:
+    with requests.get(f"{url}/query/stream/{cursor_id}", headers={"Accept": MEDIA_TYPE}, stream=True) as r:
+        _raise_for_fetch_status(r)
+
+        for frame in iter_stream_frames(r.iter_content(chunk_size=None)):
+            if frame.error is not None:
+                raise DatabaseError(frame.error)
+            if frame.end:
+                return frame.position
+            yield frame
+    raise OperationalError(f"Stream of cursor id={cursor_id} ended before its last frame")
 
 
 # Close cursor (only if cursor_id is not None)
@@ -0,0 +1,124 @@
+"""
+Decoder of the binary columnar encoding of fetch responses (the engine's app/api/wire_format.py
+describes the layout), requested with ``Accept: application/vnd.dbcsv.columnar``.
+"""
+from array import array
+from contextlib import contextmanager
+import datetime
+import gc
+import json
+import struct
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+MEDIA_TYPE = "application/vnd.dbcsv.columnar"
+MAGIC = b"DBCF"
+
+_LENGTH = struct.Struct("<I")
+_TYPECODES = {"int": "q", "float": "d", "bool": "b", "date": "i"}
+
+
+class Frame:
+    """One batch of rows, held as typed columns."""
+
+    def __init__(self, header: Dict[str, Any], columns: List[List[Any]]):
+        self.names: List[str] = [column["name"] for column in header["columns"]]
+        self.kinds: List[str] = [column["kind"] for column in header["columns"]]
+        self.columns = columns
+        self.row_count: int = header["rows"]
+        self.position: int = header["position"]
+        self.end: bool = header.get("end", False)
+        self.error: Optional[str] = header.get("error")
+
+    def rows(self) -> List[List[Any]]:
+        with paused_gc():
+            return [list(row) for row in zip(*self.columns)]
+
+    def as_dict(self) -> Dict[str, List[Any]]:
+        return dict(zip(self.names, self.columns))
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """
+    Pause the cyclic garbage collector while decoding a response. The rows are new containers that
+    hold no cycles, yet building millions of them triggers a collection every few hundred thousand
+    allocations, each one walking all the rows built so far.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def decode_frame(data: bytes) -> Frame:
+    with paused_gc():
+        return _decode_frame(data)
+
+
+def _decode_frame(data: bytes) -> Frame:
+    view = memoryview(data)
+    if bytes(view[:4]) != MAGIC:
+        raise ValueError("Not a columnar frame")
+    (length,) = _LENGTH.unpack_from(view, 4)
+    pos = 8 + length
+    header = json.loads(bytes(view[8:pos]))
+    count = header["rows"]
+    columns = []
+    for column in header["columns"]:
+        nulls = None
+        if column["nulls"]:
+            nulls = view[pos:pos + (count + 7) // 8]
+            pos += (count + 7) // 8
+        values, pos = _decode_values(view, pos, column["kind"], count)
+        if nulls is not None:
+            for i in range(count):
+                if nulls[i >> 3] >> (i & 7) & 1:
+                    values[i] = None
+        columns.append(values)
+    return Frame(header, columns)
+
+
+def iter_stream_frames(chunks: Iterator[bytes]) -> Iterator[Frame]:
+    """Frames of a stream response, each one preceded by its length, from its body read in chunks."""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= _LENGTH.size:
+            (length,) = _LENGTH.unpack_from(buffer)
+            if len(buffer) < _LENGTH.size + length:
+                break
+            frame = decode_frame(bytes(buffer[_LENGTH.size:_LENGTH.size + length]))
+            del buffer[:_LENGTH.size + length]
+            yield frame
+
+
+def _decode_values(view: memoryview, pos: int, kind: str, count: int) -> tuple:
+    if kind in ("str", "json"):
+        offsets = _array("q", view[pos:pos + 8 * (count + 1)])
+        pos += 8 * (count + 1)
+        blob = bytes(view[pos:pos + offsets[-1]])
+        values = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(count)]
+        if kind == "json":
+            values = [json.loads(value) for value in values]
+        return values, pos + offsets[-1]
+    typecode = _TYPECODES[kind]
+    size = array(typecode).itemsize * count
+    values = _array(typecode, view[pos:pos + size]).tolist()
+    if kind == "bool":
+        values = [value != 0 for value in values]
+    elif kind == "date":
+        fromordinal = datetime.date.fromordinal
+        values = [fromordinal(value) for value in values]
+    return values, pos + size
+
+
+def _array(typecode: str, data: memoryview) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
@@ -1,14 +1,26 @@
-from typing import Annotated, Dict
-from fastapi import FastAPI, APIRouter , Depends, HTTPException
-from uuid import uuid4
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Iterator, List, Optional
+from fastapi import FastAPI, APIRouter , Depends, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
 
-from app.api.schemas.request import SQLRequest
+from app.api.schemas.request import SQLRequest, ExecutePreparedRequest, ExecuteManyRequest
+from app.api.wire_format import MEDIA_TYPE, accepts_columnar, column_kinds, encode_frame, json_fetch_response, json_rows, stream_frame
+from app.core import config
+from app.core.cursor_manager import CursorLimitError, CursorManager, ServerCursor
 from app.core.database_engine import get_engine
+from app.core.storage_layer.iterator.prefetch_iterator import PrefetchIterator
+from app.dependencies import cursor_owner_dependency
 from app.api.schemas.response import (
     BaseResponse,
     ExecuteQueryResponse,
     FetchResponse,
-    CloseCursorResponse
+    CloseCursorResponse,
+    PlanCacheStatsResponse,
+    ResultCacheStatsResponse,
+    CursorStatsResponse,
+    PrepareResponse,
+    DeallocateResponse
 )
 
 router = APIRouter(
@@ -29,33 +41,155 @@ def ping(
     return BaseResponse(message=f"Schema {schema} is available.")
 
 
-# Buffer to store active cursors
-# This is a simple in-memory storage for demonstration purposes.
-QUERY_CURSORS: Dict[str, dict] = {}
+@router.get('/cache/stats')
+def plan_cache_stats(
+    database_engine = Depends(get_engine)
+) -> PlanCacheStatsResponse:
+    """
+    Hit/miss counters of the parse and plan cache, to size PLAN_CACHE_SIZE.
+    """
+    return PlanCacheStatsResponse(**database_engine.plan_cache_stats)
+
+
+@router.get('/result_cache/stats')
+def result_cache_stats(
+    database_engine = Depends(get_engine)
+) -> ResultCacheStatsResponse:
+    """
+    Usage of the query result cache, enabled with RESULT_CACHE=true and sized by RESULT_CACHE_BYTES.
+    """
+    stats = database_engine.result_cache_stats
+    if stats is None:
+        return ResultCacheStatsResponse(enabled=False)
+    return ResultCacheStatsResponse(enabled=True, **stats)
+
+
+# Open cursors, closed when idle for CURSOR_IDLE_TTL_SECONDS or to stay within the limits below
+QUERY_CURSORS = CursorManager(
+    capacity=config.MAX_OPEN_CURSORS,
+    per_owner=config.MAX_CURSORS_PER_USER,
+    idle_ttl=config.CURSOR_IDLE_TTL_SECONDS,
+    memory_budget=config.CURSOR_MEMORY_BYTES,
+)
+
+# Workers of the cursors' read-ahead, when CURSOR_PREFETCH is on
+PREFETCH_WORKERS = ThreadPoolExecutor(max_workers=config.CURSOR_PREFETCH_WORKERS, thread_name_prefix="cursor-prefetch") \
+    if config.CURSOR_PREFETCH else None
+
+
+@router.get('/cursors/stats')
+def cursor_stats() -> CursorStatsResponse:
+    """
+    Open cursors, per user, the memory of the rows they buffer, and how many were closed by their
+    clients, expired after CURSOR_IDLE_TTL_SECONDS, evicted or refused at the limits.
+    """
+    return CursorStatsResponse(**QUERY_CURSORS.stats())
 
 
 @router.post('/execute')
 def execute_query(
     sql_request: SQLRequest,
-    database_engine = Depends(get_engine)
+    database_engine = Depends(get_engine),
+    owner: Optional[str] = cursor_owner_dependency
 ) -> ExecuteQueryResponse:
     """
     Create a cursor (ProjectIterator) and returns a cursor ID.
     """
-    cursor_id = str(uuid4())
-    
     try:
         iterator = database_engine.execute(sql_request.sql_statement, sql_request.schema)
+        columns, column_types = database_engine.result_columns(sql_request.sql_statement, sql_request.schema)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
-    QUERY_CURSORS[cursor_id] = {
-        'iterator': iterator,
-        'schema': sql_request.schema,
-        'position': 0
-    }
-    
-    return ExecuteQueryResponse(cursor_id=cursor_id, position=0)
+    return _open_cursor(owner, iterator, sql_request.schema, columns, column_types)
+
+
+@router.post('/prepare')
+def prepare_statement(
+    sql_request: SQLRequest,
+    database_engine = Depends(get_engine)
+) -> PrepareResponse:
+    """
+    Parse and plan a statement with ? or :name placeholders once and return its statement ID.
+    """
+    try:
+        statement = database_engine.prepare(sql_request.sql_statement, sql_request.schema)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return PrepareResponse(statement_id=statement.statement_id, parameter_count=len(statement.parameters))
+
+
+@router.post('/execute_prepared')
+def execute_prepared(
+    request: ExecutePreparedRequest,
+    database_engine = Depends(get_engine),
+    owner: Optional[str] = cursor_owner_dependency
+) -> ExecuteQueryResponse:
+    """
+    Bind parameters to a prepared statement and create a cursor, without parsing or planning again.
+    """
+    try:
+        statement = database_engine.prepared_statement(request.statement_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    try:
+        iterator = database_engine.execute_prepared(statement, request.parameters)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return _open_cursor(owner, iterator, statement.schema, statement.plan.columns, statement.plan.column_types)
+
+
+@router.post('/executemany')
+def execute_many(
+    request: ExecuteManyRequest,
+    database_engine = Depends(get_engine),
+    owner: Optional[str] = cursor_owner_dependency
+) -> ExecuteQueryResponse:
+    """
+    Execute a prepared statement once per parameter set, the results of all sets share one cursor.
+    """
+    try:
+        statement = database_engine.prepared_statement(request.statement_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    try:
+        iterator = database_engine.execute_many(statement, request.parameters)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return _open_cursor(owner, iterator, statement.schema, statement.plan.columns, statement.plan.column_types)
+
+
+@router.delete('/prepared/{statement_id}')
+def deallocate_statement(
+    statement_id: str,
+    database_engine = Depends(get_engine)
+) -> DeallocateResponse:
+    """
+    Drop a prepared statement.
+    """
+    if database_engine.deallocate(statement_id):
+        return DeallocateResponse()
+    raise HTTPException(status_code=404, detail=f"Prepared statement id={statement_id} not found")
+
+
+def _open_cursor(owner: Optional[str], iterator, schema: str, columns: List[str], column_types: List[str]) -> ExecuteQueryResponse:
+    if PREFETCH_WORKERS is not None:
+        # Starts reading the first rows while the response goes back to the client
+        iterator = PrefetchIterator(iterator, config.CURSOR_PREFETCH_ROWS, PREFETCH_WORKERS)
+    try:
+        cursor = QUERY_CURSORS.open(owner, schema, iterator, columns, column_kinds(column_types))
+    except CursorLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return ExecuteQueryResponse(cursor_id=cursor.cursor_id, position=0, columns=columns,
+                                column_types=[dtype if isinstance(dtype, str) else None for dtype in column_types])
+
+
+def _acquire_cursor(cursor_id: str) -> ServerCursor:
+    """The open cursor, in use until QUERY_CURSORS.release() so that it is not closed under the request."""
+    cursor = QUERY_CURSORS.acquire(cursor_id)
+    if cursor is None:
+        raise HTTPException(status_code=404, detail=f"Cursor id={cursor_id} not found")
+    return cursor
 
 
 @router.get('/fetchone/{cursor_id}')
@@ -63,57 +197,118 @@ def fetch_one(cursor_id: str) -> FetchResponse:
     """
     Fetches the current row that the cursor is pointing to and move it to the next.
     """
-    cursor = QUERY_CURSORS.get(cursor_id)
-    if not cursor:
-        raise HTTPException(status_code=404, detail=f"Cursor id={cursor_id} not found")
-    
+    cursor = _acquire_cursor(cursor_id)
     try:
-        row = next(cursor['iterator'])
-        cursor['position'] += 1
-        return FetchResponse(data=row, position=cursor['position'])
+        row = next(cursor.iterator)
+        cursor.position += 1
+        return FetchResponse(data=row, position=cursor.position)
     except StopIteration:  # Changed from StopAsyncIteration to StopIteration
-        return FetchResponse(data=None, position=cursor['position'])
+        return FetchResponse(data=None, position=cursor.position)
+    finally:
+        QUERY_CURSORS.release(cursor)
 
 
-@router.get('/fetchmany/{cursor_id}')
-def fetch_many(cursor_id: str, size: int = 100) -> FetchResponse:
+@router.get('/fetchmany/{cursor_id}', response_model=FetchResponse)
+def fetch_many(cursor_id: str, size: int = 100, accept: Annotated[str | None, Header()] = None):
     """
     Fetches the next `size` rows from the cursor and moves it forward.
     If `size` is not provided, it defaults to 100.
+    With CURSOR_PREFETCH on, the rows come from those the cursor read ahead since the previous fetch.
+    Rows are sent in the binary columnar encoding (see wire_format.py) when the request accepts it.
     """
-    cursor = QUERY_CURSORS.get(cursor_id)
-    if not cursor:
-        raise HTTPException(status_code=404, detail=f"Cursor id={cursor_id} not found")
-    
-    rows = []
-    for _ in range(size):
-        try:
-            row = next(cursor['iterator'])
-            rows.append(row)
-            cursor['position'] += 1
-        except StopIteration:  # Changed from StopAsyncIteration to StopIteration
-            break
-    
-    return FetchResponse(data=rows, position=cursor['position'])
+    cursor = _acquire_cursor(cursor_id)
+    try:
+        # Pulls whole batches from the pipeline, rows past `size` stay buffered in the iterator
+        rows = cursor.iterator.fetch(size)
+        cursor.position += len(rows)
+        return _fetch_response(cursor, rows, accept)
+    finally:
+        QUERY_CURSORS.release(cursor)
 
 
-@router.get('/fetchall/{cursor_id}')
-def fetch_all(cursor_id: str) -> FetchResponse:
+@router.get('/fetchall/{cursor_id}', response_model=FetchResponse)
+def fetch_all(cursor_id: str, accept: Annotated[str | None, Header()] = None):
     """
     Fetches all remaining rows from the cursor and moves the cursor to the end.
+    Rows are sent in the binary columnar encoding (see wire_format.py) when the request accepts it.
     """
-    cursor = QUERY_CURSORS.get(cursor_id)
-    if not cursor:
-        raise HTTPException(status_code=404, detail=f"Cursor id={cursor_id} not found")
+    cursor = _acquire_cursor(cursor_id)
+    try:
+        rows = cursor.iterator.fetch_all()
+        cursor.position += len(rows)
+        return _fetch_response(cursor, rows, accept)
+    finally:
+        QUERY_CURSORS.release(cursor)
+
+
+def _fetch_response(cursor: ServerCursor, rows: list, accept: str | None) -> Response:
+    """FetchResponse of `rows`, encoded without validating them, or their columnar frame."""
+    if accepts_columnar(accept):
+        frame = encode_frame(rows, cursor.columns, cursor.kinds, cursor.position)
+        return Response(content=frame, media_type=MEDIA_TYPE)
+    return Response(content=json_fetch_response(rows, cursor.position), media_type="application/json")
 
-    rows = []
+
+@router.get('/stream/{cursor_id}')
+def stream_all(cursor_id: str, accept: Annotated[str | None, Header()] = None) -> StreamingResponse:
+    """
+    Streams all remaining rows from the cursor as newline-delimited JSON, one row (a JSON list) per
+    line, written a batch of the pipeline at a time, and moves the cursor to the end.
+    The last line is {"position": ...}, or {"error": ..., "position": ...} when the query fails midway.
+    When the request accepts the binary columnar encoding, each batch is a frame of it instead.
+    """
+    # Answer 404 before the status line is sent, the body acquires the cursor for itself
+    QUERY_CURSORS.release(_acquire_cursor(cursor_id))
+    if accepts_columnar(accept):
+        return StreamingResponse(_columnar_frames(cursor_id), media_type=MEDIA_TYPE)
+    return StreamingResponse(_ndjson_rows(cursor_id), media_type="application/x-ndjson")
+
+
+def _ndjson_rows(cursor_id: str) -> Iterator[bytes]:
+    """One chunk per batch, so the server holds a batch of rows at a time whatever the size of the result."""
+    # Acquired when the body starts, a response never sent leaves the cursor idle rather than in use
+    cursor = QUERY_CURSORS.acquire(cursor_id)
+    if cursor is None:
+        yield (json.dumps({"error": f"Cursor id={cursor_id} not found", "position": 0}) + "\n").encode()
+        return
+    iterator = cursor.iterator
     try:
-        for row in cursor['iterator']:
-            rows.append(row)
-    except StopIteration:  # Changed from StopAsyncIteration to StopIteration
-        pass
-    cursor['position'] += len(rows)
-    return FetchResponse(data=rows, position=cursor['position'])
+        while True:
+            batch = iterator.next_batch()
+            if not batch:
+                break
+            cursor.position += len(batch)
+            yield b"".join(json_rows(row) + b"\n" for row in batch)
+    except Exception as e:
+        # The status line is gone already, the client raises the error when it reads this line
+        yield (json.dumps({"error": str(e), "position": cursor.position}) + "\n").encode()
+        return
+    finally:
+        # Runs as well when the client disconnects and the response closes the generator
+        QUERY_CURSORS.release(cursor)
+    yield (json.dumps({"position": cursor.position}) + "\n").encode()
+
+
+def _columnar_frames(cursor_id: str) -> Iterator[bytes]:
+    """_ndjson_rows in the columnar encoding: a frame per batch, then an empty frame that ends the stream."""
+    cursor = QUERY_CURSORS.acquire(cursor_id)
+    if cursor is None:
+        yield stream_frame(encode_frame([], [], [], 0, end=True, error=f"Cursor id={cursor_id} not found"))
+        return
+    iterator, columns, kinds = cursor.iterator, cursor.columns, cursor.kinds
+    try:
+        while True:
+            batch = iterator.next_batch()
+            if not batch:
+                break
+            cursor.position += len(batch)
+            yield stream_frame(encode_frame(batch, columns, kinds, cursor.position))
+    except Exception as e:
+        yield stream_frame(encode_frame([], columns, kinds, cursor.position, end=True, error=str(e)))
+        return
+    finally:
+        QUERY_CURSORS.release(cursor)
+    yield stream_frame(encode_frame([], columns, kinds, cursor.position, end=True))
 
 
 @router.delete('/close/{cursor_id}')
@@ -121,7 +316,6 @@ def close_cursor(cursor_id: str) -> CloseCursorResponse:
     """
     Closes the cursor and removes it from the storage.
     """
-    if cursor_id in QUERY_CURSORS:
-        del QUERY_CURSORS[cursor_id]
+    if QUERY_CURSORS.close(cursor_id):
         return CloseCursorResponse()
     raise HTTPException(status_code=404, detail=f"Cursor id={cursor_id} does not exists to be closed")
\ No newline at end of file
@@ -1,3 +1,5 @@
+from typing import Any, Dict, List, Union
+
 from pydantic import BaseModel, Field
 
 
@@ -6,3 +8,17 @@ class SQLRequest(BaseModel):
         max_length=255, description="User's request is a sql statement."
     )
     schema: str | None = Field(max_length=255, description="Schema name.", default=None)
+
+
+# Values of ? placeholders by position, or of :name placeholders by name
+Parameters = Union[List[Any], Dict[str, Any]]
+
+
+class ExecutePreparedRequest(BaseModel):
+    statement_id: str = Field(description="Id returned by /query/prepare.")
+    parameters: Parameters | None = Field(description="Values bound to the statement's placeholders.", default=None)
+
+
+class ExecuteManyRequest(BaseModel):
+    statement_id: str = Field(description="Id returned by /query/prepare.")
+    parameters: List[Parameters] = Field(description="One set of placeholder values per execution.")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 class BaseResponse(BaseModel):
     status: str = "success"
@@ -9,6 +9,9 @@ class BaseResponse(BaseModel):
 class ExecuteQueryResponse(BaseResponse):
     cursor_id: str
     position: int
+    # Names and declared types of the result columns, None for a type metadata.yaml does not give
+    columns: List[str] = []
+    column_types: List[Optional[str]] = []
 
 # For fetch operations
 class FetchResponse(BaseResponse):
@@ -17,4 +20,51 @@ class FetchResponse(BaseResponse):
 
 # For /close endpoint
 class CloseCursorResponse(BaseResponse):
-    pass
\ No newline at end of file
+    pass
+
+# For /cache/stats endpoint
+class PlanCacheStatsResponse(BaseResponse):
+    size: int
+    capacity: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+# For /result_cache/stats endpoint
+class ResultCacheStatsResponse(BaseResponse):
+    enabled: bool
+    entries: int = 0
+    size: int = 0
+    budget: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+# For /cursors/stats endpoint
+class CursorStatsResponse(BaseResponse):
+    open: int
+    in_use: int
+    capacity: int
+    per_owner: int
+    idle_ttl: float
+    buffered_bytes: int
+    memory_budget: int
+    opened: int
+    closed: int
+    expired: int
+    evictions: int
+    rejections: int
+    owners: Dict[str, int]
+    # Cursors opened without a token, not counted per user
+    anonymous: int
+
+# For /prepare endpoint
+class PrepareResponse(BaseResponse):
+    statement_id: str
+    parameter_count: int
+
+# For /prepared/{statement_id} endpoint
+class DeallocateResponse(BaseResponse):
+    pass
@@ -0,0 +1,152 @@
+"""
+Encodings of the rows of fetch responses: JSON serialized by pydantic-core without validating the
+rows first (json_fetch_response), and a binary columnar encoding served instead of JSON when the
+request sends ``Accept: application/vnd.dbcsv.columnar``.
+
+A response holds one frame per batch of rows. The fetchmany and fetchall responses are a single
+frame. The stream response is a sequence of frames, each one preceded by its length as a
+little-endian uint32, and its last frame has no rows and ``"end": true`` in its header.
+A frame is:
+
+    b"DBCF"             magic
+    uint32              length of the header
+    header              JSON: {"rows": n, "position": p, "columns": [{"name", "kind", "nulls"}, ...]}
+                        plus "end" on the last frame of a stream and "error" when the query failed
+    column data         for each column in order: its null bitmap (bit i set when row i is NULL),
+                        present only when "nulls" is true, then its values
+
+Values are laid out as in the columnar sidecar (see storage_layer/columnar.py), in little-endian
+byte order, with a placeholder in the slot of a NULL:
+
+    int     int64 per row
+    float   float64 per row
+    bool    int8 per row
+    date    int32 proleptic Gregorian ordinal per row
+    str     int64 start offsets (rows + 1) into the UTF-8 bytes that follow
+    json    as str, each value JSON-encoded
+
+The kind of a column comes from its type in metadata.yaml, DATETIME columns are sent as json so that
+their time of day is kept. A batch whose values do not all fit the kind, such as the float averages
+of an INT column, sends the column as json.
+"""
+from array import array
+import datetime
+from itertools import accumulate
+import json
+from operator import itemgetter
+import struct
+import sys
+from typing import Any, List, Optional
+
+from pydantic_core import SchemaSerializer, core_schema
+
+from app.core.storage_layer.columnar import column_kind
+from app.core.storage_layer.datatypes import DATETIME
+
+MEDIA_TYPE = "application/vnd.dbcsv.columnar"
+MAGIC = b"DBCF"
+
+_LENGTH = struct.Struct("<I")
+_TYPECODES = {"int": "q", "float": "d", "bool": "b", "date": "i"}
+# Value stored in the slot of a NULL
+_PLACEHOLDERS = {"int": 0, "float": 0.0, "bool": False, "date": datetime.date.min, "str": ""}
+# Python types of the values of each kind but float, which takes ints as well (array("d") checks them)
+_TYPES = {"int": {int}, "bool": {bool}, "date": {datetime.date}, "str": {str}}
+
+# Built once: serialize any result value as FetchResponse does (dates as ISO strings, NaN and
+# infinities as null), without the validation of every cell that building a FetchResponse costs
+_CONFIG = core_schema.CoreConfig(ser_json_inf_nan="null")
+_JSON = SchemaSerializer(core_schema.any_schema(), _CONFIG)
+_FETCH_RESPONSE = SchemaSerializer(core_schema.typed_dict_schema({
+    "status": core_schema.typed_dict_field(core_schema.str_schema()),
+    "message": core_schema.typed_dict_field(core_schema.nullable_schema(core_schema.str_schema())),
+    "data": core_schema.typed_dict_field(core_schema.any_schema()),
+    "position": core_schema.typed_dict_field(core_schema.int_schema()),
+}), _CONFIG)
+
+
+def json_rows(rows: Any) -> bytes:
+    """JSON of a list of rows, or of a single row, as FetchResponse writes them."""
+    return _JSON.to_json(rows)
+
+
+def json_fetch_response(data: Any, position: int) -> bytes:
+    """The body of a FetchResponse of `data`, serialized without validating it."""
+    return _FETCH_RESPONSE.to_json({"status": "success", "message": None, "data": data, "position": position})
+
+
+def accepts_columnar(accept: Optional[str]) -> bool:
+    """Whether an Accept header asks for the columnar encoding."""
+    return accept is not None and MEDIA_TYPE in accept
+
+
+def column_kinds(column_types: List[str]) -> List[str]:
+    """Wire kind of each column of a result, json for the types without a typed layout."""
+    kinds = []
+    for dtype in column_types:
+        kind = column_kind(dtype) if isinstance(dtype, str) else None
+        if isinstance(dtype, str) and dtype.lower() == DATETIME:
+            # The date layout would drop the time of day
+            kind = None
+        kinds.append(kind if kind in _TYPECODES or kind == "str" else "json")
+    return kinds
+
+
+def encode_frame(rows: List[List[Any]], columns: List[str], kinds: List[str], position: int, **header: Any) -> bytes:
+    """One frame of `rows`, `header` adds keys such as end or error to its header."""
+    header.update(rows=len(rows), position=position, columns=[])
+    parts = []
+    for i, (name, kind) in enumerate(zip(columns, kinds)):
+        # A column at a time in C, transposing with zip(*rows) costs several times more
+        values = list(map(itemgetter(i), rows))
+        nulls = values.count(None)
+        data = _encode_values(values, kind, nulls) if kind != "json" else None
+        if data is None:
+            kind, data = "json", _encode_strings([_JSON.to_json(value).decode("utf-8") for value in values])
+            nulls = 0
+        header["columns"].append({"name": name, "kind": kind, "nulls": bool(nulls)})
+        if nulls:
+            parts.append(_null_bitmap(values))
+        parts.append(data)
+    encoded = json.dumps(header).encode()
+    return b"".join([MAGIC, _LENGTH.pack(len(encoded)), encoded] + parts)
+
+
+def stream_frame(frame: bytes) -> bytes:
+    """A frame preceded by its length, as the stream response sends it."""
+    return _LENGTH.pack(len(frame)) + frame
+
+
+def _encode_values(values: List[Any], kind: str, nulls: int) -> Optional[bytes]:
+    """Bytes of a column of one kind, None when a value does not fit the kind."""
+    if nulls:
+        values = [_PLACEHOLDERS[kind] if value is None else value for value in values]
+    if kind != "float" and not set(map(type, values)) <= _TYPES[kind]:
+        return None
+    if kind == "str":
+        return _encode_strings(values)
+    if kind == "date":
+        values = list(map(datetime.date.toordinal, values))
+    try:
+        typed = array(_TYPECODES[kind], values)
+    except (TypeError, OverflowError):
+        return None
+    if sys.byteorder == "big":
+        typed.byteswap()
+    return typed.tobytes()
+
+
+def _encode_strings(values: List[str]) -> bytes:
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = array("q", accumulate(map(len, encoded), initial=0))
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    return offsets.tobytes() + b"".join(encoded)
+
+
+def _null_bitmap(values: List[Any]) -> bytes:
+    bitmap = bytearray((len(values) + 7) // 8)
+    for i, value in enumerate(values):
+        if value is None:
+            bitmap[i >> 3] |= 1 << (i & 7)
+    return bytes(bitmap)
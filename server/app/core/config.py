@@ -1,3 +1,4 @@
+import os
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -8,3 +9,58 @@ env_path = current_dir.parent.parent / ".env"
 print(env_path)
 print(env_path.exists())
 load_dotenv(env_path)
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+# Build the typed columnar sidecar of a table on its first scan (see storage_layer/columnar.py)
+COLUMNAR_AUTO_BUILD = _env_flag("COLUMNAR_AUTO_BUILD")
+
+# Build the row offset index and zone maps of a table on its first OFFSET or filtered scan (see storage_layer/row_index.py)
+ROW_INDEX_AUTO_BUILD = _env_flag("ROW_INDEX_AUTO_BUILD")
+
+# Columnar NumPy execution of numeric filters (used only when NumPy is installed)
+NUMPY_EXECUTOR = _env_flag("NUMPY_EXECUTOR", True)
+NUMPY_CHUNK_ROWS = int(os.getenv("NUMPY_CHUNK_ROWS", "65536"))
+
+# Parsed statements and logical plans kept by DatabaseEngine, 0 disables the cache
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "512"))
+
+# Prepared statements kept by DatabaseEngine, the least recently used one is dropped past the limit
+PREPARED_STATEMENTS_LIMIT = int(os.getenv("PREPARED_STATEMENTS_LIMIT", "1024"))
+
+# Materialized query results kept by DatabaseEngine, opt-in, within a budget in bytes
+RESULT_CACHE = _env_flag("RESULT_CACHE")
+RESULT_CACHE_BYTES = int(os.getenv("RESULT_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# Memory an ORDER BY sorts in before it spills sorted runs to temporary files, in bytes
+SORT_MEMORY_BYTES = int(os.getenv("SORT_MEMORY_BYTES", str(64 * 1024 * 1024)))
+# Memory the GROUP BY hash table may use before new groups are spilled to partitions, in bytes
+AGGREGATE_MEMORY_BYTES = int(os.getenv("AGGREGATE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+# Memory the build side of a hash join may use before both inputs are partitioned to temporary files, in bytes
+JOIN_MEMORY_BYTES = int(os.getenv("JOIN_MEMORY_BYTES", str(64 * 1024 * 1024)))
+# Memory the set of rows a SELECT DISTINCT has returned may use before new rows are spilled to partitions, in bytes
+DISTINCT_MEMORY_BYTES = int(os.getenv("DISTINCT_MEMORY_BYTES", str(64 * 1024 * 1024)))
+# Largest LIMIT + OFFSET an ORDER BY ... LIMIT answers with a bounded heap instead of a full sort
+TOP_N_MAX_ROWS = int(os.getenv("TOP_N_MAX_ROWS", "100000"))
+# Directory of spill files, the system temporary directory when empty
+SPILL_DIR = os.getenv("SPILL_DIR", "")
+
+# Open cursors are closed after this many idle seconds, releasing their table files and buffered rows
+CURSOR_IDLE_TTL_SECONDS = float(os.getenv("CURSOR_IDLE_TTL_SECONDS", "300"))
+# Open cursors in all, and per user, past which the least recently used idle one is closed
+MAX_OPEN_CURSORS = int(os.getenv("MAX_OPEN_CURSORS", "1024"))
+MAX_CURSORS_PER_USER = int(os.getenv("MAX_CURSORS_PER_USER", "64"))
+# Memory the rows buffered by open cursors may use before idle cursors are closed, in bytes
+CURSOR_MEMORY_BYTES = int(os.getenv("CURSOR_MEMORY_BYTES", str(256 * 1024 * 1024)))
+# Seconds between two sweeps of the expired cursors
+CURSOR_SWEEP_SECONDS = float(os.getenv("CURSOR_SWEEP_SECONDS", "30"))
+
+# Read the next rows of open cursors ahead of their fetches on background threads, opt-in
+CURSOR_PREFETCH = _env_flag("CURSOR_PREFETCH")
+# Rows a cursor reads ahead before its prefetch stops until the client fetches some
+CURSOR_PREFETCH_ROWS = int(os.getenv("CURSOR_PREFETCH_ROWS", "10000"))
+# Threads prefetching for all cursors, which take turns on them a batch at a time
+CURSOR_PREFETCH_WORKERS = int(os.getenv("CURSOR_PREFETCH_WORKERS", "4"))
@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+
+class CursorLimitError(Exception):
+    """Raised when a cursor cannot be opened: every cursor counted against the limit is in use."""
+
+
+class ServerCursor:
+    """An open query result and the state its fetch endpoints keep between calls."""
+    def __init__(self, owner: Optional[str], schema: str, iterator: Any, columns: List[str], kinds: List[str]):
+        self.cursor_id = str(uuid4())
+        # None for a cursor opened without a token
+        self.owner = owner
+        self.schema = schema
+        self.iterator = iterator
+        self.position = 0
+        self.columns = columns
+        # Wire kind of each column, for the columnar encoding
+        self.kinds = kinds
+        # Requests working on the cursor right now, it is never evicted while one is
+        self.in_use = 0
+        # Closed while in use: its iterator is closed by the last release()
+        self.close_pending = False
+        self.last_used = 0.0
+        # Approximate memory of the rows the pipeline has read ahead, updated after every request
+        self.buffered_bytes = 0
+
+
+class CursorManager:
+    """
+    Open cursors by id, bounded in number, per owner and in the memory of their buffered rows.
+
+    A cursor idle for longer than `idle_ttl` seconds is closed, and so are the least recently used
+    idle cursors when opening another one would exceed `capacity` or the owner's `per_owner`
+    limit, or when the cursors buffer more than `memory_budget` bytes. Cursors without an owner
+    (opened by unauthenticated clients, which cannot be told apart) count against `capacity` only,
+    not against a shared per-owner quota. Closing a cursor closes its
+    iterator, which releases the table files it holds. A cursor in use is never evicted: when all the
+    cursors a limit counts are in use, opening one more raises CursorLimitError. A cursor closed
+    while in use is gone at once for new requests, its iterator is closed when the last one ends.
+    """
+    def __init__(self, capacity: int, per_owner: int, idle_ttl: float, memory_budget: int,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.per_owner = per_owner
+        self.idle_ttl = idle_ttl
+        self.memory_budget = memory_budget
+        self._clock = clock
+        # Least recently used first
+        self._cursors: OrderedDict[str, ServerCursor] = OrderedDict()
+        self._owners: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.buffered_bytes = 0
+        self.opened = 0
+        self.closed = 0
+        self.expired = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def open(self, owner: Optional[str], schema: str, iterator: Any, columns: List[str], kinds: List[str]) -> ServerCursor:
+        cursor = ServerCursor(owner, schema, iterator, columns, kinds)
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            try:
+                if owner is not None and self._owners.get(owner, 0) >= self.per_owner:
+                    self._evict_idle(lambda other: other.owner == owner)
+                if len(self._cursors) >= self.capacity:
+                    self._evict_idle(lambda other: True)
+            except CursorLimitError:
+                self.rejections += 1
+                iterator.close()
+                raise
+            cursor.last_used = now
+            self._cursors[cursor.cursor_id] = cursor
+            if owner is not None:
+                self._owners[owner] = self._owners.get(owner, 0) + 1
+            self.opened += 1
+        return cursor
+
+    def acquire(self, cursor_id: str) -> Optional[ServerCursor]:
+        """The cursor with this id, marked in use until release(), or None if it is closed."""
+        with self._lock:
+            self._expire(self._clock())
+            cursor = self._cursors.get(cursor_id)
+            if cursor is not None:
+                cursor.in_use += 1
+                self._cursors.move_to_end(cursor_id)
+            return cursor
+
+    def release(self, cursor: ServerCursor) -> None:
+        """End a request on the cursor and account for the rows its pipeline now buffers."""
+        buffered = cursor.iterator.buffered_bytes()
+        with self._lock:
+            cursor.in_use -= 1
+            cursor.last_used = self._clock()
+            if self._cursors.get(cursor.cursor_id) is not cursor:
+                if cursor.close_pending and not cursor.in_use:
+                    cursor.close_pending = False
+                    cursor.iterator.close()
+                return
+            # Keeps the least recently used order in the order of last_used, which _expire relies on
+            self._cursors.move_to_end(cursor.cursor_id)
+            self.buffered_bytes += buffered - cursor.buffered_bytes
+            cursor.buffered_bytes = buffered
+            if self.buffered_bytes > self.memory_budget:
+                # The client of this cursor is likely to fetch again, close the other idle cursors first
+                self._evict_idle(lambda other: other is not cursor, until=lambda: self.buffered_bytes <= self.memory_budget)
+
+    def close(self, cursor_id: str) -> bool:
+        with self._lock:
+            cursor = self._cursors.get(cursor_id)
+            if cursor is None:
+                return False
+            self._remove(cursor)
+            self.closed += 1
+            return True
+
+    def sweep(self) -> None:
+        """Close the cursors idle for longer than the TTL, otherwise done as a side effect of open() and acquire()."""
+        with self._lock:
+            self._expire(self._clock())
+
+    def _expire(self, now: float) -> None:
+        for cursor in list(self._cursors.values()):
+            if now - cursor.last_used <= self.idle_ttl:
+                # In least recently used order, the cursors after this one were used even later
+                break
+            if cursor.in_use == 0:
+                self._remove(cursor)
+                self.expired += 1
+
+    def _evict_idle(self, counted: Callable[[ServerCursor], bool], until: Optional[Callable[[], bool]] = None) -> None:
+        """Close the least recently used idle cursor that `counted` matches, or all of them until `until()` holds."""
+        for cursor in list(self._cursors.values()):
+            if cursor.in_use == 0 and counted(cursor):
+                self._remove(cursor)
+                self.evictions += 1
+                if until is None or until():
+                    return
+        if until is None:
+            raise CursorLimitError("Too many open cursors, close some before opening another one")
+
+    def _remove(self, cursor: ServerCursor) -> None:
+        del self._cursors[cursor.cursor_id]
+        if cursor.owner is not None:
+            self._owners[cursor.owner] -= 1
+            if not self._owners[cursor.owner]:
+                del self._owners[cursor.owner]
+        self.buffered_bytes -= cursor.buffered_bytes
+        if cursor.in_use:
+            # Only close() removes a cursor in use, the requests reading it finish first
+            cursor.close_pending = True
+            return
+        # Release the table file now instead of whenever the iterator is garbage collected
+        cursor.iterator.close()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "open": len(self._cursors),
+                "in_use": sum(1 for cursor in self._cursors.values() if cursor.in_use),
+                "capacity": self.capacity,
+                "per_owner": self.per_owner,
+                "idle_ttl": self.idle_ttl,
+                "buffered_bytes": self.buffered_bytes,
+                "memory_budget": self.memory_budget,
+                "opened": self.opened,
+                "closed": self.closed,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "rejections": self.rejections,
+                "owners": dict(self._owners),
+                "anonymous": sum(1 for cursor in self._cursors.values() if cursor.owner is None),
+            }
@@ -1,14 +1,25 @@
 import sys
 from pathlib import Path
 import os
+import threading
 from typing import Any, Iterator, List
 
 from fastapi import HTTPException
 from lark import Lark
 
+from app.core import config
 from app.core.parser.parser import SQLTransformer, grammar
+from app.core.plan_cache import PlanCache
+from app.core.prepared_statements import PreparedStatement, PreparedStatements
+from app.core.result_cache import ResultCache
+from app.core.storage_layer.columnar import csv_path
 from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.iterator.chain_iterator import ChainIterator
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.iterator.recording_iterator import RecordingIterator
+from app.core.storage_layer.predicate import parameter_values
 from app.core.storage_layer.query_executor import QueryExecutor
+from app.core.storage_layer.utils import referenced_tables
 
 
 class DatabaseEngine():
@@ -17,10 +28,22 @@ class DatabaseEngine():
         self.__metadatas : dict[str, Metadata]= self.__loadMetadatas()  # Initialize the dict
         self.__parser = Lark(grammar, parser='lalr', transformer=SQLTransformer(), start='start')
         self.__executor = QueryExecutor
+        self.__plan_cache = PlanCache(config.PLAN_CACHE_SIZE)
+        self.__prepared = PreparedStatements(config.PREPARED_STATEMENTS_LIMIT)
+        self.__metadata_lock = threading.Lock()
+        self.__result_cache = ResultCache(config.RESULT_CACHE_BYTES) if config.RESULT_CACHE else None
     
     @property
     def schemas(self) -> list[str]:
         return self.__schemas
+
+    @property
+    def plan_cache_stats(self) -> dict[str, int]:
+        return self.__plan_cache.stats()
+
+    @property
+    def result_cache_stats(self) -> dict[str, int] | None:
+        return self.__result_cache.stats() if self.__result_cache is not None else None
     
     def __loadMetadatas(self) -> dict[str, Metadata]:
         self.__metadatas = {schema: Metadata(schema) for schema in self.__schemas}
@@ -32,15 +55,99 @@ class DatabaseEngine():
                   if os.path.isdir(Path(path) / schema_name)]
         return schemas
 
-    def execute(self, sql_statement: str, schema: str) -> Iterator[List[Any]]:
+    def execute(self, sql_statement: str, schema: str, parameters: list | dict | None = None) -> Iterator[List[Any]]:
         # Handle all exceptions related to query in the __executor.execute_sql function (e.g: sql syntax error, table not found, col not found, ...) 
         # because this function will raise exceptions for endpoints to throw http errors
         try:
-            results = self.__executor.execute_sql(sql_statement, self.__metadatas[schema], self.__parser)
+            metadata = self.__currentMetadata(schema)
+            parsed_query, plan = self.__plan(sql_statement, schema, metadata)
+            if self.__result_cache is None or parsed_query['type'] != 'select':
+                # ANALYZE and CREATE INDEX are run for their side effects, never served from the cache
+                return plan.execute(parameters)
+            results = self.__cachedExecute(sql_statement, schema, parameters, parsed_query, plan, metadata)
         except Exception as e:
             raise e
         return results
 
+    def result_columns(self, sql_statement: str, schema: str) -> tuple[list[str], list[str]]:
+        """Names and types of the columns of a statement's result, from its (cached) plan."""
+        _, plan = self.__plan(sql_statement, schema, self.__currentMetadata(schema))
+        return plan.columns, plan.column_types
+
+    def __cachedExecute(self, sql_statement: str, schema: str, parameters: list | dict | None,
+                        parsed_query: dict, plan: Any, metadata: Metadata) -> Iterator[List[Any]]:
+        """Serve the query from the result cache, or run it and cache the result once a cursor has read it all."""
+        cache = self.__result_cache
+        try:
+            # Taken before the scan starts, so a file changed while it runs leaves a stale signature behind
+            signature = (metadata.loaded_signature,
+                         tuple(self.__fileSignature(csv_path(schema, table)) for table in referenced_tables(parsed_query)))
+        except OSError:
+            return plan.execute(parameters)
+        key = ResultCache.key(schema, sql_statement, parameters)
+        rows = cache.get(key, signature)
+        if rows is not None:
+            return MaterializedIterator(rows)
+        return RecordingIterator(plan.execute(parameters), cache.budget,
+                                 lambda rows, size: cache.put(key, signature, rows, size))
+
+    @staticmethod
+    def __fileSignature(path: str) -> tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def prepare(self, sql_statement: str, schema: str) -> PreparedStatement:
+        """Parse and plan a statement once, executions of the returned statement only bind parameters."""
+        metadata = self.__currentMetadata(schema)
+        parsed_query, plan = self.__plan(sql_statement, schema, metadata)
+        return self.__prepared.add(PreparedStatement(schema, sql_statement, parsed_query, plan, metadata))
+
+    def prepared_statement(self, statement_id: str) -> PreparedStatement:
+        """The prepared statement with this id, re-planned if its schema's metadata has changed since."""
+        statement = self.__prepared.get(statement_id)
+        if statement is None:
+            raise KeyError(f"Prepared statement id={statement_id} not found")
+        metadata = self.__currentMetadata(statement.schema)
+        if statement.metadata is not metadata:
+            statement.parsed_query, statement.plan = self.__plan(statement.sql, statement.schema, metadata)
+            statement.metadata = metadata
+        return statement
+
+    def execute_prepared(self, statement: PreparedStatement, parameters: list | dict | None = None) -> Iterator[List[Any]]:
+        return statement.plan.execute(parameters)
+
+    def execute_many(self, statement: PreparedStatement, parameter_sets: list[list | dict]) -> Iterator[List[Any]]:
+        """One iterator over the results of every parameter set, each run starts when the previous one is drained."""
+        # Reject a bad parameter set now rather than halfway through the fetches
+        for parameters in parameter_sets:
+            parameter_values(statement.parameters, parameters)
+        plan = statement.plan
+        return ChainIterator(lambda parameters=parameters: plan.execute(parameters) for parameters in parameter_sets)
+
+    def deallocate(self, statement_id: str) -> bool:
+        return self.__prepared.remove(statement_id)
+
+    def __plan(self, sql_statement: str, schema: str, metadata: Metadata) -> tuple[dict, Any]:
+        cached = self.__plan_cache.get(schema, sql_statement)
+        if cached is not None:
+            return cached
+        parsed_query = self.__executor.parse_sql(sql_statement, self.__parser)
+        plan = self.__executor.plan(parsed_query, metadata)
+        self.__plan_cache.put(schema, sql_statement, parsed_query, plan)
+        return parsed_query, plan
+
+    def __currentMetadata(self, schema: str) -> Metadata:
+        """Metadata of the schema, reloaded (and its cached plans dropped) when metadata.yaml has changed."""
+        metadata = self.__metadatas[schema]
+        if metadata.signature() != metadata.loaded_signature:
+            with self.__metadata_lock:
+                metadata = self.__metadatas[schema]
+                if metadata.signature() != metadata.loaded_signature:
+                    metadata = Metadata(schema)
+                    self.__metadatas[schema] = metadata
+                    self.__plan_cache.invalidate(schema)
+        return metadata
+
 db_engine = DatabaseEngine()
 
 def get_engine() -> DatabaseEngine:
@@ -1,19 +1,50 @@
-from lark import Lark, Transformer, Token
+from lark import Lark, Transformer, Token, Tree
 
 grammar = r"""
-    start: select_statement
+    start: select_statement | analyze_statement | explain_statement | create_index_statement
 
-    select_statement: kw_select column_list kw_from table_name [where_clause]
+    // Collects the statistics of a table, see storage_layer/statistics.py
+    analyze_statement: kw_analyze table_name
 
-    column_list: ASTERISK | column_name ("," column_name)*
+    // The plan of a SELECT, with ANALYZE the SELECT runs and every operator reports what it did
+    explain_statement: kw_explain [kw_analyze] select_statement
 
-    column_name: CNAME
+    // Builds a secondary index on one column and declares it in metadata.yaml, see storage_layer/secondary_index.py
+    create_index_statement: kw_create kw_index CNAME kw_on table_name LPAREN CNAME RPAREN
+
+    select_statement: kw_select [kw_distinct] column_list kw_from table_ref joins [where_clause] [group_clause] [order_clause] [limit_clause]
+
+    column_list: ASTERISK | select_item ("," select_item)*
+
+    ?select_item: column_name | aggregate
+
+    // COUNT/SUM/AVG/MIN/MAX, the function name is checked by SQLTransformer
+    aggregate: CNAME LPAREN (ASTERISK | column_name) RPAREN
+
+    column_name: CNAME | QUALIFIED_NAME
     table_name: CNAME
 
+    // An alias needs AS, a bare name after the table would be ambiguous with the keywords that follow it
+    table_ref: table_name [kw_as CNAME]
+
+    // Inner equi-joins, ON compares columns of the joined tables
+    joins: join_clause*
+    join_clause: [kw_inner] kw_join table_ref kw_on condition
+
+    // table.column or alias.column
+    QUALIFIED_NAME.2: /[A-Za-z_][A-Za-z0-9_]*\.[A-Za-z_][A-Za-z0-9_]*/
+
     ASTERISK: "*"
 
     where_clause: kw_where condition
 
+    group_clause: kw_group kw_by column_name ("," column_name)*
+
+    order_clause: kw_order kw_by order_item ("," order_item)*
+    order_item: select_item [kw_asc | kw_desc]
+
+    limit_clause: kw_limit INT [kw_offset INT]
+
     condition: expression
 
     expression: comparison_expression
@@ -29,15 +60,24 @@ grammar = r"""
     SINGLE_QUOTED_STRING: /'(?:[^'\\]|\\.)*'/
 
     operand: CNAME
+           | QUALIFIED_NAME
            | SIGNED_NUMBER
            | ESCAPED_STRING
            | kw_null
            | SINGLE_QUOTED_STRING
+           | QMARK
+           | NAMED_PARAM
+
+    // Placeholders of prepared statements: positional (?) or named (:name)
+    QMARK: "?"
+    NAMED_PARAM: /:[A-Za-z_][A-Za-z0-9_]*/
 
     COMPARISON_OP: ">" | "<" | "=" | ">=" | "<=" | "!=" | "<>"
 
     // Case-insensitive keywords
-    kw_select: /[Ss][Ee][Ll][Ee][Cc][Tt]/
+    // Takes priority over a table name after EXPLAIN ANALYZE, whose ANALYZE may also start ANALYZE <table>
+    kw_select: SELECT
+    SELECT.2: /[Ss][Ee][Ll][Ee][Cc][Tt]\b/
     kw_from: /[Ff][Rr][Oo][Mm]/
     kw_where: /[Ww][Hh][Ee][Rr][Ee]/
     kw_and: /[Aa][Nn][Dd]/
@@ -46,24 +86,138 @@ grammar = r"""
     kw_null: /[Nn][Uu][Ll][Ll]/
     kw_not: /[Nn][Oo][Tt]/
     kw_like: /[Ll][Ii][Kk][Ee]/
+    kw_limit: /[Ll][Ii][Mm][Ii][Tt]/
+    kw_order: /[Oo][Rr][Dd][Ee][Rr]/
+    kw_group: /[Gg][Rr][Oo][Uu][Pp]/
+    kw_by: /[Bb][Yy]/
+    kw_asc: /[Aa][Ss][Cc]/
+    kw_desc: /[Dd][Ee][Ss][Cc]/
+    kw_offset: /[Oo][Ff][Ff][Ss][Ee][Tt]/
+    kw_analyze: /[Aa][Nn][Aa][Ll][Yy][Zz][Ee]/
+    kw_join: /[Jj][Oo][Ii][Nn]/
+    kw_explain: /[Ee][Xx][Pp][Ll][Aa][Ii][Nn]/
+    kw_inner: /[Ii][Nn][Nn][Ee][Rr]/
+    kw_on: /[Oo][Nn]/
+    kw_as: /[Aa][Ss]/
+    kw_create: /[Cc][Rr][Ee][Aa][Tt][Ee]/
+    kw_index: /[Ii][Nn][Dd][Ee][Xx]/
+    // A column may follow SELECT too, the priority makes DISTINCT the keyword and not a column name
+    kw_distinct: DISTINCT
+    DISTINCT.2: /[Dd][Ii][Ss][Tt][Ii][Nn][Cc][Tt]\b/
 
     LPAREN: "("
     RPAREN: ")"
 
     %import common.CNAME
     %import common.ESCAPED_STRING
+    %import common.INT
     %import common.SIGNED_NUMBER
     %import common.WS
     %ignore WS
 """
 
+AGGREGATE_FUNCTIONS = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+
+
+class Parameter:
+    """Placeholder operand of a prepared statement, `key` is its position (?) or its name (:name)."""
+    def __init__(self, key: int | str | None):
+        self.key = key
+
+    def __eq__(self, other):
+        return isinstance(other, Parameter) and other.key == self.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f":{self.key}" if isinstance(self.key, str) else "?"
+
+
+def number_parameters(condition: dict | None) -> list[int | str]:
+    """Number positional placeholders in textual order and return the keys of all placeholders."""
+    keys = []
+
+    def visit(node):
+        if node is None:
+            return
+        if node.get('op', '').upper() in ('AND', 'OR'):
+            visit(node['left'])
+            visit(node['right'])
+            return
+        for side in ('left_operand', 'right_operand'):
+            operand = node.get(side)
+            if isinstance(operand, Parameter):
+                if operand.key is None:
+                    operand.key = len(keys)
+                keys.append(operand.key)
+
+    visit(condition)
+    if any(isinstance(key, int) for key in keys) and any(isinstance(key, str) for key in keys):
+        raise ValueError("Cannot mix positional (?) and named (:name) parameters in one statement")
+    return list(dict.fromkeys(keys))
+
+
+def conjunction(conditions: list[dict | None]) -> dict | None:
+    """AND of the given conditions, None ones left out."""
+    result = None
+    for condition in conditions:
+        if condition is not None:
+            result = condition if result is None else {'op': 'AND', 'left': result, 'right': condition}
+    return result
+
+
 class SQLTransformer(Transformer):
     def select_statement(self, items):
+        distinct = items[1] is not None
+        items = items[:1] + items[2:]
+        where = items[5] if len(items) > 5 else None
+        group_by = items[6] if len(items) > 6 and items[6] is not None else []
+        order_by = items[7] if len(items) > 7 and items[7] is not None else []
+        limit = items[8] if len(items) > 8 and items[8] is not None else {'limit': None, 'offset': 0}
+        # Aggregates of the SELECT list and ORDER BY, by output name
+        aggregates = [item for item in items[1] if isinstance(item, dict)] + \
+                     [item['aggregate'] for item in order_by if 'aggregate' in item]
         return {
             'type': 'select',
-            'columns': items[1],
-            'table': items[3],
-            'where': items[4] if len(items) > 4 else None
+            'distinct': distinct,
+            'columns': [item['name'] if isinstance(item, dict) else item for item in items[1]],
+            'table': items[3]['table'],
+            'alias': items[3]['alias'],
+            'joins': items[4],
+            'where': where,
+            'group_by': group_by,
+            'aggregates': list({aggregate['name']: aggregate for aggregate in aggregates}.values()),
+            'order_by': order_by,
+            'limit': limit['limit'],
+            'offset': limit['offset'],
+            # ON conditions come first in the text, their placeholders are numbered before the WHERE's
+            'parameters': number_parameters(conjunction([join['on'] for join in items[4]] + [where]))
+        }
+
+    def analyze_statement(self, items):
+        return {
+            'type': 'analyze',
+            'table': items[1],
+            'parameters': []
+        }
+
+    def explain_statement(self, items):
+        query = items[2]
+        return {
+            'type': 'explain',
+            'analyze': items[1] is not None,
+            'query': query,
+            'parameters': query['parameters']
+        }
+
+    def create_index_statement(self, items):
+        return {
+            'type': 'create_index',
+            'name': items[2].value,
+            'table': items[4],
+            'column': items[6].value,
+            'parameters': []
         }
 
     def column_list(self, items):
@@ -77,9 +231,58 @@ class SQLTransformer(Transformer):
     def table_name(self, items):
         return items[0].value
 
+    def table_ref(self, items):
+        return {
+            'table': items[0],
+            'alias': items[2].value if items[2] is not None else None
+        }
+
+    def joins(self, items):
+        return list(items)
+
+    def join_clause(self, items):
+        return {
+            **items[2],
+            'on': items[4]
+        }
+
     def where_clause(self, items):
         return items[1]
 
+    def aggregate(self, items):
+        function = items[0].value.upper()
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Unsupported aggregate function: {items[0].value}")
+        column = '*' if isinstance(items[2], Token) and items[2].type == 'ASTERISK' else items[2]
+        if column == '*' and function != 'COUNT':
+            raise ValueError(f"{function}(*) is not supported, only COUNT(*)")
+        return {
+            'function': function,
+            'column': column,
+            'name': f"{function}({column})"
+        }
+
+    def group_clause(self, items):
+        return [item for item in items[2:] if isinstance(item, str)]
+
+    def order_clause(self, items):
+        return [item for item in items[2:] if isinstance(item, dict)]
+
+    def order_item(self, items):
+        item = {
+            'column': items[0]['name'] if isinstance(items[0], dict) else items[0],
+            'descending': isinstance(items[1], Tree) and items[1].data == 'kw_desc'
+        }
+        if isinstance(items[0], dict):
+            item['aggregate'] = items[0]
+        return item
+
+    def limit_clause(self, items):
+        return {
+            'limit': int(items[1]),
+            'offset': int(items[3]) if items[3] is not None else 0
+        }
+
     def condition(self, items):
         return items[0]
 
@@ -140,6 +343,10 @@ class SQLTransformer(Transformer):
                         return float(token.value)
                 case "CNAME"| "ESCAPED_STRING" | "SINGLE_QUOTED_STRING":
                     return token.value
+                case "QMARK":
+                    return Parameter(None)
+                case "NAMED_PARAM":
+                    return Parameter(token.value[1:])
                 case _:
                     return token.value
         elif token is None or (isinstance(token, str) and token.upper() == "NULL"):
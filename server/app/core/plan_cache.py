@@ -0,0 +1,65 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Runs of whitespace outside quoted literals
+_TOKEN_RE = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")|\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside string literals, so formatting differences share a cache entry."""
+    return _TOKEN_RE.sub(lambda m: m.group(1) or " ", sql).strip()
+
+
+class PlanCache:
+    """
+    Bounded LRU cache of parsed statements and their logical plans, keyed by (schema, normalized SQL).
+
+    Logical plans hold no execution state, every execute() creates fresh iterators, so a cached plan
+    serves as the template for any number of concurrent cursors.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries: OrderedDict[tuple[str, str], tuple[dict, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, schema: str, sql: str) -> Optional[tuple[dict, Any]]:
+        key = (schema, normalize_sql(sql))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, schema: str, sql: str, parsed_query: dict, plan: Any) -> None:
+        if self.capacity <= 0:
+            return
+        key = (schema, normalize_sql(sql))
+        with self._lock:
+            self._entries[key] = (parsed_query, plan)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, schema: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == schema]:
+                del self._entries[key]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
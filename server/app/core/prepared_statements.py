@@ -0,0 +1,50 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+from uuid import uuid4
+
+
+class PreparedStatement:
+    """A statement parsed and planned once, executed any number of times with bound parameters."""
+    def __init__(self, schema: str, sql: str, parsed_query: dict, plan: Any, metadata: Any):
+        self.statement_id = str(uuid4())
+        self.schema = schema
+        self.sql = sql
+        self.parsed_query = parsed_query
+        self.plan = plan
+        # Metadata the plan was built from, a reloaded schema means the plan has to be rebuilt
+        self.metadata = metadata
+
+    @property
+    def parameters(self) -> list[int | str]:
+        """Placeholder keys: positions of ``?`` or names of ``:name`` placeholders."""
+        return self.parsed_query.get('parameters', [])
+
+
+class PreparedStatements:
+    """
+    Prepared statements by id. Bounded like PlanCache: past `capacity` the least recently used
+    statement is dropped and executing its id fails as not found, clients then prepare it again.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._statements: OrderedDict[str, PreparedStatement] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, statement: PreparedStatement) -> PreparedStatement:
+        with self._lock:
+            self._statements[statement.statement_id] = statement
+            while len(self._statements) > max(self.capacity, 1):
+                self._statements.popitem(last=False)
+        return statement
+
+    def get(self, statement_id: str) -> Optional[PreparedStatement]:
+        with self._lock:
+            statement = self._statements.get(statement_id)
+            if statement is not None:
+                self._statements.move_to_end(statement_id)
+            return statement
+
+    def remove(self, statement_id: str) -> bool:
+        with self._lock:
+            return self._statements.pop(statement_id, None) is not None
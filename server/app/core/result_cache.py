@@ -0,0 +1,71 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional
+
+from app.core.plan_cache import normalize_sql
+
+
+class ResultCache:
+    """
+    LRU cache of materialized query results within a byte budget, keyed by (schema, normalized SQL,
+    bound parameters).
+
+    Each entry carries the signature (size/mtime of metadata.yaml and of the CSVs the query reads)
+    it was computed under, a lookup with a different signature drops the entry as stale.
+    """
+    def __init__(self, budget: int):
+        self.budget = budget
+        self._entries: OrderedDict[Hashable, tuple[Any, List[List[Any]], int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(schema: str, sql: str, parameters: list | dict | None = None) -> Hashable:
+        bound = None if parameters is None else json.dumps(parameters, sort_keys=True, default=str)
+        return schema, normalize_sql(sql), bound
+
+    def get(self, key: Hashable, signature: Any) -> Optional[List[List[Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != signature:
+                self._remove(key)
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, signature: Any, rows: List[List[Any]], size: int) -> None:
+        if size > self.budget:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (signature, rows, size)
+            self.size += size
+            while self.size > self.budget:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        self.size -= self._entries.pop(key)[2]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,131 @@
+"""
+Compiles the aggregates of a GROUP BY query into one flat Python function that folds a batch of rows
+into a dict of group key -> state list, in the same way predicate.py compiles a WHERE clause.
+
+For ``SELECT department, COUNT(*), AVG(salary) ... GROUP BY department`` the generated code is::
+
+    def update(groups, rows, overflow=None):
+        for row in rows:
+            key = row[3]
+            state = groups.get(key)
+            if state is None:
+                ...
+                state = groups[key] = [0, 0, 0]
+            state[0] += 1
+            v = row[4]
+            if v is not None:
+                state[1] += v
+                state[2] += 1
+
+NULLs are skipped by every function except COUNT(*), as in SQL.
+"""
+from typing import Any, Callable, List
+
+from app.core.storage_layer.columnar import column_kind
+from app.core.storage_layer.predicate import resolve_column
+
+
+def result_type(function: str, column_type: str | None) -> str:
+    """Metadata type of an aggregate's result, `column_type` is the type of its argument (None for *)."""
+    if function == "COUNT":
+        return "INT"
+    kind = column_kind(column_type) if column_type else None
+    if function in ("SUM", "AVG") and kind not in ("int", "float"):
+        raise ValueError(f"{function} needs a numeric column, not {column_type}")
+    if function == "AVG":
+        return "FLOAT"
+    return column_type
+
+
+class CompiledAggregate:
+    """
+    Group key and aggregate states of a GROUP BY over rows with `columns`. ``update`` folds rows into
+    a groups dict; with an `overflow` list, rows of groups that are not in the dict yet are appended
+    to it instead, which is how the hash aggregate stops growing once it reaches its memory budget.
+    """
+
+    def __init__(self, group_by: List[str], aggregates: List[dict], columns: List[str]):
+        self.group_by = group_by
+        self.aggregates = aggregates
+        self.group_indices = [resolve_column(col, columns) for col in group_by]
+        self.argument_indices = [None if agg['column'] == '*' else resolve_column(agg['column'], columns)
+                                 for agg in aggregates]
+        self.columns = list(group_by) + [agg['name'] for agg in aggregates]
+
+        initial, body, self._finalizers = [], [], []
+        for agg, i in zip(aggregates, self.argument_indices):
+            slot = len(initial)
+            function = agg['function']
+            if function == "COUNT":
+                initial.append("0")
+                body += [f"state[{slot}] += 1"] if i is None else \
+                        [f"if row[{i}] is not None:", f"    state[{slot}] += 1"]
+                self._finalizers.append((slot, None))
+                continue
+            body.append(f"v = row[{i}]")
+            body.append("if v is not None:")
+            if function == "SUM":
+                initial.append("None")
+                body.append(f"    state[{slot}] = v if state[{slot}] is None else state[{slot}] + v")
+                self._finalizers.append((slot, None))
+            elif function == "AVG":
+                initial += ["0", "0"]
+                body += [f"    state[{slot}] += v", f"    state[{slot + 1}] += 1"]
+                self._finalizers.append((slot, _average))
+            else:
+                op = "<" if function == "MIN" else ">"
+                initial.append("None")
+                body += [f"    if state[{slot}] is None or v {op} state[{slot}]:", f"        state[{slot}] = v"]
+                self._finalizers.append((slot, None))
+        self._initial_source = f"[{', '.join(initial)}]"
+
+        self.key_expression = self._key_expression()
+        source = "\n".join([
+            "def update(groups, rows, overflow=None):",
+            "    for row in rows:",
+            f"        key = {self.key_expression}",
+            "        state = groups.get(key)",
+            "        if state is None:",
+            "            if overflow is not None:",
+            "                overflow.append(row)",
+            "                continue",
+            f"            state = groups[key] = {self._initial_source}",
+            *(f"        {line}" for line in body),
+            "",
+            "def group_key(row):",
+            f"    return {self.key_expression}",
+            "",
+        ])
+        namespace: dict[str, Any] = {}
+        exec(compile(source, "<group by>", "exec"), namespace)
+        self.update: Callable[[dict, List[List[Any]], list | None], None] = namespace["update"]
+        self.group_key: Callable[[List[Any]], Any] = namespace["group_key"]
+
+    def _key_expression(self) -> str:
+        if not self.group_indices:
+            return "()"
+        if len(self.group_indices) == 1:
+            return f"row[{self.group_indices[0]}]"
+        return "(" + ", ".join(f"row[{i}]" for i in self.group_indices) + ")"
+
+    def initial_state(self) -> list:
+        return eval(self._initial_source)
+
+    def result_row(self, key: Any, state: list) -> List[Any]:
+        if not self.group_indices:
+            row = []
+        elif len(self.group_indices) == 1:
+            row = [key]
+        else:
+            row = list(key)
+        for slot, finalize in self._finalizers:
+            row.append(finalize(state, slot) if finalize else state[slot])
+        return row
+
+    def __repr__(self):
+        aggregates = ", ".join(agg['name'] for agg in self.aggregates)
+        return f"group_by={self.group_by}, aggregates=[{aggregates}]"
+
+
+def _average(state: list, slot: int) -> float | None:
+    return state[slot] / state[slot + 1] if state[slot + 1] else None
@@ -0,0 +1,345 @@
+"""
+Typed columnar sidecar for CSV tables.
+
+A sidecar lives in ``data/<schema>/.columnar/<table>/`` and holds one typed,
+memory-mappable file per column plus a null bitmap, so repeated scans of the
+same CSV skip both ``csv.reader`` and per-cell type conversion:
+
+    manifest.json      csv size/mtime the sidecar was built from, row count, column layout
+    <column>.data      fixed-width values (int64, float64, int8 bool, int32 date ordinal)
+                       or the concatenated utf-8 bytes of a varchar column
+    <column>.offsets   int64 start offsets (row_count + 1) into <column>.data, varchar only
+    <column>.nulls     null bitmap, bit i set when row i is NULL
+
+Build it explicitly with ``python -m app.core.storage_layer.columnar <schema> [<table> ...]``
+or let the first scan build it by setting COLUMNAR_AUTO_BUILD=true.
+"""
+from array import array
+import csv
+import datetime
+import json
+import mmap
+import os
+import shutil
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+from app.core.storage_layer.datatypes import DBTypeObject, STRING, INTEGER, FLOAT, BOOLEAN, DATE, DATETIME, NULL
+from app.core.storage_layer.metadata import DB_DIR
+
+COLUMNAR_DIR = ".columnar"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+# Storage kind -> array typecode of the .data file (varchar is stored as bytes + offsets)
+TYPECODES = {
+    "int": "q",
+    "float": "d",
+    "bool": "b",
+    "date": "i",
+}
+
+
+def column_kind(dtype: str) -> Optional[str]:
+    """Return the sidecar storage kind for a metadata column type, or None if it cannot be stored."""
+    dtype = dtype.lower()
+    if dtype == STRING:
+        return "str"
+    elif dtype == INTEGER:
+        return "int"
+    elif dtype == FLOAT:
+        return "float"
+    elif dtype == BOOLEAN:
+        return "bool"
+    elif dtype == DATE or dtype == DATETIME:
+        return "date"
+    elif dtype == NULL:
+        return "null"
+    return None
+
+
+def sidecar_path(schema: str, table: str) -> str:
+    return os.path.join(DB_DIR, schema.lower(), COLUMNAR_DIR, table.lower())
+
+
+def csv_path(schema: str, table: str) -> str:
+    return os.path.join(DB_DIR, schema.lower(), table.lower() + ".csv")
+
+
+def _csv_signature(path: str) -> tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _file_signature(path: str) -> Optional[tuple[int, int]]:
+    try:
+        return _csv_signature(path)
+    except OSError:
+        return None
+
+
+class SidecarCache:
+    """
+    Objects loaded from sidecar files (statistics, row indexes), reused while the files they were
+    loaded from keep their size and mtime, so that planning a query stats two files instead of
+    reading and parsing a JSON header that grows with the table.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self._capacity = capacity
+        self._entries: OrderedDict[Hashable, tuple[tuple, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, key: Hashable, paths: List[str], loader: Callable[[], Any]) -> Any:
+        """The object `loader` returns (None included), loaded again only when a file of `paths` changed."""
+        # Taken before loading, so a file changed meanwhile leaves a stale signature behind
+        signature = tuple(map(_file_signature, paths))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = loader()
+        with self._lock:
+            self._entries[key] = (signature, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+        return value
+
+
+class ColumnarTable:
+    """Read-only view over a built sidecar. Column files are mapped lazily, on first access."""
+
+    def __init__(self, path: str, manifest: dict):
+        self.path = path
+        self.row_count: int = manifest["row_count"]
+        self._layout = {column["name"]: column for column in manifest["columns"]}
+        self._maps: list[mmap.mmap] = []
+        self._views: list[memoryview] = []
+
+    @classmethod
+    def open(cls, schema: str, table: str, metadata: dict[str, str]) -> Optional['ColumnarTable']:
+        """Open the sidecar of a table if it exists and is fresh, otherwise return None."""
+        path = sidecar_path(schema, table)
+        try:
+            with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            size, mtime_ns = _csv_signature(csv_path(schema, table))
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != FORMAT_VERSION \
+                or manifest.get("csv_size") != size or manifest.get("csv_mtime_ns") != mtime_ns:
+            return None
+        layout = [(column["name"], column["type"]) for column in manifest.get("columns", [])]
+        if layout != list(metadata.items()):
+            return None
+        return cls(path, manifest)
+
+    def _map(self, file_name: str, typecode: Optional[str] = None):
+        with open(os.path.join(self.path, file_name), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                view = memoryview(b"")
+            else:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps.append(mapped)
+                view = memoryview(mapped)
+        self._views.append(view)
+        if typecode:
+            view = view.cast(typecode)
+            self._views.append(view)
+        return view
+
+    def column_reader(self, name: str) -> 'ColumnReader':
+        return ColumnReader(self, self._layout[name])
+
+    def close(self) -> None:
+        # Views must be released before the maps they point into can be closed
+        for view in reversed(self._views):
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._views, self._maps = [], []
+
+
+class ColumnReader:
+    """Decodes a contiguous row range of one sidecar column into typed Python values."""
+
+    def __init__(self, table: ColumnarTable, layout: dict):
+        self.name: str = layout["name"]
+        self.kind: str = layout["kind"]
+        self.null_count: int = layout["null_count"]
+        self._nulls = table._map(layout["name"] + ".nulls") if self.null_count else None
+        if self.kind == "str":
+            self._values = table._map(layout["name"] + ".data")
+            self._offsets = table._map(layout["name"] + ".offsets", "q")
+        elif self.kind == "null":
+            self._values = None
+        else:
+            self._values = table._map(layout["name"] + ".data", TYPECODES[self.kind])
+
+    def view(self, start: int, stop: int) -> memoryview:
+        """Raw typed values of a row range (the .data file as is), for fixed-width columns only."""
+        return self._values[start:stop]
+
+    def take(self, indices: List[int]) -> List[Any]:
+        """Decode the given, not necessarily contiguous, rows."""
+        if self.kind == "null":
+            return [None] * len(indices)
+        if self.kind == "str":
+            data, offsets = self._values, self._offsets
+            values = [str(data[offsets[i]:offsets[i + 1]], "utf-8") for i in indices]
+        else:
+            raw = self._values
+            values = [raw[i] for i in indices]
+            if self.kind == "bool":
+                values = [v != 0 for v in values]
+            elif self.kind == "date":
+                fromordinal = datetime.date.fromordinal
+                values = [fromordinal(v) for v in values]
+        if self._nulls is not None:
+            nulls = self._nulls
+            for n, i in enumerate(indices):
+                if nulls[i >> 3] >> (i & 7) & 1:
+                    values[n] = None
+        return values
+
+    def read(self, start: int, stop: int) -> List[Any]:
+        if self.kind == "null":
+            return [None] * (stop - start)
+        if self.kind == "str":
+            data, offsets = self._values, self._offsets
+            values = [str(data[offsets[i]:offsets[i + 1]], "utf-8") for i in range(start, stop)]
+        elif self.kind == "bool":
+            values = [v != 0 for v in self._values[start:stop]]
+        elif self.kind == "date":
+            fromordinal = datetime.date.fromordinal
+            values = [fromordinal(v) for v in self._values[start:stop]]
+        else:
+            values = self._values[start:stop].tolist()
+        if self._nulls is not None:
+            nulls = self._nulls
+            for i in range(start, stop):
+                if nulls[i >> 3] >> (i & 7) & 1:
+                    values[i - start] = None
+        return values
+
+
+def build_sidecar(schema: str, table: str, metadata: dict[str, str]) -> bool:
+    """
+    (Re)build the sidecar of a table from its CSV. Returns False when a column type has no typed storage
+    or the CSV header does not match the metadata.
+    Like TableIterator, the build stops at the first row that fails to convert, so a sidecar scan returns
+    exactly the rows a CSV scan would.
+    """
+    columns = list(metadata.keys())
+    column_types = list(metadata.values())
+    kinds = [column_kind(dtype) for dtype in column_types]
+    if any(kind is None for kind in kinds):
+        return False
+
+    source = csv_path(schema, table)
+    size, mtime_ns = _csv_signature(source)
+    decoders = DBTypeObject.build_decoders(column_types)
+    values = [bytearray() if kind == "str" else array(TYPECODES[kind]) if kind != "null" else None for kind in kinds]
+    offsets = [array("q", [0]) if kind == "str" else None for kind in kinds]
+    nulls = [bytearray() for _ in kinds]
+    null_counts = [0] * len(kinds)
+    row_count = 0
+
+    with open(source, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        # Leave a mismatching table to the CSV scan, which reports the header error
+        if [col.lower() for col in header] != [col.lower() for col in columns]:
+            return False
+        for raw in reader:
+            try:
+                if len(raw) != len(columns):
+                    raise ValueError(f"Row length {len(raw)} does not match column types length {len(columns)}")
+                row = [decode(data) for decode, data in zip(decoders, raw)]
+                typed = []
+                for value, kind in zip(row, kinds):
+                    if value is None or kind == "null":
+                        typed.append(None)
+                    elif kind == "str":
+                        typed.append(value.encode("utf-8"))
+                    elif kind == "date":
+                        typed.append(value.toordinal())
+                    else:
+                        if kind == "int":
+                            # Probe the range now so an oversized integer rejects the row, not the build
+                            array("q", [value])
+                        typed.append(value)
+            except (ValueError, OverflowError, TypeError):
+                break
+
+            if row_count % 8 == 0:
+                for bitmap in nulls:
+                    bitmap.append(0)
+            for i, value in enumerate(typed):
+                if value is None:
+                    nulls[i][row_count >> 3] |= 1 << (row_count & 7)
+                    null_counts[i] += 1
+                    if kinds[i] == "str":
+                        offsets[i].append(len(values[i]))
+                    elif kinds[i] != "null":
+                        values[i].append(0)
+                elif kinds[i] == "str":
+                    values[i] += value
+                    offsets[i].append(len(values[i]))
+                else:
+                    values[i].append(value)
+            row_count += 1
+
+    # Write into a scratch directory and swap it in, readers never see a half-written sidecar
+    final_path = sidecar_path(schema, table)
+    tmp_path = f"{final_path}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(tmp_path)
+    try:
+        layout = []
+        for i, (name, dtype, kind) in enumerate(zip(columns, column_types, kinds)):
+            with open(os.path.join(tmp_path, name + ".nulls"), "wb") as f:
+                f.write(nulls[i])
+            if kind != "null":
+                with open(os.path.join(tmp_path, name + ".data"), "wb") as f:
+                    f.write(values[i])
+            if kind == "str":
+                with open(os.path.join(tmp_path, name + ".offsets"), "wb") as f:
+                    offsets[i].tofile(f)
+            layout.append({"name": name, "type": dtype, "kind": kind, "null_count": null_counts[i]})
+
+        manifest = {
+            "version": FORMAT_VERSION,
+            "csv_size": size,
+            "csv_mtime_ns": mtime_ns,
+            "row_count": row_count,
+            "columns": layout,
+        }
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+
+        shutil.rmtree(final_path, ignore_errors=True)
+        os.rename(tmp_path, final_path)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return True
+
+
+if __name__ == "__main__":
+    from app.core.storage_layer.metadata import Metadata
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.core.storage_layer.columnar <schema> [<table> ...]")
+        sys.exit(1)
+
+    schema_metadata = Metadata(sys.argv[1])
+    for table_name in sys.argv[2:] or list(schema_metadata.data.keys()):
+        if build_sidecar(schema_metadata.name, table_name, schema_metadata.get_table(table_name)):
+            print(f"Built columnar sidecar for {schema_metadata.name}/{table_name}")
+        else:
+            print(f"Skipped {schema_metadata.name}/{table_name}: a column type has no typed storage")
@@ -1,4 +1,5 @@
 import datetime
+from typing import Any, Callable
 
 class DBTypeObject:
     def __init__(self, *values):
@@ -11,51 +12,30 @@ class DBTypeObject:
     
     @staticmethod
     def convert_datatype(data: str, dtype: str = "") -> any:
-        if dtype.lower() == STRING:
-            if data.startswith("'") and data.endswith("'"):
-                return data[1:-1]
-            return data
-        elif data.startswith("'") and data.endswith("'") and dtype.lower() != STRING:
-            raise ValueError(f"Invalid {dtype.lower} format: {data} is a string, not a {dtype.lower()}")
-        elif dtype.lower() == INTEGER:
-            try:
-                return int(data)
-            except ValueError:
-                raise ValueError(f"Invalid integer format: {data} is not an integer")
-        elif dtype.lower() == FLOAT:
-            try:
-                return float(data)
-            except ValueError:
-                raise ValueError(f"Invalid float format: {data} is not a float")
-        elif dtype.lower() == BOOLEAN:
-            if data.lower() in ["true", "false"]:
-                return data.lower() == "true"
-            else:
-                raise ValueError(f"Invalid boolean format: {data} is not a boolean value")
-        elif dtype.lower() == DATE or dtype.lower() == DATETIME:
-            try:
-                return datetime.datetime.strptime(data, "%Y-%m-%d").date()
-            except ValueError:
-                raise ValueError(f"Invalid date format (format %Y-%m-%d): {data}")
-        elif dtype.lower() == NULL:
-            if data.lower() == "null":
-                return None
-            else:
-                raise ValueError(f"Invalid null format: {data}")
+        return DBTypeObject.get_decoder(dtype)(data)
+
+    @staticmethod
+    def get_decoder(dtype: str = "") -> Callable[[str], Any]:
+        """Resolve the decoder of a column type once, so scans do not dispatch on the type for every cell."""
+        dtype = dtype.lower()
+        if dtype == STRING:
+            return decode_varchar
+        elif dtype == INTEGER:
+            return int
+        elif dtype == FLOAT:
+            return float
+        elif dtype == BOOLEAN:
+            return decode_boolean
+        elif dtype == DATE or dtype == DATETIME:
+            return decode_date
+        elif dtype == NULL:
+            return decode_null
         else:
-            try:
-                if data.startswith("'") and data.endswith("'"):
-                    return data[1:-1]
-                else:
-                    try:
-                        return int(data)
-                    except ValueError:
-                        try:
-                            return float(data)
-                        except ValueError:
-                            return data
-            except Exception as e:
-                raise ValueError(f"Invalid data format: {data}") from e
+            return decode_inferred
+
+    @staticmethod
+    def build_decoders(column_types: list[str]) -> tuple[Callable[[str], Any], ...]:
+        return tuple(DBTypeObject.get_decoder(dtype) for dtype in column_types)
 
     '''
     Unexpected behavior: when changing data to a wrong format, it only returns the rows before the changed row and stop  
@@ -72,7 +52,7 @@ class DBTypeObject:
     def convert_type(row: list[str], column_types: list[str]) -> list[any]:
         if len(row) != len(column_types):
             raise ValueError(f"Row length {len(row)} does not match column types length {len(column_types)}")
-        return [DBTypeObject.convert_datatype(data, dtype) for data, dtype in zip(row, column_types)]
+        return [decode(data) for decode, data in zip(DBTypeObject.build_decoders(column_types), row)]
             
 
 STRING = DBTypeObject("varchar", "text", "char")
@@ -84,3 +64,50 @@ DATETIME = DBTypeObject("datetime", "timestamp")
 NULL = DBTypeObject("null")
 
 
+# Decoders for a single CSV cell. INTEGER and FLOAT columns use the int/float builtins directly.
+
+def decode_varchar(data: str) -> str:
+    if data.startswith("'") and data.endswith("'"):
+        return data[1:-1]
+    return data
+
+
+def decode_boolean(data: str) -> bool:
+    value = data.lower()
+    if value == "true":
+        return True
+    elif value == "false":
+        return False
+    raise ValueError(f"Invalid boolean format: {data} is not a boolean value")
+
+
+def decode_date(data: str) -> datetime.date:
+    # Fast path for canonical YYYY-MM-DD, the guard keeps ISO week dates (2023-W01-1) out of fromisoformat
+    if len(data) == 10 and data[4] == "-" and data[7] == "-":
+        try:
+            return datetime.date.fromisoformat(data)
+        except ValueError:
+            pass
+    # strptime also accepts months and days that are not zero-padded (2023-1-5)
+    try:
+        return datetime.datetime.strptime(data, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid date format (format %Y-%m-%d): {data}")
+
+
+def decode_null(data: str) -> None:
+    if data.lower() == "null":
+        return None
+    raise ValueError(f"Invalid null format: {data}")
+
+
+def decode_inferred(data: str) -> Any:
+    if data.startswith("'") and data.endswith("'"):
+        return data[1:-1]
+    try:
+        return int(data)
+    except ValueError:
+        try:
+            return float(data)
+        except ValueError:
+            return data
@@ -0,0 +1,90 @@
+from typing import List, Any
+
+from app.core.storage_layer.spill import estimate_size
+
+# Rows of a buffered batch measured by buffered_bytes(), the rest are assumed to be the same size
+SIZE_SAMPLE_ROWS = 64
+
+
+class BatchIterator:
+    """
+    Base class of the execution operators. Rows flow between operators in batches: a parent calls
+    ``next_batch()`` on its child, which returns up to ``batch_size`` rows, or an empty list once it
+    is exhausted. Subclasses implement ``_next_batch()``.
+
+    The per-row iterator protocol and ``fetch()`` are adapters over the batches, for cursors that
+    hand out one row or an arbitrary number of rows at a time.
+    """
+    def __init__(self):
+        self._pending: List[List[Any]] = []
+        self._pending_pos = 0
+
+    def _next_batch(self) -> List[List[Any]]:
+        raise NotImplementedError("Subclasses must implement _next_batch()")
+
+    def next_batch(self) -> List[List[Any]]:
+        if self._pending_pos < len(self._pending):
+            rows = self._pending[self._pending_pos:]
+            self._pending, self._pending_pos = [], 0
+            return rows
+        return self._next_batch()
+
+    def __iter__(self) -> 'BatchIterator':
+        return self
+
+    def __next__(self) -> List[Any]:
+        if self._pending_pos >= len(self._pending):
+            self._pending, self._pending_pos = self._next_batch(), 0
+            if not self._pending:
+                raise StopIteration
+        row = self._pending[self._pending_pos]
+        self._pending_pos += 1
+        return row
+
+    def fetch(self, size: int) -> List[List[Any]]:
+        """Return up to `size` rows, fewer only when the iterator is exhausted."""
+        rows: List[List[Any]] = []
+        while len(rows) < size:
+            batch = self.next_batch()
+            if not batch:
+                break
+            missing = size - len(rows)
+            if len(batch) > missing:
+                # Keep the rest of the batch for the next call
+                self._pending, self._pending_pos = batch, missing
+                batch = batch[:missing]
+            rows.extend(batch)
+        return rows
+
+    def fetch_all(self) -> List[List[Any]]:
+        rows: List[List[Any]] = []
+        while batch := self.next_batch():
+            rows.extend(batch)
+        return rows
+
+    def buffered_bytes(self) -> int:
+        """
+        Approximate memory of the rows this operator and its inputs have read ahead of the consumer,
+        what a cursor holds between two fetches. Sorts, joins and aggregates keep their working
+        state within their own memory budgets and are not counted.
+        """
+        size = self._pending_bytes()
+        for name in ('child_iter', 'left_iter', 'right_iter'):
+            child = getattr(self, name, None)
+            if isinstance(child, BatchIterator):
+                size += child.buffered_bytes()
+        return size
+
+    def _pending_bytes(self) -> int:
+        pending = len(self._pending) - self._pending_pos
+        if pending <= 0:
+            return 0
+        return sampled_size(self._pending[self._pending_pos:self._pending_pos + SIZE_SAMPLE_ROWS], pending)
+
+    def close(self) -> None:
+        pass
+
+
+def sampled_size(sample: List[List[Any]], count: int) -> int:
+    """Approximate memory of `count` rows the size of the rows of `sample`."""
+    return estimate_size(sample) * count // len(sample)
@@ -0,0 +1,34 @@
+from typing import List, Any, Callable, Iterable
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+
+
+class ChainIterator(BatchIterator):
+    """
+    Concatenates the results of several runs, e.g. one per parameter set of an executemany.
+
+    Runs are started lazily from `factories`, so only one of them holds a table file open at a time.
+    """
+    def __init__(self, factories: Iterable[Callable[[], BatchIterator]]):
+        super().__init__()
+        self._factories = iter(factories)
+        self._current: BatchIterator | None = None
+
+    def _next_batch(self) -> List[List[Any]]:
+        while True:
+            if self._current is None:
+                factory = next(self._factories, None)
+                if factory is None:
+                    return []
+                self._current = factory()
+            rows = self._current.next_batch()
+            if rows:
+                return rows
+            self._current.close()
+            self._current = None
+
+    def close(self) -> None:
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        self._factories = iter(())
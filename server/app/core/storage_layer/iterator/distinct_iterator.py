@@ -0,0 +1,110 @@
+import heapq
+from itertools import chain, islice
+from operator import itemgetter
+from typing import List, Any, Iterable, Iterator
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.spill import SpillFile, estimate_size
+
+# Spill partitions of a DISTINCT whose set of seen rows outgrows its budget
+SPILL_PARTITIONS = 16
+# Rows per batch of the distinct rows of the spilled partitions, merged back into input order
+MERGE_BATCH_ROWS = 1000
+
+
+class DistinctIterator(BatchIterator):
+    """
+    SELECT DISTINCT over the projected rows, in the order they are first seen. Rows are kept as
+    tuples (lists are not hashable) in a set, a row is returned as soon as it is added to it.
+
+    Once the set holds as many rows as `memory_budget` allows, rows already in it are still dropped
+    and rows not in it are spilled to SPILL_PARTITIONS files by hash, with their position in the
+    input, they cannot be told apart from rows spilled before. After the input is exhausted every
+    partition is deduplicated the same way, recursively when a partition is itself too large, and
+    the distinct rows of the partitions are merged by position. Every row spilled comes after every
+    row returned before the spill, so the output keeps the input order, which a sort below relies on.
+    """
+    def __init__(self, child_iter: BatchIterator, memory_budget: int):
+        super().__init__()
+        self.child_iter = child_iter
+        self._memory_budget = memory_budget
+        self._partitions: List[SpillFile] = []
+        self._batches: Iterator[List[List[Any]]] | None = None
+        self._is_done = False
+
+    def _next_batch(self) -> List[List[Any]]:
+        if self._is_done:
+            return []
+        if self._batches is None:
+            numbered = self._distinct(_numbered(iter(self.child_iter.next_batch, [])), depth=0)
+            self._batches = ([row for _, row in batch] for batch in numbered)
+        batch = next(self._batches, [])
+        if not batch:
+            self.close()
+        return batch
+
+    def _distinct(self, batches: Iterable[List[tuple[int, List[Any]]]], depth: int) -> Iterator[List[tuple[int, List[Any]]]]:
+        """
+        Yields the non-empty batches of (position, row) not seen before, then the distinct ones of the
+        spilled rows, all in position order.
+        """
+        seen: set = set()
+        max_rows = None
+        partitions: List[SpillFile] | None = None
+        for batch in batches:
+            if max_rows is None:
+                # Plus the set slot and the tuple of the row
+                max_rows = max(1, self._memory_budget // (estimate_size([batch[0][1]]) * 2 + 100))
+            new: List[tuple[int, List[Any]]] = []
+            spilled: List[List[tuple[int, List[Any]]]] = [[] for _ in partitions] if partitions is not None else []
+            for entry in batch:
+                key = tuple(entry[1])
+                if key in seen:
+                    continue
+                if partitions is None:
+                    seen.add(key)
+                    new.append(entry)
+                    if len(seen) >= max_rows:
+                        partitions = [SpillFile() for _ in range(SPILL_PARTITIONS)]
+                        self._partitions.extend(partitions)
+                        spilled = [[] for _ in partitions]
+                else:
+                    spilled[hash((depth, key)) % SPILL_PARTITIONS].append(entry)
+            for partition, entries in zip(partitions or [], spilled):
+                partition.write(entries)
+            if new:
+                yield new
+        seen.clear()
+        if partitions is None:
+            return
+        # One partition deduplicated at a time keeps one set in memory, their results wait on disk
+        outputs: List[SpillFile] = []
+        for partition in partitions:
+            if partition.row_count:
+                output = SpillFile()
+                self._partitions.append(output)
+                for distinct in self._distinct(partition.batches(), depth + 1):
+                    output.write(distinct)
+                outputs.append(output)
+            partition.close()
+        merged = heapq.merge(*(output.rows() for output in outputs), key=itemgetter(0))
+        while batch := list(islice(merged, MERGE_BATCH_ROWS)):
+            yield batch
+        for output in outputs:
+            output.close()
+
+    def close(self) -> None:
+        self._is_done = True
+        self._batches = iter(())
+        for partition in self._partitions:
+            partition.close()
+        self._partitions = []
+        self.child_iter.close()
+
+
+def _numbered(batches: Iterable[List[List[Any]]]) -> Iterator[List[tuple[int, List[Any]]]]:
+    """The batches with every row paired with its position in the input."""
+    position = 0
+    for batch in batches:
+        yield list(zip(range(position, position + len(batch)), batch))
+        position += len(batch)
@@ -1,28 +1,39 @@
 from typing import List, Any, Iterator, Callable
 
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
 
-class FilterIterator:
-    def __init__(self, child_iter: Iterator[List[Any]], 
+
+class FilterIterator(BatchIterator):
+    def __init__(self, child_iter: BatchIterator, 
                  predicate: Callable[[List[Any], List[str]], bool],
                  columns: List[str],
                  column_types: List[str]):
+        super().__init__()
+        if not callable(predicate):
+            raise TypeError("Predicate must be a callable function")
         self.child_iter = child_iter
         self.predicate = predicate
+        # Compiled predicates expose their generated function, calling it directly saves a frame per row
+        self._test = getattr(predicate, "function", predicate)
         self._columns = columns
         self._column_types = column_types
         
-    def __iter__(self) -> 'FilterIterator':
-        return self
-        
-    def __next__(self) -> List[Any]:
-        if not callable(self.predicate):
-            raise TypeError("Predicate must be a callable function")
-            
-        while True:
-            row = next(self.child_iter)
-            if self.predicate(row, self.columns):
-                return row
-    
+    def _next_batch(self) -> List[List[Any]]:
+        test, columns = self._test, self._columns
+        # An empty batch means exhausted, so keep pulling until some row passes
+        while batch := self.child_iter.next_batch():
+            rows = [row for row in batch if test(row, columns)]
+            if rows:
+                return rows
+        return []
+
+    def close(self) -> None:
+        self.child_iter.close()
+
+    @property
+    def deferred_decoders(self) -> dict[int, Callable[[str], Any]]:
+        return getattr(self.child_iter, "deferred_decoders", {})
+
     @property
     def columns(self):
         return self._columns
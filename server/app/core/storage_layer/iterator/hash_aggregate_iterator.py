@@ -0,0 +1,119 @@
+from itertools import islice
+from typing import List, Any, Iterable, Iterator
+
+from app.core.storage_layer.aggregate import CompiledAggregate
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.spill import SpillFile, estimate_size
+
+# Spill partitions of a hash aggregate that outgrows its budget
+SPILL_PARTITIONS = 16
+
+
+class HashAggregateIterator(BatchIterator):
+    """
+    GROUP BY / aggregates over the child's rows with one hash table of group states.
+
+    Once the table holds as many groups as `memory_budget` allows, rows of groups already in it are
+    still folded in place, rows of new groups are spilled to SPILL_PARTITIONS files by key hash. After
+    the input is exhausted the in-memory groups are returned, then every partition is aggregated the
+    same way, recursively when a partition is itself too large.
+    """
+    def __init__(self, child_iter: BatchIterator, aggregate: CompiledAggregate,
+                 memory_budget: int, batch_size: int = 1000):
+        super().__init__()
+        self.child_iter = child_iter
+        self.batch_size = batch_size
+        self._aggregate = aggregate
+        self._memory_budget = memory_budget
+        used = set(aggregate.group_indices) | {i for i in aggregate.argument_indices if i is not None}
+        deferred = getattr(child_iter, "deferred_decoders", {})
+        self._decoders = [(i, decode) for i, decode in deferred.items() if i in used]
+        self._partitions: List[SpillFile] = []
+        self._results: Iterator[List[Any]] | None = None
+        self._is_done = False
+
+    def _next_batch(self) -> List[List[Any]]:
+        if self._is_done:
+            return []
+        if self._results is None:
+            self._results = self._aggregate_input()
+        rows = list(islice(self._results, self.batch_size))
+        if len(rows) < self.batch_size:
+            self.close()
+        return rows
+
+    def _aggregate_input(self) -> Iterator[List[Any]]:
+        batches = iter(lambda: self._decode(self.child_iter.next_batch()), [])
+        has_rows, results = self._aggregate_batches(batches, depth=0)
+        if not has_rows and not self._aggregate.group_indices:
+            # Aggregates without GROUP BY return one row even for no input, e.g. COUNT(*) = 0
+            return iter([self._aggregate.result_row((), self._aggregate.initial_state())])
+        return results
+
+    def _aggregate_batches(self, batches: Iterable[List[List[Any]]], depth: int) -> tuple[bool, Iterator[List[Any]]]:
+        """Consume `batches`, returns (whether there were any rows, iterator over the result rows)."""
+        update, group_key = self._aggregate.update, self._aggregate.group_key
+        groups: dict = {}
+        max_groups = None
+        partitions: List[SpillFile] | None = None
+        has_rows = False
+        for batch in batches:
+            has_rows = True
+            if partitions is None:
+                update(groups, batch)
+                if max_groups is None:
+                    max_groups = self._max_groups(groups)
+                if len(groups) > max_groups:
+                    partitions = [SpillFile() for _ in range(SPILL_PARTITIONS)]
+                    self._partitions.extend(partitions)
+                continue
+            overflow: List[List[Any]] = []
+            update(groups, batch, overflow)
+            spilled: List[List[List[Any]]] = [[] for _ in partitions]
+            for row in overflow:
+                spilled[hash((depth, group_key(row))) % SPILL_PARTITIONS].append(row)
+            for partition, rows in zip(partitions, spilled):
+                partition.write(rows)
+        return has_rows, self._results_of(groups, partitions, depth)
+
+    def _results_of(self, groups: dict, partitions: List[SpillFile] | None, depth: int) -> Iterator[List[Any]]:
+        result_row = self._aggregate.result_row
+        for key, state in groups.items():
+            yield result_row(key, state)
+        groups.clear()
+        for partition in partitions or []:
+            if partition.row_count:
+                _, results = self._aggregate_batches(partition.batches(), depth + 1)
+                yield from results
+            partition.close()
+
+    def _max_groups(self, groups: dict) -> int:
+        """Groups that fit the budget, from the size of one group's key and state."""
+        if not groups:
+            return 1
+        key, state = next(iter(groups.items()))
+        key = list(key) if isinstance(key, tuple) else [key]
+        # Plus the dict slot of the group
+        per_group = estimate_size([key, state]) + 100
+        return max(1, self._memory_budget // per_group)
+
+    def _decode(self, rows: List[List[Any]]) -> List[List[Any]]:
+        if not self._decoders:
+            return rows
+        for n, row in enumerate(rows):
+            try:
+                for i, decode in self._decoders:
+                    row[i] = decode(row[i])
+            except Exception:
+                # As in TableIterator, a row that fails to convert ends the input
+                self.child_iter.close()
+                return rows[:n]
+        return rows
+
+    def close(self) -> None:
+        self._is_done = True
+        self._results = iter(())
+        for partition in self._partitions:
+            partition.close()
+        self._partitions = []
+        self.child_iter.close()
@@ -0,0 +1,147 @@
+from itertools import islice
+from operator import itemgetter
+from typing import List, Any, Callable, Iterable, Iterator
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.spill import SpillFile, estimate_size
+
+# Partitions of both inputs once the build side outgrows its budget
+SPILL_PARTITIONS = 16
+# Partitioning depth past which a partition is joined in memory whatever its size, e.g. one huge key
+MAX_SPILL_DEPTH = 4
+
+
+def decoded_batches(child_iter: BatchIterator) -> Iterator[List[List[Any]]]:
+    """
+    The child's batches with the columns it left undecoded decoded, a join emits complete rows.
+    As in TableIterator, a row that fails to convert ends the input.
+    """
+    decoders = list(getattr(child_iter, "deferred_decoders", {}).items())
+    while batch := child_iter.next_batch():
+        if decoders:
+            for n, row in enumerate(batch):
+                try:
+                    for i, decode in decoders:
+                        row[i] = decode(row[i])
+                except Exception:
+                    child_iter.close()
+                    yield batch[:n]
+                    return
+        yield batch
+
+
+def join_key(key_indices: List[int]) -> Callable[[List[Any]], Any]:
+    """The key of a row: its value for one column, a tuple of values for several."""
+    return itemgetter(*key_indices)
+
+
+class HashJoinIterator(BatchIterator):
+    """
+    Inner equi-join: the rows of the build input go into a hash table by key, the probe input is
+    streamed through it. Output rows are always the left row followed by the right row, whichever
+    side is the build side. Rows with a NULL in the key match nothing.
+
+    When the build rows outgrow `memory_budget` both inputs are split into SPILL_PARTITIONS files by
+    key hash and every pair of partitions is joined the same way, recursively when a build partition
+    is itself too large.
+    """
+    def __init__(self, left_iter: BatchIterator, right_iter: BatchIterator, left_keys: List[int],
+                 right_keys: List[int], build_left: bool, memory_budget: int, batch_size: int = 1000):
+        super().__init__()
+        self.left_iter = left_iter
+        self.right_iter = right_iter
+        self.batch_size = batch_size
+        self.build_left = build_left
+        self._memory_budget = memory_budget
+        left_key, right_key = join_key(left_keys), join_key(right_keys)
+        self._build_key, self._probe_key = (left_key, right_key) if build_left else (right_key, left_key)
+        self._composite = len(left_keys) > 1
+        self._partitions: List[SpillFile] = []
+        self._results: Iterator[List[Any]] | None = None
+        self._is_done = False
+
+    def _next_batch(self) -> List[List[Any]]:
+        if self._is_done:
+            return []
+        if self._results is None:
+            build, probe = (self.left_iter, self.right_iter) if self.build_left else (self.right_iter, self.left_iter)
+            self._results = self._join(decoded_batches(build), decoded_batches(probe), depth=0)
+        rows = list(islice(self._results, self.batch_size))
+        if len(rows) < self.batch_size:
+            self.close()
+        return rows
+
+    def _join(self, build: Iterable[List[List[Any]]], probe: Iterable[List[List[Any]]],
+              depth: int) -> Iterator[List[Any]]:
+        table: dict[Any, List[List[Any]]] = {}
+        size = 0
+        build_partitions: List[SpillFile] | None = None
+        for batch in build:
+            rows = self._with_keys(batch, self._build_key)
+            if build_partitions is not None:
+                self._partition(rows, build_partitions, depth)
+                continue
+            for key, row in rows:
+                table.setdefault(key, []).append(row)
+            size += estimate_size(batch)
+            if size > self._memory_budget and depth < MAX_SPILL_DEPTH:
+                build_partitions = self._new_partitions()
+                self._partition([(key, row) for key, matches in table.items() for row in matches],
+                                build_partitions, depth)
+                table.clear()
+
+        if build_partitions is None:
+            yield from self._probe(table, probe)
+            return
+        probe_partitions = self._new_partitions()
+        for batch in probe:
+            self._partition(self._with_keys(batch, self._probe_key), probe_partitions, depth)
+        for build_part, probe_part in zip(build_partitions, probe_partitions):
+            if build_part.row_count and probe_part.row_count:
+                yield from self._join(build_part.batches(), probe_part.batches(), depth + 1)
+            build_part.close()
+            probe_part.close()
+
+    def _probe(self, table: dict, probe: Iterable[List[List[Any]]]) -> Iterator[List[Any]]:
+        if not table:
+            return
+        probe_key, build_left = self._probe_key, self.build_left
+        for batch in probe:
+            for key, row in self._with_keys(batch, probe_key):
+                matches = table.get(key)
+                if matches is None:
+                    continue
+                if build_left:
+                    for match in matches:
+                        yield match + row
+                else:
+                    for match in matches:
+                        yield row + match
+
+    def _with_keys(self, rows: List[List[Any]], key: Callable[[List[Any]], Any]) -> List[tuple[Any, List[Any]]]:
+        """(key, row) of the rows whose key has no NULL."""
+        if self._composite:
+            return [(k, row) for row in rows if None not in (k := key(row))]
+        return [(k, row) for row in rows if (k := key(row)) is not None]
+
+    def _new_partitions(self) -> List[SpillFile]:
+        partitions = [SpillFile() for _ in range(SPILL_PARTITIONS)]
+        self._partitions.extend(partitions)
+        return partitions
+
+    @staticmethod
+    def _partition(rows: List[tuple[Any, List[Any]]], partitions: List[SpillFile], depth: int) -> None:
+        spilled: List[List[List[Any]]] = [[] for _ in partitions]
+        for key, row in rows:
+            spilled[hash((depth, key)) % SPILL_PARTITIONS].append(row)
+        for partition, part_rows in zip(partitions, spilled):
+            partition.write(part_rows)
+
+    def close(self) -> None:
+        self._is_done = True
+        self._results = iter(())
+        for partition in self._partitions:
+            partition.close()
+        self._partitions = []
+        self.left_iter.close()
+        self.right_iter.close()
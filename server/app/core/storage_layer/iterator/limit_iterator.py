@@ -0,0 +1,42 @@
+from typing import List, Any
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+
+
+class LimitIterator(BatchIterator):
+    """
+    Skips the first `offset` rows of its child and returns at most `limit` rows after them.
+    The child is closed as soon as the last row is produced, which releases the table file
+    without waiting for the cursor to be closed.
+    """
+    def __init__(self, child_iter: BatchIterator, limit: int, offset: int = 0):
+        super().__init__()
+        self.child_iter = child_iter
+        self._remaining = limit
+        self._to_skip = offset
+        if limit <= 0:
+            self.close()
+
+    def _next_batch(self) -> List[List[Any]]:
+        while self._remaining > 0:
+            batch = self.child_iter.next_batch()
+            if not batch:
+                break
+            if self._to_skip:
+                if len(batch) <= self._to_skip:
+                    self._to_skip -= len(batch)
+                    continue
+                batch = batch[self._to_skip:]
+                self._to_skip = 0
+            if len(batch) >= self._remaining:
+                batch = batch[:self._remaining]
+                self.close()
+            else:
+                self._remaining -= len(batch)
+            return batch
+        self.close()
+        return []
+
+    def close(self) -> None:
+        self._remaining = 0
+        self.child_iter.close()
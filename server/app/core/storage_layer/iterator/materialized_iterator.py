@@ -0,0 +1,20 @@
+from typing import List, Any
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+
+
+class MaterializedIterator(BatchIterator):
+    """Serves rows that are already in memory, e.g. a result cache hit, in batches of `batch_size`."""
+    def __init__(self, rows: List[List[Any]], batch_size: int = 1000):
+        super().__init__()
+        self._rows = rows
+        self._position = 0
+        self.batch_size = batch_size
+
+    def _next_batch(self) -> List[List[Any]]:
+        start = self._position
+        self._position = min(start + self.batch_size, len(self._rows))
+        return self._rows[start:self._position]
+
+    def close(self) -> None:
+        self._position = len(self._rows)
@@ -0,0 +1,70 @@
+from itertools import islice
+from typing import List, Any, Iterator
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.iterator.hash_join_iterator import decoded_batches
+
+
+class MergeJoinIterator(BatchIterator):
+    """
+    Inner equi-join on one column of two inputs that are both in ascending order of it, without
+    NULLs. Only the right rows of the current key are held in memory. An input found out of order
+    raises instead of silently missing matches.
+    """
+    def __init__(self, left_iter: BatchIterator, right_iter: BatchIterator, left_key: int, right_key: int,
+                 batch_size: int = 1000):
+        super().__init__()
+        self.left_iter = left_iter
+        self.right_iter = right_iter
+        self.batch_size = batch_size
+        self._left_key = left_key
+        self._right_key = right_key
+        self._results: Iterator[List[Any]] | None = None
+        self._is_done = False
+
+    def _next_batch(self) -> List[List[Any]]:
+        if self._is_done:
+            return []
+        if self._results is None:
+            self._results = self._merge()
+        rows = list(islice(self._results, self.batch_size))
+        if len(rows) < self.batch_size:
+            self.close()
+        return rows
+
+    def _merge(self) -> Iterator[List[Any]]:
+        left = self._sorted_rows(self.left_iter, self._left_key)
+        right = self._sorted_rows(self.right_iter, self._right_key)
+        left_row, right_row = next(left, None), next(right, None)
+        li, ri = self._left_key, self._right_key
+        while left_row is not None and right_row is not None:
+            key = left_row[li]
+            if key < right_row[ri]:
+                left_row = next(left, None)
+            elif right_row[ri] < key:
+                right_row = next(right, None)
+            else:
+                run = [right_row]
+                while (right_row := next(right, None)) is not None and right_row[ri] == key:
+                    run.append(right_row)
+                while left_row is not None and left_row[li] == key:
+                    for match in run:
+                        yield left_row + match
+                    left_row = next(left, None)
+
+    @staticmethod
+    def _sorted_rows(child_iter: BatchIterator, key: int) -> Iterator[List[Any]]:
+        previous = None
+        for batch in decoded_batches(child_iter):
+            for row in batch:
+                value = row[key]
+                if value is None or (previous is not None and value < previous):
+                    raise ValueError("Merge join input is not in ascending order of its key, run ANALYZE again")
+                previous = value
+                yield row
+
+    def close(self) -> None:
+        self._is_done = True
+        self._results = iter(())
+        self.left_iter.close()
+        self.right_iter.close()
@@ -0,0 +1,146 @@
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Deque, List, Optional
+
+from app.core.storage_layer.iterator.batch_iterator import SIZE_SAMPLE_ROWS, BatchIterator, sampled_size
+
+
+class PrefetchIterator(BatchIterator):
+    """
+    Reads the batches of its child ahead of the consumer on a worker of `executor`, so that an open
+    cursor computes its next rows between two fetches instead of while the client waits for them.
+
+    A task reads one batch and queues the next task behind those of the other cursors, so a cursor
+    filling its buffer holds a worker for a batch at a time rather than until the buffer is full.
+    The tasks stop once `capacity` rows are buffered (one batch more at most) and are scheduled
+    again when the consumer takes rows, so a slow client holds a bounded buffer rather than the
+    whole result. A consumer that finds the buffer empty while its task is still queued cancels it
+    and reads the batch itself. The child is only ever read by one thread at a time: the worker,
+    or the consumer when no task is pending. An error of the child is raised to the consumer after
+    the rows read before it.
+    """
+    def __init__(self, child_iter: BatchIterator, capacity: int, executor: Executor):
+        super().__init__()
+        self.child_iter = child_iter
+        self._capacity = capacity
+        self._executor = executor
+        self._batches: Deque[List[List[Any]]] = deque()
+        self._buffered_rows = 0
+        self._error: Optional[BaseException] = None
+        self._is_done = False
+        self._is_closed = False
+        # A task is pending, queued (`_future` not started yet) or reading the child
+        self._running = False
+        self._started = False
+        self._future: Optional[Future] = None
+        self._ready = threading.Condition()
+        with self._ready:
+            self._schedule()
+
+    def _next_batch(self) -> List[List[Any]]:
+        with self._ready:
+            while not self._batches and self._running:
+                # Waiting for the tasks of other cursors to run first would only delay this one
+                if not self._started and self._future is not None and self._future.cancel():
+                    break
+                self._ready.wait()
+            if self._batches:
+                batch = self._batches.popleft()
+                self._buffered_rows -= len(batch)
+                self._schedule()
+                return batch
+            if self._error is not None:
+                error, self._error = self._error, None
+                self._is_done = True
+                raise error
+            if self._is_done or self._is_closed:
+                return []
+        # The buffer ran dry: read this batch here, like an iterator without prefetch
+        batch = self.child_iter.next_batch()
+        with self._ready:
+            if not batch:
+                self._is_done = True
+            else:
+                self._schedule()
+        return batch
+
+    def _schedule(self) -> None:
+        """Queue a task unless one is pending or there is nothing to read, called holding the lock."""
+        if self._running or self._is_done or self._is_closed or self._error is not None \
+                or self._buffered_rows >= self._capacity:
+            return
+        self._running = True
+        self._started = False
+        try:
+            future = self._executor.submit(self._fill)
+        except RuntimeError:
+            # The executor is shutting down, the consumer reads the child itself
+            self._running = False
+            return
+        self._future = future
+        future.add_done_callback(self._cancelled)
+
+    def _cancelled(self, future: Future) -> None:
+        """Done callback of a task: one cancelled by the consumer or by the executor shutting down never ran."""
+        if not future.cancelled():
+            return
+        with self._ready:
+            if self._future is not future:
+                return
+            self._future = None
+            self._running = False
+            self._ready.notify_all()
+            closed = self._is_closed
+        if closed:
+            # close() left the child to the task, which will not run
+            self.child_iter.close()
+
+    def _fill(self) -> None:
+        with self._ready:
+            self._started = True
+            closed = self._is_closed
+        batch: Optional[List[List[Any]]] = None
+        if not closed:
+            try:
+                batch = self.child_iter.next_batch()
+            except BaseException as e:
+                with self._ready:
+                    self._error = e
+        with self._ready:
+            self._future = None
+            self._running = False
+            closed = self._is_closed
+            if batch is not None and not closed:
+                if not batch:
+                    self._is_done = True
+                else:
+                    self._batches.append(batch)
+                    self._buffered_rows += len(batch)
+                    self._schedule()
+            self._ready.notify_all()
+        if closed:
+            # close() left the child to the worker that was reading it
+            self.child_iter.close()
+
+    def buffered_bytes(self) -> int:
+        with self._ready:
+            rows = self._buffered_rows
+            sample = self._batches[0][:SIZE_SAMPLE_ROWS] if self._batches else []
+            running = self._running
+        size = self._pending_bytes() + (sampled_size(sample, rows) if sample else 0)
+        # While a worker reads the child, its state is not looked at from this thread
+        return size if running else size + self.child_iter.buffered_bytes()
+
+    def close(self) -> None:
+        with self._ready:
+            self._is_closed = True
+            self._batches.clear()
+            self._buffered_rows = 0
+            running = self._running
+            queued = self._future if running and not self._started else None
+        if queued is not None and queued.cancel():
+            # Its done callback closed the child
+            return
+        if not running:
+            self.child_iter.close()
@@ -0,0 +1,35 @@
+from time import perf_counter
+from typing import List, Any, Optional
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.iterator.table_iterator import TableIterator
+
+
+class ProfilingIterator(BatchIterator):
+    """
+    Counts the rows of the iterator of one plan operator and times its batches (including the time
+    spent in its inputs), for EXPLAIN ANALYZE. Attributes it does not have are looked up on the
+    wrapped iterator, so operators that reach into their child's iterator keep working.
+    """
+    def __init__(self, inner: BatchIterator):
+        super().__init__()
+        self._inner = inner
+        self.rows = 0
+        self.seconds = 0.0
+        # The CSV scan of the operator, whose bytes and conversion time are reported with it
+        self.scan: Optional[TableIterator] = inner if isinstance(inner, TableIterator) else None
+        if self.scan is not None:
+            self.scan.enable_profiling()
+
+    def _next_batch(self) -> List[List[Any]]:
+        start = perf_counter()
+        batch = self._inner.next_batch()
+        self.seconds += perf_counter() - start
+        self.rows += len(batch)
+        return batch
+
+    def close(self) -> None:
+        self._inner.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
@@ -1,14 +1,35 @@
-from typing import List, Any, Iterator
+from typing import List, Any
 
-class ProjectIterator:
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+
+
+class ProjectIterator(BatchIterator):
     """Iterator that projects specific columns from a child iterator"""
-    def __init__(self, child_iter: Iterator[List[Any]], column_indices: List[int]):
+    def __init__(self, child_iter: BatchIterator, column_indices: List[int]):
+        super().__init__()
         self.child_iter = child_iter
         self.column_indices = column_indices
+        # Columns the scan left undecoded are decoded here, after the filter has dropped its rows
+        deferred = getattr(child_iter, "deferred_decoders", {})
+        self._deferred_decoders = [(pos, deferred[i]) for pos, i in enumerate(column_indices) if i in deferred]
+        self._is_done = False
         
-    def __iter__(self) -> 'ProjectIterator':
-        return self
-        
-    def __next__(self) -> List[Any]:
-        row = next(self.child_iter)
-        return [row[i] if 0 <= i < len(row) else None for i in self.column_indices]
+    def _next_batch(self) -> List[List[Any]]:
+        if self._is_done:
+            return []
+        indices = self.column_indices
+        rows = [[row[i] for i in indices] for row in self.child_iter.next_batch()]
+        if self._deferred_decoders:
+            for n, row in enumerate(rows):
+                try:
+                    for pos, decode in self._deferred_decoders:
+                        row[pos] = decode(row[pos])
+                except Exception:
+                    # Same as a conversion error in TableIterator: the scan ends at the first bad row
+                    self.close()
+                    return rows[:n]
+        return rows
+
+    def close(self) -> None:
+        self._is_done = True
+        self.child_iter.close()
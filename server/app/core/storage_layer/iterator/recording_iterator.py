@@ -0,0 +1,43 @@
+from typing import List, Any, Callable
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.spill import estimate_size
+
+
+class RecordingIterator(BatchIterator):
+    """
+    Passes the batches of its child through and keeps a copy of them. Once the child is exhausted
+    the complete result is handed to `on_complete(rows, size)`; a result that grows past
+    `budget` bytes, or a cursor closed before the end, is not recorded.
+    """
+    def __init__(self, child_iter: BatchIterator, budget: int,
+                 on_complete: Callable[[List[List[Any]], int], None]):
+        super().__init__()
+        self.child_iter = child_iter
+        self._budget = budget
+        self._on_complete = on_complete
+        self._rows: List[List[Any]] | None = []
+        self._size = 0
+
+    def _next_batch(self) -> List[List[Any]]:
+        batch = self.child_iter.next_batch()
+        if self._rows is None:
+            return batch
+        if not batch:
+            rows, self._rows = self._rows, None
+            self._on_complete(rows, self._size)
+            return batch
+        self._size += estimate_size(batch)
+        if self._size > self._budget:
+            self._rows = None
+        else:
+            self._rows.extend(batch)
+        return batch
+
+    def buffered_bytes(self) -> int:
+        # The copy of the result kept for the cache lives as long as the cursor
+        return super().buffered_bytes() + (self._size if self._rows is not None else 0)
+
+    def close(self) -> None:
+        self._rows = None
+        self.child_iter.close()
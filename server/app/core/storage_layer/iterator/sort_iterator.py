@@ -0,0 +1,134 @@
+import heapq
+from itertools import islice
+from typing import List, Any, Callable, Iterator
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.spill import SpillFile, estimate_size
+
+# Runs merged at once; more runs are first merged into longer runs, which bounds the open files
+MERGE_FAN_IN = 64
+
+
+class _Descending:
+    """Sort key component that orders its value in reverse, for mixed ASC/DESC keys."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def sort_key(key_indices: List[int], descending: List[bool]) -> tuple[Callable[[List[Any]], Any], bool]:
+    """
+    Returns (key function, reverse flag) ordering rows by the given columns. NULLs sort after
+    every value in ascending order and before them in descending order.
+    """
+    if len(set(descending)) <= 1:
+        # One direction for all columns: plain tuples, the direction is the reverse flag
+        if len(key_indices) == 1:
+            i = key_indices[0]
+            return (lambda row: (row[i] is None, row[i])), descending[0]
+        return (lambda row: tuple((row[i] is None, row[i]) for i in key_indices)), descending[0]
+    parts = list(zip(key_indices, descending))
+    return (lambda row: tuple(_Descending((row[i] is None, row[i])) if desc else (row[i] is None, row[i])
+                              for i, desc in parts)), False
+
+
+class SortIterator(BatchIterator):
+    """
+    Sorts its input by `key_indices`. Rows are sorted in memory up to `memory_budget` bytes, beyond
+    that sorted runs are spilled to temporary files and merged while the cursor fetches.
+
+    Key columns the child left undecoded are decoded here, the other deferred columns stay raw
+    (they are cheaper to spill) and are passed on to ProjectIterator.
+    """
+    def __init__(self, child_iter: BatchIterator, key_indices: List[int], descending: List[bool],
+                 memory_budget: int, batch_size: int = 1000):
+        super().__init__()
+        self.child_iter = child_iter
+        self.batch_size = batch_size
+        self._memory_budget = memory_budget
+        self._key, self._reverse = sort_key(key_indices, descending)
+        deferred = getattr(child_iter, "deferred_decoders", {})
+        self._key_decoders = [(i, deferred[i]) for i in key_indices if i in deferred]
+        self._deferred_decoders = {i: decode for i, decode in deferred.items() if i not in key_indices}
+        self._runs: List[SpillFile] = []
+        self._sorted: Iterator[List[Any]] | None = None
+        self._is_done = False
+
+    def _next_batch(self) -> List[List[Any]]:
+        if self._is_done:
+            return []
+        if self._sorted is None:
+            self._sorted = self._sort_input()
+        rows = list(islice(self._sorted, self.batch_size))
+        if len(rows) < self.batch_size:
+            self.close()
+        return rows
+
+    def _sort_input(self) -> Iterator[List[Any]]:
+        buffer: List[List[Any]] = []
+        size = 0
+        while batch := self._decode_keys(self.child_iter.next_batch()):
+            buffer.extend(batch)
+            size += estimate_size(batch)
+            if size > self._memory_budget:
+                self._spill(buffer)
+                buffer, size = [], 0
+        if not self._runs:
+            buffer.sort(key=self._key, reverse=self._reverse)
+            return iter(buffer)
+        self._spill(buffer)
+        return self._merge_runs()
+
+    def _decode_keys(self, rows: List[List[Any]]) -> List[List[Any]]:
+        if not self._key_decoders:
+            return rows
+        for n, row in enumerate(rows):
+            try:
+                for i, decode in self._key_decoders:
+                    row[i] = decode(row[i])
+            except Exception:
+                # As in TableIterator, a row that fails to convert ends the input
+                self.child_iter.close()
+                return rows[:n]
+        return rows
+
+    def _spill(self, rows: List[List[Any]]) -> None:
+        if not rows:
+            return
+        rows.sort(key=self._key, reverse=self._reverse)
+        run = SpillFile()
+        self._runs.append(run)
+        for start in range(0, len(rows), self.batch_size):
+            run.write(rows[start:start + self.batch_size])
+
+    def _merge_runs(self) -> Iterator[List[Any]]:
+        while len(self._runs) > MERGE_FAN_IN:
+            # Merge the oldest runs into one, keeping the merge stable
+            merged = SpillFile()
+            group, self._runs = self._runs[:MERGE_FAN_IN], self._runs[MERGE_FAN_IN:]
+            rows = heapq.merge(*(run.rows() for run in group), key=self._key, reverse=self._reverse)
+            while batch := list(islice(rows, self.batch_size)):
+                merged.write(batch)
+            for run in group:
+                run.close()
+            self._runs.insert(0, merged)
+        return heapq.merge(*(run.rows() for run in self._runs), key=self._key, reverse=self._reverse)
+
+    def close(self) -> None:
+        self._is_done = True
+        self._sorted = iter(())
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self.child_iter.close()
+
+    @property
+    def deferred_decoders(self) -> dict[int, Callable[[str], Any]]:
+        return self._deferred_decoders
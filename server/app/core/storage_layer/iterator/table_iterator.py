@@ -2,38 +2,341 @@ from pathlib import Path
 import csv
 import os
 import json
-from typing import List, Any
+from itertools import islice
+from time import perf_counter
+from typing import List, Any, Callable, Optional
 
+from app.core import config
+from app.core.storage_layer.columnar import ColumnarTable, build_sidecar
 from app.core.storage_layer.datatypes import DBTypeObject
+from app.core.storage_layer.predicate import referenced_columns
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.optimizer import AccessPath, INDEX_SCAN, ZONE_MAP_SCAN
+from app.core.storage_layer.row_index import RowIndex, open_row_index
+from app.core.storage_layer.secondary_index import SecondaryIndex, build_index, index_bounds
 
 DB_DIR = str(Path(__file__).parent.parent.parent.parent.parent / "data")
 
-class TableIterator:
-    def __init__(self, schema: str, table: str, metadata: dict[str, str] = None, batch_size: int = 1000):
+class TableIterator(BatchIterator):
+    def __init__(self, schema: str, table: str, metadata: dict[str, str] = None, batch_size: int = 1000,
+                 required_columns: Optional[List[str]] = None, predicate_columns: Optional[List[str]] = None,
+                 indexes: Optional[List[str]] = None):
+        super().__init__()
         self.schema = schema.lower()
         self.table_name = table.lower()
         self.batch_size = batch_size
         self._columns = list(metadata.keys()) if metadata else []
         self._column_types = list(metadata.values()) if metadata else []
-        self._file = self._load_file(schema=self.schema, table=self.table_name)
-        self._reader = csv.reader(self._file)
-        self._check_header()
+        # Resolved once per scan, _next_batch only applies them
+        self._decoders = DBTypeObject.build_decoders(self._column_types)
+        # Columns the query reads; the others may come back as None or undecoded (all columns when not given)
+        self._required_columns = required_columns
+        required = self._columns if required_columns is None else required_columns
+        # Only predicate columns are decoded for every row. The remaining required columns are
+        # handed downstream as raw strings together with their decoders (see deferred_decoders),
+        # so they are decoded only for the rows that survive the filter.
+        eager = required if predicate_columns is None else [col for col in required if col in predicate_columns]
+        self._eager_decoders = [(i, self._decoders[i]) for i, col in enumerate(self._columns) if col in eager]
+        self._deferred_decoders = {i: self._decoders[i] for i, col in enumerate(self._columns)
+                                   if col in required and col not in eager}
+        self._metadata = metadata
         self._is_done = False
+        self._file = None
+        # Set by enable_profiling() for EXPLAIN ANALYZE only
+        self.decode_seconds: Optional[float] = None
+        self._bytes_read: Optional[int] = None
+        self._skipped_bytes = 0
+        # Set by restrict(): [start, stop, byte offset] row ranges still to read and the next row of the reader
+        self._runs: Optional[List[list]] = None
+        self._row = 0
+        # Columns with a declared secondary index, and the one restrict() used
+        self._indexes = indexes or []
+        self.index_column: Optional[str] = None
+        # Blocks of the table and blocks skipped by zone maps, None unless skip_blocks() used them
+        self.blocks_total: Optional[int] = None
+        self.blocks_skipped: Optional[int] = None
+        self._eager_columns = eager
+        self._sidecar = self._open_sidecar(metadata) if metadata else None
+        if self._sidecar is None:
+            self._file = self._load_file(schema=self.schema, table=self.table_name)
+            self._reader = csv.reader(self._file)
+            self._check_header()
+        else:
+            # Sidecar columns are already typed, there is nothing left to defer
+            self._deferred_decoders = {}
+            self._column_readers = [self._sidecar.column_reader(col) if col in required else None
+                                    for col in self._columns]
+            self._position = 0
     
-    def __iter__(self) -> 'TableIterator':
-        return self
-    
-    def __next__(self) -> List[Any]:
+    def _next_batch(self) -> List[List[Any]]:
+        if self._is_done:
+            return []
+        if self._sidecar is not None:
+            return self._next_columnar_batch()
+        if self._runs is not None:
+            return self._next_run_batch()
+        rows, ended = self._read_csv_rows(self.batch_size)
+        if ended:
+            self.close()
+        return rows
+
+    def _read_csv_rows(self, count: int) -> tuple[List[List[Any]], bool]:
+        """Up to `count` rows of the CSV, and whether the scan ended: at the end of the file or at a row it cannot read."""
+        if self.decode_seconds is not None:
+            return self._read_profiled_csv_rows(count)
+        rows = []
+        width, decoders, eager_decoders = len(self._columns), self._decoders, self._eager_decoders
+        decode_all = len(eager_decoders) == width
         try:
-            row = next(self._reader)
-            row = DBTypeObject.convert_type(row, self._column_types)
-            
-            if len(row) != len(self._columns):
-                raise ValueError(f"Row length does not match column length in {self.schema}/{self.table_name}.")
-            return row
+            for row in islice(self._reader, count):
+                if len(row) != width:
+                    raise ValueError(f"Row length does not match column length in {self.schema}/{self.table_name}.")
+                if decode_all:
+                    row = [decode(data) for decode, data in zip(decoders, row)]
+                else:
+                    for i, decode in eager_decoders:
+                        row[i] = decode(row[i])
+                rows.append(row)
         except Exception:
+            # A row that fails to convert ends the scan, the rows before it are still returned
+            return rows, True
+        return rows, len(rows) < count
+
+    def _next_columnar_batch(self) -> List[List[Any]]:
+        try:
+            start = self._position
+            stop = min(start + self.batch_size, self._sidecar.row_count)
+            if start >= stop:
+                self.close()
+                return []
+            values = [reader.read(start, stop) if reader else [None] * (stop - start)
+                      for reader in self._column_readers]
+            self._position = stop
+            return list(map(list, zip(*values)))
+        except Exception:
+            self.close()
+            return []
+
+    def skip_rows(self, count: int) -> int:
+        """
+        Move the scan past its next `count` rows without reading them, using the columnar sidecar or
+        the table's row index. Call it before the first batch. Returns the number of rows skipped,
+        0 when neither is available and the rows have to be read.
+        """
+        if self._is_done or count <= 0 or not self._metadata:
+            return 0
+        if self._sidecar is not None:
+            skipped = min(count, self._sidecar.row_count - self._position)
+            self._position += skipped
+            return skipped
+        index = self._open_row_index()
+        if index is None:
+            return 0
+        readable = index.readable_rows(self._columns if self._required_columns is None else self._required_columns)
+        if count >= readable:
             self.close()
-            raise StopIteration
+            return readable
+        offset, rest = index.seek_position(count)
+        self._skipped_bytes += max(0, offset - self._file.buffer.tell())
+        self._file.seek(offset)
+        for _ in islice(self._reader, rest):
+            pass
+        return count
+
+    def restrict(self, condition: dict, path: Optional[AccessPath] = None) -> None:
+        """
+        Read only the rows that may satisfy `condition`, the bound WHERE clause of the filter over this
+        scan, the way `path` (see optimizer.py) chose: every row, the rows the secondary index on
+        path.column finds, or the blocks the zone maps do not rule out. Without a path, the rows a
+        secondary index on one of the compared columns finds, otherwise the blocks the zone maps do
+        not rule out. Call it before the first batch.
+        """
+        if path is None:
+            if not self._seek_index(condition):
+                self.skip_blocks(condition)
+        elif path.method == INDEX_SCAN:
+            if not self._seek_index(condition, path.column):
+                self.skip_blocks(condition)
+        elif path.method == ZONE_MAP_SCAN:
+            self.skip_blocks(condition, path.row_index)
+
+    def _seek_index(self, condition: dict, column: Optional[str] = None) -> bool:
+        """
+        Read only the rows a declared secondary index (see secondary_index.py) finds for the column
+        comparisons ANDed in `condition`, through the index of `column` when given, otherwise the
+        index with the fewest matches. Returns False when no index applies.
+        """
+        if self._is_done or self._sidecar is not None or not self._indexes or self._runs is not None:
+            return False
+        best = None
+        for indexed, bounds in index_bounds(condition).items():
+            if indexed not in self._indexes or (column is not None and indexed != column):
+                continue
+            index = self._open_index(indexed)
+            if index is None:
+                continue
+            found = index.search(bounds)
+            if found is None or (best is not None and found[1] - found[0] >= best[1][1] - best[1][0]):
+                index.close()
+                continue
+            if best is not None:
+                best[0].close()
+            best = (index, found)
+        if best is None:
+            return False
+        index, (start, stop) = best
+        try:
+            readable = index.readable_rows(list(dict.fromkeys(self._eager_columns + referenced_columns(condition))))
+            matches = index.matches(start, stop)
+        finally:
+            index.close()
+        # Consecutive rows are read without seeking in between
+        runs: List[list] = []
+        for row, offset in matches:
+            if row >= readable:
+                break
+            if runs and runs[-1][1] == row:
+                runs[-1][1] = row + 1
+            else:
+                runs.append([row, row + 1, offset])
+        self._runs = runs
+        self.index_column = index.column
+        return True
+
+    def skip_blocks(self, condition: dict, index: Optional[RowIndex] = None) -> None:
+        """
+        Read only the blocks of the CSV whose zone maps (see row_index.py) do not rule out `condition`,
+        the bound WHERE clause of the filter over this scan, using `index` when the caller has loaded
+        it already. Call it before the first batch; without a fresh row index, or for a sidecar scan,
+        every row is read.
+
+        A full scan ends at the first row it cannot read, which is the row index's readable_rows over
+        the columns decoded for every row. The block holding it is read when it may match (the scan
+        ends on that row as usual), and when it cannot, the scan ends at that block.
+        """
+        if self._is_done or self._sidecar is not None or not self._metadata or self._runs is not None:
+            return
+        if index is None:
+            index = self._open_row_index()
+        if index is None or not index.block_count:
+            return
+        readable = index.readable_rows(list(dict.fromkeys(self._eager_columns + referenced_columns(condition))))
+        last_block = min(readable // index.stride, index.block_count - 1)
+        runs: List[list] = []
+        for block in range(last_block + 1):
+            if not index.block_may_match(condition, block):
+                continue
+            start, stop = block * index.stride, min((block + 1) * index.stride, index.row_count)
+            if runs and runs[-1][1] == start:
+                runs[-1][1] = stop
+            else:
+                runs.append([start, stop, index.seek_position(start)[0]])
+        self.blocks_total = index.block_count
+        self.blocks_skipped = index.block_count - sum(
+            (stop - start + index.stride - 1) // index.stride for start, stop, _ in runs)
+        if runs and runs[-1][1] == index.row_count:
+            # Up to the end of the file, so the scan ends on the row after the last as a full scan does
+            runs[-1][1] = None
+        self._runs = runs
+
+    def _next_run_batch(self) -> List[List[Any]]:
+        """_next_batch over the [start, stop) row ranges left by restrict(), seeking to each range's byte offset."""
+        while self._runs:
+            start, stop, offset = self._runs[0]
+            if self._row < start:
+                self._skipped_bytes += max(0, offset - self._file.buffer.tell())
+                self._file.seek(offset)
+                self._row = start
+            count = self.batch_size if stop is None else min(self.batch_size, stop - self._row)
+            rows, ended = self._read_csv_rows(count)
+            self._row += len(rows)
+            if ended:
+                self.close()
+                return rows
+            if stop is not None and self._row >= stop:
+                self._runs.pop(0)
+            if rows:
+                return rows
+        self.close()
+        return []
+
+    def enable_profiling(self) -> None:
+        """
+        Time the type conversion of this scan into `decode_seconds`, for EXPLAIN ANALYZE. CSV batches are
+        then read and converted in two passes, and the deferred decoders, which the operators above call,
+        are timed too. Call it before the operators above are created.
+        """
+        self.decode_seconds = 0.0
+
+        def timed(decode: Callable[[str], Any]) -> Callable[[str], Any]:
+            def timed_decode(data: str) -> Any:
+                start = perf_counter()
+                try:
+                    return decode(data)
+                finally:
+                    self.decode_seconds += perf_counter() - start
+            return timed_decode
+        self._deferred_decoders = {i: timed(decode) for i, decode in self._deferred_decoders.items()}
+
+    def _read_profiled_csv_rows(self, count: int) -> tuple[List[List[Any]], bool]:
+        """_read_csv_rows with the conversion of the rows timed apart from reading them."""
+        raw = []
+        ended = False
+        try:
+            for row in islice(self._reader, count):
+                raw.append(row)
+        except Exception:
+            ended = True
+        start = perf_counter()
+        rows = []
+        width, decoders, eager_decoders = len(self._columns), self._decoders, self._eager_decoders
+        decode_all = len(eager_decoders) == width
+        try:
+            for row in raw:
+                if len(row) != width:
+                    raise ValueError(f"Row length does not match column length in {self.schema}/{self.table_name}.")
+                if decode_all:
+                    row = [decode(data) for decode, data in zip(decoders, row)]
+                else:
+                    for i, decode in eager_decoders:
+                        row[i] = decode(row[i])
+                rows.append(row)
+        except Exception:
+            ended = True
+        self.decode_seconds += perf_counter() - start
+        return rows, ended or len(rows) < count
+
+    @property
+    def bytes_read(self) -> Optional[int]:
+        """Bytes of the CSV file read so far, None for a sidecar scan."""
+        if self._file is not None and not self._file.closed:
+            return self._file.buffer.tell() - self._skipped_bytes
+        return self._bytes_read
+
+    def _open_row_index(self) -> Optional[RowIndex]:
+        return open_row_index(self.schema, self.table_name, self._metadata)
+
+    def _open_index(self, column: str) -> Optional[SecondaryIndex]:
+        """The index of a declared column, rebuilt first when its CSV has changed."""
+        index = SecondaryIndex.open(self.schema, self.table_name, column, self._metadata)
+        if index is None:
+            try:
+                build_index(self.schema, self.table_name, column, self._metadata)
+            except (OSError, ValueError):
+                return None
+            index = SecondaryIndex.open(self.schema, self.table_name, column, self._metadata)
+        return index
+
+    def _open_sidecar(self, metadata: dict[str, str]) -> Optional[ColumnarTable]:
+        sidecar = ColumnarTable.open(self.schema, self.table_name, metadata)
+        if sidecar is None and config.COLUMNAR_AUTO_BUILD:
+            try:
+                if build_sidecar(self.schema, self.table_name, metadata):
+                    sidecar = ColumnarTable.open(self.schema, self.table_name, metadata)
+            except OSError:
+                # The sidecar is only an accelerator, scan the CSV if it cannot be written
+                sidecar = None
+        return sidecar
 
     def _load_file(self, schema: str, table: str):
         schema, table = schema.lower(), table.lower()
@@ -69,8 +372,14 @@ class TableIterator:
         return result
     
     def close(self) -> None:
+        self._is_done = True
         if hasattr(self, "_file") and self._file:
+            if not self._file.closed:
+                self._bytes_read = self._file.buffer.tell() - self._skipped_bytes
             self._file.close()
+        if getattr(self, "_sidecar", None) is not None:
+            self._column_readers = []
+            self._sidecar.close()
     
     def to_json(self, limit: int = None):
         if not limit:
@@ -102,6 +411,20 @@ class TableIterator:
     def columns(self):
         return self._columns
 
+    @property
+    def required_columns(self) -> Optional[List[str]]:
+        return self._required_columns
+
+    @property
+    def sidecar(self) -> Optional[ColumnarTable]:
+        """The columnar sidecar this scan reads from, None when it reads the CSV."""
+        return self._sidecar
+
+    @property
+    def deferred_decoders(self) -> dict[int, Callable[[str], Any]]:
+        """Decoders of the columns this iterator returns undecoded, by column index."""
+        return self._deferred_decoders
+
     @property
     def column_types(self):
         return self._column_types
\ No newline at end of file
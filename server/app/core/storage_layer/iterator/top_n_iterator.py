@@ -0,0 +1,23 @@
+import heapq
+from typing import List, Any, Iterator
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.iterator.sort_iterator import SortIterator
+
+
+class TopNIterator(SortIterator):
+    """
+    The first `count` rows of ORDER BY ... LIMIT. Streams its input through a bounded heap, so only
+    `count` rows are held in memory whatever the table size. Ties keep their input order, like the sort.
+    """
+    def __init__(self, child_iter: BatchIterator, key_indices: List[int], descending: List[bool],
+                 count: int, batch_size: int = 1000):
+        super().__init__(child_iter, key_indices, descending, memory_budget=0, batch_size=batch_size)
+        self.count = count
+
+    def _sort_input(self) -> Iterator[List[Any]]:
+        rows = (row for batch in iter(lambda: self._decode_keys(self.child_iter.next_batch()), [])
+                for row in batch)
+        # nlargest/nsmallest keep a heap of `count` rows and are stable
+        select = heapq.nlargest if self._reverse else heapq.nsmallest
+        return iter(select(self.count, rows, key=self._key))
@@ -0,0 +1,133 @@
+from typing import List, Any, Callable
+
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.iterator.table_iterator import TableIterator
+from app.core.storage_layer.vectorized import np, parse_column, sidecar_column
+
+
+class VectorizedFilterIterator(BatchIterator):
+    """
+    Scan + filter that evaluates the WHERE clause over NumPy arrays, one chunk of rows at a time.
+
+    Predicate columns are converted a column chunk at a time and the condition becomes a boolean mask,
+    only the selected rows are turned back into Python lists. Like TableIterator, the remaining required
+    columns are left undecoded for ProjectIterator (CSV) or read for the selected rows only (sidecar).
+
+    A chunk with a cell that fails to convert is filtered row by row with the compiled predicate instead,
+    which stops the scan at the first bad row as TableIterator does.
+    """
+    def __init__(self, child_iter: TableIterator,
+                 mask: Callable[[dict], Any],
+                 predicate: Callable[[List[Any], List[str]], bool],
+                 predicate_indices: List[int],
+                 kinds: List[str]):
+        super().__init__()
+        self.child_iter = child_iter
+        self._mask = mask
+        self._test = getattr(predicate, "function", predicate)
+        self._predicate_indices = predicate_indices
+        self._kinds = kinds
+        self._columns = child_iter.columns
+        self._is_done = False
+
+        sidecar = child_iter.sidecar
+        if sidecar is not None:
+            required = set(self._columns if child_iter.required_columns is None else child_iter.required_columns)
+            self._readers = [sidecar.column_reader(col) if col in required else None for col in self._columns]
+            # Masks cannot represent NULLs, a sidecar with NULLs in a predicate column is filtered row by row
+            self._use_sidecar = all(self._readers[i].null_count == 0 for i in predicate_indices)
+            self._row_at_a_time = not self._use_sidecar
+            self._position = 0
+            self._deferred_decoders = {}
+        else:
+            self._use_sidecar = self._row_at_a_time = False
+            self._readers = []
+            self._deferred_decoders = {i: decode for i, decode in child_iter.deferred_decoders.items()
+                                       if i not in predicate_indices}
+        self._predicate_decoders = [(i, child_iter.deferred_decoders[i]) for i in predicate_indices
+                                    if i in child_iter.deferred_decoders]
+
+    def _next_batch(self) -> List[List[Any]]:
+        # An empty batch means exhausted, so keep going until some row passes
+        while not self._is_done:
+            rows = self._next_sidecar_chunk() if self._use_sidecar else self._next_csv_chunk()
+            if rows:
+                return rows
+        return []
+
+    def _next_csv_chunk(self) -> List[List[Any]]:
+        rows = self.child_iter.next_batch()
+        if not rows:
+            self._is_done = True
+            return []
+        if self._row_at_a_time:
+            return self._filter_rows(rows)
+        try:
+            arrays = {i: parse_column([row[i] for row in rows], decode, self._kinds[i])
+                      for i, decode in self._predicate_decoders}
+        except (ValueError, OverflowError):
+            return self._filter_rows(rows)
+        selected = self._select(arrays, len(rows))
+        result = [rows[j] for j in selected]
+        for i, values in arrays.items():
+            for row, value in zip(result, values[selected].tolist()):
+                row[i] = value
+        return result
+
+    def _next_sidecar_chunk(self) -> List[List[Any]]:
+        start = self._position
+        stop = min(start + self.child_iter.batch_size, self.child_iter.sidecar.row_count)
+        if start >= stop:
+            self._is_done = True
+            return []
+        self._position = stop
+        arrays = {i: sidecar_column(self._readers[i], start, stop) for i in self._predicate_indices}
+        selected = self._select(arrays, stop - start)
+        if not len(selected):
+            return []
+        row_ids = (selected + start).tolist()
+        values = []
+        for i, reader in enumerate(self._readers):
+            if i in arrays:
+                values.append(arrays[i][selected].tolist())
+            elif reader is not None:
+                values.append(reader.take(row_ids))
+            else:
+                values.append([None] * len(row_ids))
+        return list(map(list, zip(*values)))
+
+    def _select(self, arrays: dict, size: int):
+        mask = self._mask(arrays)
+        return np.flatnonzero(np.broadcast_to(mask, (size,)))
+
+    def _filter_rows(self, rows: List[List[Any]]) -> List[List[Any]]:
+        """Row at a time fallback with the same semantics as TableIterator + FilterIterator."""
+        result = []
+        test, columns = self._test, self._columns
+        for row in rows:
+            try:
+                for i, decode in self._predicate_decoders:
+                    row[i] = decode(row[i])
+            except Exception:
+                self.close()
+                return result
+            if test(row, columns):
+                result.append(row)
+        return result
+
+    def close(self) -> None:
+        self._is_done = True
+        self._readers = []
+        self.child_iter.close()
+
+    @property
+    def deferred_decoders(self) -> dict[int, Callable[[str], Any]]:
+        return self._deferred_decoders
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def column_types(self):
+        return self.child_iter.column_types
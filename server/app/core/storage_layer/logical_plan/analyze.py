@@ -0,0 +1,30 @@
+from typing import List, Optional
+
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.statistics import ANALYZE_COLUMNS, analyze_table
+
+
+class Analyze(LogicalPlan):
+    """ANALYZE <table>: collects the table's statistics on every run and returns them, one row per column."""
+    def __init__(self, schema: str, table: str, metadata: dict[str, str]):
+        self.schema_name = schema.lower()
+        self.table_name = table.lower()
+        self._metadata = metadata
+
+    def execute(self, parameters: Optional[list | dict] = None) -> 'MaterializedIterator':
+        statistics = analyze_table(self.schema_name, self.table_name, self._metadata)
+        return MaterializedIterator(statistics.analyze_rows(self._metadata))
+
+    @property
+    def columns(self) -> List[str]:
+        return list(ANALYZE_COLUMNS.keys())
+    @property
+    def column_types(self) -> List[str]:
+        return list(ANALYZE_COLUMNS.values())
+
+    def describe(self) -> str:
+        return f"{self.__class__.__name__}(table={self.table_name})"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(table_name={self.table_name})"
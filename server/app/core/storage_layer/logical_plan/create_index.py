@@ -0,0 +1,43 @@
+from typing import List, Optional
+
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.secondary_index import build_index
+
+# Columns of the result of CREATE INDEX, one row for the index built
+CREATE_INDEX_COLUMNS = {
+    "index_name": "VARCHAR",
+    "table": "VARCHAR",
+    "column": "VARCHAR",
+    "keys": "INT",
+}
+
+
+class CreateIndex(LogicalPlan):
+    """CREATE INDEX <name> ON <table> (<column>): builds the index and records it next to the index files, on every run."""
+    def __init__(self, metadata: Metadata, table: str, column: str, index_name: str):
+        self._metadata = metadata
+        self.schema_name = metadata.name.lower()
+        self.table_name = table.lower()
+        self.column = column
+        self.index_name = index_name
+
+    def execute(self, parameters: Optional[list | dict] = None) -> 'MaterializedIterator':
+        table_metadata = self._metadata.get_table(self.table_name)
+        keys = build_index(self.schema_name, self.table_name, self.column, table_metadata)
+        self._metadata.add_index(self.table_name, self.index_name, self.column)
+        return MaterializedIterator([[self.index_name, self.table_name, self.column, keys]])
+
+    @property
+    def columns(self) -> List[str]:
+        return list(CREATE_INDEX_COLUMNS.keys())
+    @property
+    def column_types(self) -> List[str]:
+        return list(CREATE_INDEX_COLUMNS.values())
+
+    def describe(self) -> str:
+        return f"{self.__class__.__name__}(name={self.index_name}, table={self.table_name}, column={self.column})"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(index_name={self.index_name}, table_name={self.table_name}, column={self.column})"
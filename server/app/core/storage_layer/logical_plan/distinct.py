@@ -0,0 +1,24 @@
+from typing import List, Optional
+
+from app.core import config
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.iterator.distinct_iterator import DistinctIterator
+
+
+class Distinct(LogicalPlan):
+    """SELECT DISTINCT, planned over the projection so rows compare on the selected columns only."""
+    def __init__(self, child: LogicalPlan):
+        self.child = child
+
+    def execute(self, parameters: Optional[list | dict] = None) -> 'DistinctIterator':
+        return DistinctIterator(self.child.execute(parameters), config.DISTINCT_MEMORY_BYTES)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.child.columns
+    @property
+    def column_types(self) -> List[str]:
+        return self.child.column_types
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(child={self.child})"
@@ -0,0 +1,100 @@
+import copy
+from typing import List, Optional
+
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.iterator.profiling_iterator import ProfilingIterator
+
+# Columns of EXPLAIN and of EXPLAIN ANALYZE, one row per operator
+EXPLAIN_COLUMNS = {"plan": "VARCHAR"}
+EXPLAIN_ANALYZE_COLUMNS = {
+    "plan": "VARCHAR",
+    "rows_in": "INT",
+    "rows_out": "INT",
+    "time_ms": "FLOAT",
+    "bytes_read": "INT",
+    "decode_ms": "FLOAT",
+    "blocks_skipped": "INT",
+}
+
+
+class Explain(LogicalPlan):
+    """
+    EXPLAIN: the operators of the plan, one row each, indented under the operator they feed.
+
+    EXPLAIN ANALYZE also runs the query and reports per operator the rows of its inputs and its own
+    rows, the wall time of its batches (inputs included), and for a CSV scan the bytes read, the
+    time spent converting values and the blocks its zone maps let it skip. The run is made on an instrumented copy of the plan, the plan
+    itself (which the plan cache may share) is never instrumented.
+    """
+    def __init__(self, child: LogicalPlan, analyze: bool = False):
+        self.child = child
+        self.analyze = analyze
+
+    def execute(self, parameters: Optional[list | dict] = None) -> 'MaterializedIterator':
+        if not self.analyze:
+            return MaterializedIterator([[line] for line, _ in _walk(self.child)])
+        profiles: dict[int, List[ProfilingIterator]] = {}
+        plan = _instrument(self.child, profiles)
+        iterator = plan.execute(parameters)
+        try:
+            while iterator.next_batch():
+                pass
+        finally:
+            iterator.close()
+        rows = []
+        for line, node in _walk(plan):
+            runs = profiles.get(id(node), [])
+            inputs = [profiles.get(id(child), []) for child in node.children]
+            scans = [run.scan for run in runs if run.scan is not None]
+            bytes_read = [scan.bytes_read for scan in scans if scan.bytes_read is not None]
+            decode = [scan.decode_seconds for scan in scans if scan.decode_seconds is not None]
+            skipped = [scan.blocks_skipped for scan in scans if scan.blocks_skipped is not None]
+            rows.append([
+                line,
+                sum(run.rows for child_runs in inputs for run in child_runs) if any(inputs) else None,
+                sum(run.rows for run in runs) if runs else None,
+                round(sum(run.seconds for run in runs) * 1000, 3) if runs else None,
+                sum(bytes_read) if bytes_read else None,
+                round(sum(decode) * 1000, 3) if decode else None,
+                sum(skipped) if skipped else None,
+            ])
+        return MaterializedIterator(rows)
+
+    @property
+    def columns(self) -> List[str]:
+        return list((EXPLAIN_ANALYZE_COLUMNS if self.analyze else EXPLAIN_COLUMNS).keys())
+    @property
+    def column_types(self) -> List[str]:
+        return list((EXPLAIN_ANALYZE_COLUMNS if self.analyze else EXPLAIN_COLUMNS).values())
+
+    def describe(self) -> str:
+        return f"{self.__class__.__name__}(analyze={self.analyze})"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(analyze={self.analyze}, child={self.child})"
+
+
+def _walk(plan: LogicalPlan, depth: int = 0) -> List[tuple[str, LogicalPlan]]:
+    """(indented description, operator) of the operators of a plan, depth first."""
+    lines = [("  " * depth + ("-> " if depth else "") + plan.describe(), plan)]
+    for child in plan.children:
+        lines.extend(_walk(child, depth + 1))
+    return lines
+
+
+def _instrument(plan: LogicalPlan, profiles: dict[int, List[ProfilingIterator]]) -> LogicalPlan:
+    """Copy of the plan whose operators wrap the iterators they create in a ProfilingIterator."""
+    node = copy.copy(plan)
+    for attribute in ("child", "left", "right"):
+        child = getattr(node, attribute, None)
+        if isinstance(child, LogicalPlan):
+            setattr(node, attribute, _instrument(child, profiles))
+    execute = node.execute
+
+    def profiled_execute(parameters: Optional[list | dict] = None, **options) -> ProfilingIterator:
+        iterator = ProfilingIterator(execute(parameters, **options))
+        profiles.setdefault(id(node), []).append(iterator)
+        return iterator
+    node.execute = profiled_execute
+    return node
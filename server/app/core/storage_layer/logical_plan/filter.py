@@ -1,6 +1,7 @@
-from typing import List, Any, Callable
+from typing import List, Any, Callable, Optional
 
 from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.logical_plan.scan import Scan
 from app.core.storage_layer.iterator.filter_iterator import FilterIterator
 
 
@@ -10,8 +11,13 @@ class Filter(LogicalPlan):
         self.child = child
         self.predicate = predicate
         
-    def execute(self) -> 'FilterIterator':
-        return FilterIterator(self.child.execute(), self.predicate, self.child.columns, self.child.column_types)
+    def execute(self, parameters: Optional[list | dict] = None) -> 'FilterIterator':
+        predicate = self.predicate.bind(parameters) if hasattr(self.predicate, "bind") else self.predicate
+        child_iter = self.child.execute(parameters)
+        if isinstance(self.child, Scan) and hasattr(predicate, "condition"):
+            # Let the scan seek to the rows an index finds, or past the blocks whose zone maps rule the predicate out
+            child_iter.restrict(predicate.condition, self.child.access_path(predicate.condition))
+        return FilterIterator(child_iter, predicate, self.child.columns, self.child.column_types)
     
     @property
     def columns(self) -> List[str]:
@@ -20,6 +26,9 @@ class Filter(LogicalPlan):
     def column_types(self) -> List[str]:
         return self.child.column_types
     
+    def describe(self) -> str:
+        return f"{self.__class__.__name__}({self.predicate})"
+
     def __repr__(self):
         return f"{self.__class__.__name__}(predicate={self.predicate}, child={self.child})"
 
@@ -0,0 +1,33 @@
+from typing import List, Optional
+
+from app.core import config
+from app.core.storage_layer.aggregate import CompiledAggregate, result_type
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.iterator.hash_aggregate_iterator import HashAggregateIterator
+
+
+class HashAggregate(LogicalPlan):
+    """GROUP BY and aggregate functions. Its columns are the GROUP BY columns, then the aggregates by name."""
+    def __init__(self, child: LogicalPlan, group_by: List[str], aggregates: List[dict]):
+        self.child = child
+        self.aggregate = CompiledAggregate(group_by, aggregates, child.columns)
+        child_types = child.column_types
+        self._column_types = [child_types[i] for i in self.aggregate.group_indices] + \
+            [result_type(agg['function'], child_types[i] if i is not None else None)
+             for agg, i in zip(aggregates, self.aggregate.argument_indices)]
+
+    def execute(self, parameters: Optional[list | dict] = None) -> 'HashAggregateIterator':
+        return HashAggregateIterator(self.child.execute(parameters), self.aggregate, config.AGGREGATE_MEMORY_BYTES)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.aggregate.columns
+    @property
+    def column_types(self) -> List[str]:
+        return self._column_types
+
+    def describe(self) -> str:
+        return f"{self.__class__.__name__}({self.aggregate})"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.aggregate}, child={self.child})"
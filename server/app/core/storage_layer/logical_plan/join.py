@@ -0,0 +1,93 @@
+from typing import List, Optional
+
+from app.core import config
+from app.core.storage_layer.columnar import column_kind
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.logical_plan.scan import Scan
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.iterator.hash_join_iterator import HashJoinIterator
+from app.core.storage_layer.iterator.merge_join_iterator import MergeJoinIterator
+from app.core.storage_layer.predicate import resolve_column
+from app.core.storage_layer.statistics import TableStatistics, estimate_rows
+
+# Join strategies, see Join.strategy()
+MERGE, HASH_BUILD_LEFT, HASH_BUILD_RIGHT = "merge", "hash build left", "hash build right"
+
+
+class Join(LogicalPlan):
+    """
+    Inner equi-join, `on` pairs a left and a right column. Its columns are `left_columns` followed
+    by `right_columns`, the qualified names (alias.column) of the two inputs' columns.
+
+    The algorithm is chosen at every run from the table statistics, which the plan may outlive: a
+    sort-merge join when both inputs come in ascending order of a single key, otherwise a hash join
+    built on the input estimated to be smaller.
+    """
+    def __init__(self, left: LogicalPlan, right: LogicalPlan, left_columns: List[str], right_columns: List[str],
+                 on: List[tuple[str, str]]):
+        self.left = left
+        self.right = right
+        self.on = on
+        self._columns = left_columns + right_columns
+        self._column_types = left.column_types + right.column_types
+        self._left_keys = [resolve_column(left_col, left_columns) for left_col, _ in on]
+        self._right_keys = [resolve_column(right_col, right_columns) for _, right_col in on]
+
+    def execute(self, parameters: Optional[list | dict] = None) -> BatchIterator:
+        strategy = self.strategy()
+        left_iter, right_iter = self.left.execute(parameters), self.right.execute(parameters)
+        if strategy == MERGE:
+            return MergeJoinIterator(left_iter, right_iter, self._left_keys[0], self._right_keys[0])
+        return HashJoinIterator(left_iter, right_iter, self._left_keys, self._right_keys,
+                                strategy == HASH_BUILD_LEFT, config.JOIN_MEMORY_BYTES)
+
+    def strategy(self) -> str:
+        if len(self.on) == 1 and self._mergeable():
+            return MERGE
+        return HASH_BUILD_LEFT if _estimated_rows(self.left) < _estimated_rows(self.right) else HASH_BUILD_RIGHT
+
+    def _mergeable(self) -> bool:
+        left_kind = column_kind(self.left.column_types[self._left_keys[0]])
+        right_kind = column_kind(self.right.column_types[self._right_keys[0]])
+        numeric = ("int", "float")
+        if left_kind is None or (left_kind != right_kind and not (left_kind in numeric and right_kind in numeric)):
+            return False
+        return _sorted_on(self.left, self._left_keys[0]) and _sorted_on(self.right, self._right_keys[0])
+
+    @property
+    def columns(self) -> List[str]:
+        return self._columns
+    @property
+    def column_types(self) -> List[str]:
+        return self._column_types
+
+    def describe(self) -> str:
+        on = " AND ".join(f"{left_col} = {right_col}" for left_col, right_col in self.on)
+        return f"{self.__class__.__name__}(on={on}, strategy={self.strategy()})"
+
+    def __repr__(self):
+        on = " AND ".join(f"{left_col} = {right_col}" for left_col, right_col in self.on)
+        return f"{self.__class__.__name__}(on={on}, left={self.left}, right={self.right})"
+
+
+def _base_scan(plan: LogicalPlan) -> Optional[Scan]:
+    """The scan under the filters of a join input, None for a join."""
+    while not isinstance(plan, (Scan, Join)):
+        plan = plan.child
+    return plan if isinstance(plan, Scan) else None
+
+
+def _estimated_rows(plan: LogicalPlan) -> int:
+    scan = _base_scan(plan)
+    if scan is None:
+        return max(_estimated_rows(plan.left), _estimated_rows(plan.right))
+    return estimate_rows(scan.schema_name, scan.table_name, scan._metadata)
+
+
+def _sorted_on(plan: LogicalPlan, index: int) -> bool:
+    """Whether the input comes in ascending order of column `index` according to fresh statistics (filters keep the order)."""
+    scan = _base_scan(plan)
+    if scan is None:
+        return False
+    statistics = TableStatistics.open(scan.schema_name, scan.table_name, scan._metadata)
+    return statistics is not None and statistics.is_sorted(scan.columns[index])
@@ -0,0 +1,35 @@
+from typing import List, Optional
+
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.logical_plan.project import Project
+from app.core.storage_layer.logical_plan.scan import Scan
+from app.core.storage_layer.iterator.limit_iterator import LimitIterator
+
+
+class Limit(LogicalPlan):
+    def __init__(self, child: LogicalPlan, limit: int, offset: int = 0):
+        self.child = child
+        self.limit = limit
+        self.offset = offset
+
+    def execute(self, parameters: Optional[list | dict] = None) -> 'LimitIterator':
+        child_iter = self.child.execute(parameters)
+        offset = self.offset
+        # Without a filter, row n of the result is row n of the table: let the scan jump over the
+        # skipped rows through its sidecar or row index instead of reading them
+        if offset and isinstance(self.child, Project) and isinstance(self.child.child, Scan):
+            offset -= child_iter.child_iter.skip_rows(offset)
+        return LimitIterator(child_iter, self.limit, offset)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.child.columns
+    @property
+    def column_types(self) -> List[str]:
+        return self.child.column_types
+
+    def describe(self) -> str:
+        return f"{self.__class__.__name__}(limit={self.limit}, offset={self.offset})"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(limit={self.limit}, offset={self.offset}, child={self.child})"
@@ -1,7 +1,8 @@
-from typing import List, Any, Dict, Iterator
+from typing import List, Any, Dict, Iterator, Optional
 
 class LogicalPlan:
-    def execute(self) -> Iterator[List[Any]]:
+    def execute(self, parameters: Optional[list | dict] = None) -> Iterator[List[Any]]:
+        """Create the iterators of a run of the plan, `parameters` bind the placeholders of a prepared statement."""
         raise NotImplementedError("Subclasses must implement execute()")
     @property
     def columns(self) -> List[str]:
@@ -10,5 +11,15 @@ class LogicalPlan:
     def column_types(self) -> List[str]:
         raise NotImplementedError("Subclasses must implement column_types property")
 
+    @property
+    def children(self) -> List['LogicalPlan']:
+        """The input plans of this operator."""
+        inputs = (getattr(self, "child", None), getattr(self, "left", None), getattr(self, "right", None))
+        return [plan for plan in inputs if isinstance(plan, LogicalPlan)]
+
+    def describe(self) -> str:
+        """The operator and its arguments without its inputs, one line of EXPLAIN."""
+        return self.__class__.__name__
+
     def __repr__(self):
         return f"{self.__class__.__name__}()"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
 from app.core.storage_layer.iterator.project_iterator import ProjectIterator
@@ -13,12 +13,12 @@ class Project(LogicalPlan):
         self._column_indices = [child_collums.index(col) if col in child_collums else -1 for col in self.columns]
         self._column_types = [child.column_types[i] for i in self._column_indices if i != -1]
 
-    def execute(self) -> 'ProjectIterator':
+    def execute(self, parameters: Optional[list | dict] = None) -> 'ProjectIterator':
         # Check non-existent columns before executing the plan
         missing_columns = [col for col, idx in zip(self._columns, self._column_indices) if idx == -1]
         if missing_columns:
             raise ValueError(f"Columns not found: {missing_columns}.")
-        return ProjectIterator(self.child.execute(), self._column_indices)
+        return ProjectIterator(self.child.execute(parameters), self._column_indices)
     
     @property
     def columns(self) -> List[str]:
@@ -27,5 +27,8 @@ class Project(LogicalPlan):
     def column_types(self) -> List[str]:
         return self._column_types
 
+    def describe(self) -> str:
+        return f"{self.__class__.__name__}(columns={self.columns})"
+
     def __repr__(self):
         return f"{self.__class__.__name__}(columns={self.columns}, child={self.child})"
@@ -1,21 +1,47 @@
-from typing import List
+from typing import List, Optional
 
 from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
 from app.core.storage_layer.iterator.table_iterator import TableIterator
+from app.core.storage_layer.optimizer import AccessPath, choose_access_path
 
 
 class Scan(LogicalPlan):
-    def __init__(self, schema: str, table: str, metadata: dict[str, str], batch_size: int = 1000):
+    def __init__(self, schema: str, table: str, metadata: dict[str, str], batch_size: int = 1000,
+                 required_columns: Optional[List[str]] = None, predicate_columns: Optional[List[str]] = None,
+                 indexes: Optional[List[str]] = None, condition: Optional[dict] = None):
         self.schema_name = schema.lower()
         self.table_name = table.lower()
         self._metadata = metadata
         self._columns = list(metadata.keys()) if metadata else []
         self._column_types = list(metadata.values()) if metadata else [] 
         self.batch_size = batch_size
+        self.required_columns = required_columns
+        self.predicate_columns = predicate_columns
+        # Columns with a secondary index declared in metadata.yaml
+        self.indexes = indexes
+        # WHERE clause of the filter over this scan, which EXPLAIN shows the access path of
+        self.condition = condition
         
-    def execute(self) -> 'TableIterator':
-        return TableIterator(self.schema_name, self.table_name, self._metadata, self.batch_size)
+    def execute(self, parameters: Optional[list | dict] = None, chunk_rows: Optional[int] = None) -> 'TableIterator':
+        """
+        The table iterator of the scan. With `chunk_rows`, batches of that many rows whose columns are all
+        left undecoded, for an operator that converts them a column chunk at a time (VectorizedFilter).
+        """
+        if chunk_rows is not None:
+            return TableIterator(self.schema_name, self.table_name, self._metadata, chunk_rows,
+                                 self.required_columns, predicate_columns=[], indexes=self.indexes)
+        return TableIterator(self.schema_name, self.table_name, self._metadata, self.batch_size,
+                             self.required_columns, self.predicate_columns, self.indexes)
     
+    def access_path(self, condition: Optional[dict] = None) -> AccessPath:
+        """
+        How to read the rows that may satisfy `condition` (the WHERE clause the scan was planned with
+        when not given), chosen from the statistics and indexes of the table as they are now, since
+        the plan may outlive them.
+        """
+        return choose_access_path(self.schema_name, self.table_name, self._metadata, self.indexes or [],
+                                  self.condition if condition is None else condition)
+
     @property
     def columns(self) -> List[str]:
         return self._columns
@@ -23,5 +49,11 @@ class Scan(LogicalPlan):
     def column_types(self) -> List[str]:
         return self._column_types
     
+    def describe(self) -> str:
+        columns = self._columns if self.required_columns is None else self.required_columns
+        if self.condition is None:
+            return f"{self.__class__.__name__}(table={self.table_name}, columns={columns})"
+        return f"{self.__class__.__name__}(table={self.table_name}, columns={columns}, access={self.access_path()})"
+
     def __repr__(self):
         return f"{self.__class__.__name__}(schema={self._columns}: {self._column_types}, table_name={self.table_name}, batch_size={self.batch_size})"
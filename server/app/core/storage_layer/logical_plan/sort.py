@@ -0,0 +1,35 @@
+from typing import List, Optional
+
+from app.core import config
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.iterator.sort_iterator import SortIterator
+from app.core.storage_layer.predicate import resolve_column
+
+
+class Sort(LogicalPlan):
+    def __init__(self, child: LogicalPlan, order_by: List[dict]):
+        self.child = child
+        self.order_by = order_by
+        # Resolved now, so an unknown ORDER BY column fails at plan time
+        self._key_indices = [resolve_column(item['column'], child.columns) for item in order_by]
+        self._descending = [item['descending'] for item in order_by]
+
+    def execute(self, parameters: Optional[list | dict] = None) -> 'SortIterator':
+        return SortIterator(self.child.execute(parameters), self._key_indices, self._descending,
+                            config.SORT_MEMORY_BYTES)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.child.columns
+    @property
+    def column_types(self) -> List[str]:
+        return self.child.column_types
+
+    def describe(self) -> str:
+        return f"{self.__class__.__name__}(order_by=[{self._keys()}])"
+
+    def _keys(self) -> str:
+        return ", ".join(f"{item['column']} {'DESC' if item['descending'] else 'ASC'}" for item in self.order_by)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(order_by=[{self._keys()}], child={self.child})"
@@ -0,0 +1,45 @@
+from typing import List, Optional
+
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.logical_plan.hash_aggregate import HashAggregate
+from app.core.storage_layer.logical_plan.scan import Scan
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.statistics import TableStatistics
+
+
+class StatisticsAggregate(LogicalPlan):
+    """
+    COUNT/MIN/MAX over a whole table, answered from the statistics ANALYZE collected. The statistics
+    are checked at every run (the plan may be cached longer than the CSV stays unchanged), when they
+    are missing or stale the run falls back to the HashAggregate over the scan.
+    """
+    def __init__(self, child: HashAggregate):
+        self.child = child
+        # Only planned directly over a scan, without a WHERE clause
+        self._scan: Scan = child.child
+
+    def execute(self, parameters: Optional[list | dict] = None) -> BatchIterator:
+        scan = self._scan
+        statistics = TableStatistics.open(scan.schema_name, scan.table_name, scan._metadata)
+        row = statistics.aggregate_row(self.child.aggregate.aggregates) if statistics is not None else None
+        if row is None:
+            return self.child.execute(parameters)
+        return MaterializedIterator([row])
+
+    @property
+    def columns(self) -> List[str]:
+        return self.child.columns
+    @property
+    def column_types(self) -> List[str]:
+        return self.child.column_types
+
+    def describe(self) -> str:
+        scan = self._scan
+        statistics = TableStatistics.open(scan.schema_name, scan.table_name, scan._metadata)
+        answered = statistics is not None and statistics.aggregate_row(self.child.aggregate.aggregates) is not None
+        source = "table statistics" if answered else "scan, no usable statistics"
+        return f"{self.__class__.__name__}({self.child.aggregate}, from={source})"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(child={self.child})"
@@ -0,0 +1,21 @@
+from typing import List, Optional
+
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.logical_plan.sort import Sort
+from app.core.storage_layer.iterator.top_n_iterator import TopNIterator
+
+
+class TopN(Sort):
+    """ORDER BY ... LIMIT: the first `count` rows of the sort, without sorting the whole input."""
+    def __init__(self, child: LogicalPlan, order_by: List[dict], count: int):
+        super().__init__(child, order_by)
+        self.count = count
+
+    def execute(self, parameters: Optional[list | dict] = None) -> 'TopNIterator':
+        return TopNIterator(self.child.execute(parameters), self._key_indices, self._descending, self.count)
+
+    def describe(self) -> str:
+        return f"{self.__class__.__name__}(order_by=[{self._keys()}], count={self.count})"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(order_by=[{self._keys()}], count={self.count}, child={self.child})"
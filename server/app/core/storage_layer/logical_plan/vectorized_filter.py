@@ -0,0 +1,54 @@
+from typing import List, Any, Callable, Optional
+
+from app.core import config
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.logical_plan.scan import Scan
+from app.core.storage_layer.iterator.batch_iterator import BatchIterator
+from app.core.storage_layer.iterator.filter_iterator import FilterIterator
+from app.core.storage_layer.iterator.vectorized_filter_iterator import VectorizedFilterIterator
+from app.core.storage_layer.vectorized import compile_mask, UnsupportedExpression
+
+
+class VectorizedFilter(LogicalPlan):
+    """
+    Scan + Filter evaluated over NumPy column chunks, see NumpyExecutor.
+
+    A WHERE clause with placeholders has no mask until its values are bound, the mask is compiled
+    at execute() and the run falls back to Filter + Scan when a bound value cannot be vectorized.
+    """
+    def __init__(self, scan: Scan, predicate: Callable[[List[Any], List[str]], bool],
+                 mask: Optional[Callable[[dict], Any]], predicate_columns: List[str], kinds: List[str]):
+        self.child = scan
+        self.predicate = predicate
+        self.mask = mask
+        self.predicate_columns = predicate_columns
+        self._kinds = kinds
+
+    def execute(self, parameters: Optional[list | dict] = None) -> BatchIterator:
+        scan, predicate, mask = self.child, self.predicate, self.mask
+        if mask is None:
+            predicate = predicate.bind(parameters)
+            try:
+                mask = compile_mask(predicate.condition, self.columns, self._kinds)
+            except (UnsupportedExpression, TypeError):
+                table_iter = scan.execute(parameters)
+                table_iter.restrict(predicate.condition, scan.access_path(predicate.condition))
+                return FilterIterator(table_iter, predicate, self.columns, self.column_types)
+        # Predicate columns are converted a column chunk at a time, so the table iterator hands every column over undecoded
+        table_iter = scan.execute(parameters, chunk_rows=max(scan.batch_size, config.NUMPY_CHUNK_ROWS))
+        table_iter.restrict(predicate.condition, scan.access_path(predicate.condition))
+        predicate_indices = [self.columns.index(col) for col in self.predicate_columns]
+        return VectorizedFilterIterator(table_iter, mask, predicate, predicate_indices, self._kinds)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.child.columns
+    @property
+    def column_types(self) -> List[str]:
+        return self.child.column_types
+
+    def describe(self) -> str:
+        return f"{self.__class__.__name__}({self.predicate})"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(predicate={self.predicate}, child={self.child})"
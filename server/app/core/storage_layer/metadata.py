@@ -1,14 +1,31 @@
+import json
 import os
+import tempfile
+import threading
 from pathlib import Path
 
 DB_DIR = str(Path(__file__).parent.parent.parent.parent / "data")
 
+# Indexes made by CREATE INDEX, kept out of the hand-written metadata.yaml:
+# data/<schema>/.index/indexes.json, {table: {index name: column}}
+CREATED_INDEXES_FILE = os.path.join(".index", "indexes.json")
+
+# Serializes the read-modify-write of the created indexes file
+_CREATED_INDEXES_LOCK = threading.Lock()
+
 
 class Metadata:
     def __init__(self, schemas: str):
         self.name = schemas.split("/")[-1]
         self.data: dict[str, dict[str, str]] = {}
-        self._load_metadata(os.path.join(DB_DIR, schemas, "metadata.yaml"))
+        # Table -> {index name: column} of the secondary indexes declared under `indexes:`
+        self.indexes: dict[str, dict[str, str]] = {}
+        self.path = os.path.join(DB_DIR, schemas, "metadata.yaml")
+        self.created_indexes_path = os.path.join(DB_DIR, schemas, CREATED_INDEXES_FILE)
+        # Taken before reading, so a concurrent edit shows up as a changed signature
+        self.loaded_signature = self.signature()
+        self._load_metadata(self.path)
+        self._load_created_indexes()
 
     def __str__(self):
         result = []
@@ -31,18 +48,84 @@ class Metadata:
                         column_type = column.get("column_type", "").strip()
                         if column_name and column_type:
                             table_meta[column_name] = column_type
+                    table_indexes = {}
+                    for index in table.get("indexes", None) or []:
+                        column_name = index.get("column_name", "").strip()
+                        index_name = index.get("index_name", "").strip() or f"{table_name}_{column_name}"
+                        if column_name:
+                            table_indexes[index_name.lower()] = column_name
                     if table_name:
                         self.data[table_name] = table_meta
+                        self.indexes[table_name] = table_indexes
         except FileNotFoundError:
             raise FileNotFoundError(f"{self.name} schema not found.")
         except yaml.YAMLError as e:
             raise ValueError(f"Error parsing {self.name} schema: {e}")
                 
 
+    def _load_created_indexes(self) -> None:
+        for table_name, table_indexes in self._read_created_indexes().items():
+            if table_name in self.data:
+                for index_name, column_name in table_indexes.items():
+                    self.indexes[table_name].setdefault(index_name, column_name)
+
+    def _read_created_indexes(self) -> dict[str, dict[str, str]]:
+        try:
+            with open(self.created_indexes_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def signature(self) -> tuple | None:
+        """Size and mtime of metadata.yaml and of the created indexes, to detect that the schema definition changed."""
+        signature = []
+        for path in (self.path, self.created_indexes_path):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                if path == self.path:
+                    return None
+                signature.append(None)
+                continue
+            signature.append((stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
     def get_table(self, table_name: str) -> dict[str, str]:
         table = self.data.get(table_name)
         if not table:
             raise Exception(f"Table {table_name} not found in {self.name} schema.")
         return table
-    
-    
\ No newline at end of file
+
+    def get_indexes(self, table_name: str) -> dict[str, str]:
+        """{index name: column} of the secondary indexes declared for a table."""
+        return self.indexes.get(table_name, {})
+
+    def add_index(self, table_name: str, index_name: str, column_name: str) -> None:
+        """
+        Record a secondary index made by CREATE INDEX in the created indexes file, metadata.yaml is
+        left as its author wrote it. Raises ValueError if the name is taken by another column.
+        """
+        self.get_table(table_name)
+        key = index_name.lower()
+        existing = self.get_indexes(table_name).get(key)
+        if existing is not None and existing != column_name:
+            raise ValueError(f"Index {index_name} already exists on column {existing}")
+        with _CREATED_INDEXES_LOCK:
+            created = self._read_created_indexes()
+            table_indexes = created.setdefault(table_name, {})
+            existing = table_indexes.get(key)
+            if existing is not None and existing != column_name:
+                raise ValueError(f"Index {index_name} already exists on column {existing}")
+            if existing is None:
+                table_indexes[key] = column_name
+                directory = os.path.dirname(self.created_indexes_path)
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix="indexes.", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        json.dump(created, f, indent=2)
+                    os.replace(tmp_path, self.created_indexes_path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+        self.indexes.setdefault(table_name, {})[key] = column_name
@@ -0,0 +1,55 @@
+from app.core import config
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
+from app.core.storage_layer.logical_plan.filter import Filter
+from app.core.storage_layer.logical_plan.scan import Scan
+from app.core.storage_layer.logical_plan.vectorized_filter import VectorizedFilter
+from app.core.storage_layer.utils import referenced_columns
+from app.core.storage_layer.vectorized import np, compile_mask, numeric_kinds, UnsupportedExpression
+
+
+class NumpyExecutor:
+    """
+    Columnar alternative to the iterator engine for numeric filters.
+
+    Rewrites Filter(Scan) into VectorizedFilter when every column the WHERE clause reads is an
+    INT/FLOAT/BOOLEAN/DATE column and every operator and literal has an exact NumPy equivalent.
+    Anything else keeps the plan unchanged, so the iterator engine remains the fallback.
+    """
+    @staticmethod
+    def is_available() -> bool:
+        return np is not None and config.NUMPY_EXECUTOR
+
+    @staticmethod
+    def optimize(plan: LogicalPlan) -> LogicalPlan:
+        if not NumpyExecutor.is_available():
+            return plan
+        return NumpyExecutor._rewrite(plan)
+
+    @staticmethod
+    def _rewrite(plan: LogicalPlan) -> LogicalPlan:
+        if isinstance(plan, Filter) and isinstance(plan.child, Scan):
+            return NumpyExecutor._vectorize(plan)
+        # Joins have a left and a right input
+        for attribute in ("child", "left", "right"):
+            child = getattr(plan, attribute, None)
+            if isinstance(child, LogicalPlan):
+                setattr(plan, attribute, NumpyExecutor._rewrite(child))
+        return plan
+
+    @staticmethod
+    def _vectorize(plan: Filter) -> LogicalPlan:
+        condition = getattr(plan.predicate, "condition", None)
+        if condition is None:
+            return plan
+        kinds = numeric_kinds(plan.column_types)
+        if getattr(plan.predicate, "parameters", None):
+            # The mask is compiled once the values are bound, only the column types can be checked now
+            columns = referenced_columns(condition)
+            if any(kinds[plan.columns.index(col)] is None for col in columns):
+                return plan
+            return VectorizedFilter(plan.child, plan.predicate, None, columns, kinds)
+        try:
+            mask = compile_mask(condition, plan.columns, kinds)
+        except (UnsupportedExpression, ValueError):
+            return plan
+        return VectorizedFilter(plan.child, plan.predicate, mask, referenced_columns(condition), kinds)
@@ -0,0 +1,207 @@
+"""
+Cost-based choices for a WHERE clause over a table scan: the order in which the compiled predicate
+evaluates the children of AND/OR, and the access path that reads the table.
+
+Selectivities come from the ANALYZE statistics (histograms for ranges, distinct counts for
+equality, see statistics.py), or from fixed defaults for a table without statistics, for columns
+compared with each other and for placeholders without a value yet. AND multiplies the selectivities
+of its children, OR adds them minus their overlap.
+
+Costs are in units of reading and converting one CSV row in file order. For a table of N rows:
+
+* full scan: N
+* index range scan (secondary_index.py, for a column with a declared index): a fixed lookup cost
+  plus INDEX_ROW_COST per matching row, each one a seek into the CSV
+* zone-map scan (row_index.py, when the table has a fresh row index): the rows of the blocks the
+  zone maps cannot rule out plus BLOCK_SEEK_COST per run of blocks, exact for a bound condition
+
+The access path is chosen again at every run with the bound values, as joins choose their
+algorithm, and EXPLAIN shows the choice for the condition as written. Statistics and row indexes
+are loaded once per version of their files (see SidecarCache), so choosing is cheap next to a lookup.
+"""
+from typing import Any, List, Optional
+
+from app.core.parser.parser import Parameter
+from app.core.storage_layer.columnar import column_kind
+from app.core.storage_layer.predicate import is_quoted, parse_literal
+from app.core.storage_layer.row_index import RowIndex, open_row_index
+from app.core.storage_layer.secondary_index import index_bounds
+from app.core.storage_layer.statistics import TableStatistics, estimate_rows
+
+FULL_SCAN, INDEX_SCAN, ZONE_MAP_SCAN = "full scan", "index scan", "zone map scan"
+
+# Selectivity of comparisons the statistics cannot estimate
+EQUALITY_SELECTIVITY = 0.1
+RANGE_SELECTIVITY = 1 / 3
+
+# Cost of opening an index and binary searching it, and of fetching one row it finds
+INDEX_LOOKUP_COST = 20.0
+INDEX_ROW_COST = 4.0
+# Cost of seeking to the next run of blocks a zone-map scan reads
+BLOCK_SEEK_COST = 10.0
+
+# Comparison with the column on the left -> the same comparison with the operands swapped
+_SWAPPED = {"=": "=", "==": "==", "!=": "!=", "<>": "<>", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+
+class AccessPath:
+    """How a filtered scan reads its table, with the estimated rows it returns and the cost of reading them."""
+
+    def __init__(self, method: str, rows: float, cost: float, column: Optional[str] = None,
+                 row_index: Optional[RowIndex] = None):
+        self.method = method
+        self.rows = rows
+        self.cost = cost
+        # The indexed column of an index scan
+        self.column = column
+        # The row index a zone-map scan was costed with, so the scan does not load it again
+        self.row_index = row_index
+
+    def __repr__(self):
+        method = f"{self.method} on {self.column}" if self.column else self.method
+        return f"{method}, rows={max(1, round(self.rows)) if self.rows else 0}, cost={self.cost:.0f}"
+
+
+def estimate_selectivity(condition: dict, statistics: Optional[TableStatistics]) -> float:
+    """Estimated fraction of the rows satisfying a WHERE condition."""
+    op = condition['op'].upper()
+    if op == 'AND':
+        return estimate_selectivity(condition['left'], statistics) * estimate_selectivity(condition['right'], statistics)
+    if op == 'OR':
+        left = estimate_selectivity(condition['left'], statistics)
+        right = estimate_selectivity(condition['right'], statistics)
+        return left + right - left * right
+    comparison = _column_comparison(condition)
+    if comparison is not None:
+        return _comparison_selectivity(*comparison, statistics)
+    return _default_selectivity(condition['op'])
+
+
+def _comparison_selectivity(column: str, op: str, value: Any, statistics: Optional[TableStatistics]) -> float:
+    if statistics is not None:
+        if not isinstance(value, Parameter):
+            selectivity = statistics.selectivity(column, op, value)
+            if selectivity is not None:
+                return selectivity
+        elif op in ("=", "==") and column in statistics.columns:
+            # Whatever the value, one of the distinct values
+            return 1 / max(1, statistics.columns[column]["distinct_count"])
+    return _default_selectivity(op)
+
+
+def _default_selectivity(op: str) -> float:
+    if op in ("=", "=="):
+        return EQUALITY_SELECTIVITY
+    if op in ("!=", "<>"):
+        return 1 - EQUALITY_SELECTIVITY
+    return RANGE_SELECTIVITY
+
+
+def reorder_condition(condition: Optional[dict], statistics: Optional[TableStatistics],
+                      metadata: dict[str, str]) -> Optional[dict]:
+    """
+    Copy of a WHERE condition with the children of every AND/OR chain in the order that evaluates
+    it fastest: for AND the children most likely to be false for their cost first, for OR the ones
+    most likely to be true. The compiled predicate short-circuits in this order.
+    """
+    if condition is None:
+        return None
+    op = condition['op'].upper()
+    if op not in ('AND', 'OR'):
+        return condition
+    children = [reorder_condition(child, statistics, metadata) for child in _chain(condition, op)]
+
+    def rank(child: dict) -> float:
+        selectivity = estimate_selectivity(child, statistics)
+        # Evaluations saved per unit of cost: AND stops at a false child, OR at a true one
+        decisive = 1 - selectivity if op == 'AND' else selectivity
+        return _evaluation_cost(child, metadata) / max(decisive, 1e-9)
+
+    children.sort(key=rank)
+    result = children[0]
+    for child in children[1:]:
+        result = {'op': op, 'left': result, 'right': child}
+    return result
+
+
+def choose_access_path(schema: str, table: str, metadata: dict[str, str], indexes: List[str],
+                       condition: dict) -> AccessPath:
+    """The cheapest way to read the rows of a table that may satisfy `condition`."""
+    statistics = TableStatistics.open(schema, table, metadata)
+    rows = statistics.row_count if statistics is not None else estimate_rows(schema, table, metadata)
+    matching = rows * estimate_selectivity(condition, statistics)
+    best = AccessPath(FULL_SCAN, matching, float(rows))
+
+    for column, bounds in index_bounds(condition).items():
+        if column not in indexes:
+            continue
+        cost = INDEX_LOOKUP_COST + INDEX_ROW_COST * rows * _bounds_selectivity(column, bounds, statistics)
+        if cost < best.cost:
+            best = AccessPath(INDEX_SCAN, matching, cost, column=column)
+
+    row_index = open_row_index(schema, table, metadata)
+    # A zone-map scan reading anything costs at least a block and a seek: not worth walking the
+    # zone maps when the best path is already that cheap, as an index lookup of a few rows is
+    if row_index is not None and row_index.block_count \
+            and best.cost > min(rows, row_index.stride) + BLOCK_SEEK_COST:
+        blocks = runs = 0
+        previous = False
+        for block in range(row_index.block_count):
+            matches = row_index.block_may_match(condition, block)
+            blocks += matches
+            runs += matches and not previous
+            previous = matches
+        cost = min(rows, blocks * row_index.stride) + BLOCK_SEEK_COST * runs
+        if cost < best.cost:
+            best = AccessPath(ZONE_MAP_SCAN, matching, cost, row_index=row_index)
+    return best
+
+
+def _bounds_selectivity(column: str, bounds: List[tuple[str, Any]], statistics: Optional[TableStatistics]) -> float:
+    """Selectivity of the comparisons of one column an index answers, the tightest bound of each kind combined."""
+    def selectivity(op: str, value: Any) -> float:
+        return _comparison_selectivity(column, op, value, statistics)
+
+    equal = [selectivity(op, value) for op, value in bounds if op in ("=", "==")]
+    if equal:
+        return min(equal)
+    lower = min([selectivity(op, value) for op, value in bounds if op in (">", ">=")], default=1.0)
+    upper = min([selectivity(op, value) for op, value in bounds if op in ("<", "<=")], default=1.0)
+    # Rows above the lower bound plus rows below the upper one count the rows in between twice
+    return max(0.0, lower + upper - 1)
+
+
+def _column_comparison(condition: dict) -> Optional[tuple[str, str, Any]]:
+    """(column, operator, value) of a comparison of a column with a literal or a placeholder, column on the left."""
+    left, right, op = condition.get('left_operand'), condition.get('right_operand'), condition['op']
+    if op not in _SWAPPED:
+        return None
+    if _is_column(right) and not _is_column(left):
+        left, right, op = right, left, _SWAPPED[op]
+    if not _is_column(left) or _is_column(right) or right is None:
+        return None
+    if isinstance(right, str):
+        right = parse_literal(right[1:-1])
+    return left, op, right
+
+
+def _chain(condition: dict, op: str) -> List[dict]:
+    """Children of a chain of the same boolean operator, e.g. a, b, c of (a AND b) AND c."""
+    if condition['op'].upper() != op:
+        return [condition]
+    return _chain(condition['left'], op) + _chain(condition['right'], op)
+
+
+def _evaluation_cost(condition: dict, metadata: dict[str, str]) -> float:
+    """Relative cost of evaluating a condition once: string and date comparisons cost twice a number's."""
+    if condition['op'].upper() in ('AND', 'OR'):
+        return _evaluation_cost(condition['left'], metadata) + _evaluation_cost(condition['right'], metadata)
+    operands = (condition.get('left_operand'), condition.get('right_operand'))
+    slow = any((isinstance(operand, str) and is_quoted(operand))
+               or (_is_column(operand) and column_kind(metadata.get(operand, "")) in ("str", "date"))
+               for operand in operands)
+    return 2.0 if slow else 1.0
+
+
+def _is_column(operand: Any) -> bool:
+    return isinstance(operand, str) and not is_quoted(operand)
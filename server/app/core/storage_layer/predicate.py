@@ -0,0 +1,220 @@
+"""
+Compiles a WHERE condition, as produced by SQLTransformer, into one flat Python function.
+
+Column names are resolved to row positions and literals are parsed once, at plan time, so the
+function evaluated for every row is a single expression such as ``row[2] > 30 and row[0] < 5``.
+
+Placeholders of prepared statements compile to closure variables (``row[2] > _p0``), binding values
+only creates a new closure over the already compiled code.
+"""
+import copy
+import datetime
+import operator
+from typing import Any, Callable, List
+
+from app.core.parser.parser import Parameter
+
+# SQL comparison -> (Python operator in generated code, function used to fold literals)
+COMPARISON_OPERATORS = {
+    "=": ("==", operator.eq),
+    "==": ("==", operator.eq),
+    "!=": ("!=", operator.ne),
+    "<>": ("!=", operator.ne),
+    "<": ("<", operator.lt),
+    "<=": ("<=", operator.le),
+    ">": (">", operator.gt),
+    ">=": (">=", operator.ge),
+}
+
+# Markers for sub-expressions that folded to a constant at compile time
+_TRUE, _FALSE = "True", "False"
+
+
+class CompiledPredicate:
+    """
+    A compiled WHERE clause. Callable with the FilterIterator signature ``(row, schema)``;
+    hot loops call ``function`` directly to save a frame per row.
+    """
+
+    def __init__(self, condition: dict, columns: List[str]):
+        self.condition = condition
+        self.columns = columns
+        # Keys of the placeholders, in the order of the _pN variables
+        self.parameters: list[int | str] = []
+        self._constants: dict[str, Any] = {}
+        self.expression = self._compile_condition(condition)
+        namespace = dict(self._constants)
+        if self.parameters:
+            arguments = ", ".join(f"_p{i}" for i in range(len(self.parameters)))
+            source = (f"def bind({arguments}):\n"
+                      f"    def predicate(row, schema=None):\n"
+                      f"        return {self.expression}\n"
+                      f"    return predicate\n")
+            exec(compile(source, "<where clause>", "exec"), namespace)
+            self._bind = namespace["bind"]
+            self.function: Callable[..., bool] = _unbound
+        else:
+            source = f"def predicate(row, schema=None):\n    return {self.expression}\n"
+            exec(compile(source, "<where clause>", "exec"), namespace)
+            self.function = namespace["predicate"]
+
+    def __call__(self, row: List[Any], schema: List[str] = None) -> bool:
+        return self.function(row, schema)
+
+    def __repr__(self):
+        return self.expression
+
+    def bind(self, parameters: list | tuple | dict | None = None) -> 'CompiledPredicate':
+        """
+        Return the predicate with its placeholders bound to `parameters`, a sequence for ``?``
+        placeholders or a mapping for ``:name`` ones. Quoted-literal rules apply to string values,
+        so '2024-01-31' compares as a date. A predicate without placeholders is returned as is.
+        """
+        if not self.parameters:
+            return self
+        values = [bind_value(value) for value in parameter_values(self.parameters, parameters)]
+        bound = copy.copy(self)
+        bound.function = self._bind(*values)
+        bound.condition = substitute_parameters(self.condition, dict(zip(self.parameters, values)))
+        bound.parameters = []
+        return bound
+
+    def _compile_condition(self, condition: dict) -> str:
+        if 'op' not in condition:
+            raise ValueError(f"Invalid condition structure: {condition}")
+        op = condition['op'].upper()
+
+        if op in ('AND', 'OR'):
+            left = self._compile_condition(condition['left'])
+            right = self._compile_condition(condition['right'])
+            return self._fold_boolean(op, left, right)
+
+        if condition['op'] not in COMPARISON_OPERATORS:
+            raise ValueError(f"Unsupported operator: {condition['op']}")
+
+        left, left_value = self._compile_operand(condition['left_operand'])
+        right, right_value = self._compile_operand(condition['right_operand'])
+        py_op, op_func = COMPARISON_OPERATORS[condition['op']]
+        if left is None and right is None:
+            # Both sides are literals: evaluate now instead of once per row
+            try:
+                return _TRUE if op_func(left_value, right_value) else _FALSE
+            except TypeError:
+                raise ValueError(f"Cannot compare {left_value!r} {condition['op']} {right_value!r}")
+        left = left if left is not None else self._constant(left_value)
+        right = right if right is not None else self._constant(right_value)
+        return f"({left} {py_op} {right})"
+
+    @staticmethod
+    def _fold_boolean(op: str, left: str, right: str) -> str:
+        absorbing, neutral = (_FALSE, _TRUE) if op == 'AND' else (_TRUE, _FALSE)
+        if left == absorbing or right == absorbing:
+            return absorbing
+        if left == neutral:
+            return right
+        if right == neutral:
+            return left
+        return f"({left} {op.lower()} {right})"
+
+    def _compile_operand(self, operand: Any) -> tuple[str | None, Any]:
+        """Returns (row access expression, None) for a column or a placeholder, (None, value) for a literal."""
+        if isinstance(operand, Parameter):
+            if operand.key not in self.parameters:
+                self.parameters.append(operand.key)
+            return f"_p{self.parameters.index(operand.key)}", None
+        if isinstance(operand, str):
+            if is_quoted(operand):
+                return None, parse_literal(operand[1:-1])
+            return f"row[{resolve_column(operand, self.columns)}]", None
+        return None, operand
+
+    def _constant(self, value: Any) -> str:
+        if value is None or isinstance(value, int):
+            return repr(value)
+        name = f"_c{len(self._constants)}"
+        self._constants[name] = value
+        return name
+
+
+def _unbound(row, schema=None):
+    raise ValueError("The statement has parameters, bind their values before executing it")
+
+
+def compile_predicate(condition: dict, columns: List[str]) -> CompiledPredicate:
+    return CompiledPredicate(condition, columns)
+
+
+def parameter_values(keys: List[int | str], parameters: list | tuple | dict | None) -> List[Any]:
+    """Values of the placeholders `keys` (positions or names) taken from the bound `parameters`."""
+    if parameters is None:
+        parameters = []
+    if isinstance(parameters, dict):
+        missing = [key for key in keys if key not in parameters]
+        if missing:
+            raise ValueError(f"Missing values for parameters {missing}")
+        return [parameters[key] for key in keys]
+    if any(isinstance(key, str) for key in keys):
+        raise ValueError("Named parameters must be bound with a mapping")
+    if len(parameters) != len(keys):
+        raise ValueError(f"The statement expects {len(keys)} parameters, {len(parameters)} given")
+    return [parameters[key] for key in keys]
+
+
+def bind_value(value: Any) -> Any:
+    """A bound string follows the quoted literal rules, every other value is compared as is."""
+    if isinstance(value, str):
+        return parse_literal(value)
+    return value
+
+
+def substitute_parameters(condition: dict, values: dict[int | str, Any]) -> dict:
+    """Copy of `condition` with its placeholders replaced by literal operands of the bound values."""
+    if condition.get('op', '').upper() in ('AND', 'OR'):
+        return {**condition,
+                'left': substitute_parameters(condition['left'], values),
+                'right': substitute_parameters(condition['right'], values)}
+    result = dict(condition)
+    for side in ('left_operand', 'right_operand'):
+        operand = condition.get(side)
+        if isinstance(operand, Parameter):
+            value = values[operand.key]
+            if isinstance(value, datetime.date):
+                value = f"'{value.isoformat()}'"
+            elif isinstance(value, str):
+                value = f"'{value}'"
+            result[side] = value
+    return result
+
+
+def referenced_columns(condition: dict | None) -> List[str]:
+    """Column names read by a WHERE condition, in order of first appearance."""
+    if condition is None:
+        return []
+    if condition.get('op', '').upper() in ('AND', 'OR'):
+        return list(dict.fromkeys(referenced_columns(condition['left']) + referenced_columns(condition['right'])))
+    columns = []
+    for key in ('left_operand', 'right_operand'):
+        operand = condition.get(key)
+        if isinstance(operand, str) and not is_quoted(operand):
+            columns.append(operand)
+    return list(dict.fromkeys(columns))
+
+
+def resolve_column(column_name: str, columns: List[str]) -> int:
+    try:
+        return columns.index(column_name)
+    except ValueError:
+        raise ValueError(f"Column '{column_name}' not found in schema {columns}")
+
+
+def is_quoted(operand: str) -> bool:
+    return (operand.startswith("'") and operand.endswith("'")) or \
+           (operand.startswith('"') and operand.endswith('"'))
+
+
+def parse_literal(literal: str) -> Any:
+    """A quoted literal compares as a date when it is one, the same rule build_expression applies."""
+    try:
+        return datetime.datetime.strptime(literal, "%Y-%m-%d").date()
+    except ValueError:
+        return literal
@@ -2,7 +2,9 @@ from typing import List, Any, Iterator, Callable, Dict
 
 from lark import Lark
 
+from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
 from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.numpy_executor import NumpyExecutor
 from app.core.storage_layer.utils import sql_to_logical_plan
 
 class QueryExecutor:
@@ -11,6 +13,15 @@ class QueryExecutor:
     @staticmethod
     def execute_sql(sql: str, metadata: Metadata,  parser: Lark) -> Iterator[List[Any]]:
         """Parse, optimize, and execute a SQL query"""
+        parsed_query = QueryExecutor.parse_sql(sql, parser)
+        logical_plan = QueryExecutor.plan(parsed_query, metadata)
+
+        # Execute the plan
+        result = logical_plan.execute()
+        return result
+
+    @staticmethod
+    def parse_sql(sql: str, parser: Lark) -> dict:
         try:
             # Parse SQL to logical plan
             parsed_tree = parser.parse(sql)
@@ -18,12 +29,10 @@ class QueryExecutor:
             raise Exception(f"Failed to parse query '{sql}': {str(e)}")
         if parsed_tree is None or len(parsed_tree.children) == 0:
             raise ValueError("Parsed query is None")
-        else:
-            parsed_query = parsed_tree.children[0]
-        
-        logical_plan = sql_to_logical_plan(parsed_query, metadata)
+        return parsed_tree.children[0]
 
-        # Execute the plan
-        result = logical_plan.execute()
-        return result
-        
+    @staticmethod
+    def plan(parsed_query: dict, metadata: Metadata) -> LogicalPlan:
+        logical_plan = sql_to_logical_plan(parsed_query, metadata)
+        # Numeric filters run on the NumPy columnar engine when it can evaluate them exactly
+        return NumpyExecutor.optimize(logical_plan)
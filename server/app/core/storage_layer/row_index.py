@@ -0,0 +1,292 @@
+"""
+Row offset index and zone maps of a CSV table, for OFFSET without reading the skipped rows and for
+WHERE clauses that skip the blocks of rows they cannot match.
+
+The index lives in ``data/<schema>/.rowindex/<table>.idx``: a JSON header (csv size/mtime and column
+types it was built from, row count, stride, zone maps) followed by int64 byte offsets of every
+``stride``-th data row. A scan starting at row n seeks to the offset of row ``n - n % stride`` and
+steps over fewer than ``stride`` rows without decoding them.
+
+The rows from one offset to the next form a block, and the zone map of a column holds per block the
+min, max and NULL count of its values. A filtered scan seeks past the blocks where no value range can
+satisfy the WHERE clause (see ``RowIndex.block_may_match``), which for CSVs appended in the order of a
+column (ids, dates) turns a range predicate into reading only the blocks in range.
+
+A scan ends at the first row it cannot read: a row of the wrong length, or a bad cell in a column
+the query decodes. The index stops at the first malformed row (``row_count``) and records, per column,
+the first row whose cell fails to decode, so an OFFSET past the end of what a full scan would return
+stays empty.
+
+Build it with ``python -m app.core.storage_layer.row_index <schema> [<table> ...]``
+or let the first OFFSET or filtered scan build it by setting ROW_INDEX_AUTO_BUILD=true.
+"""
+from array import array
+import csv
+import datetime
+import json
+import os
+import struct
+import sys
+import uuid
+from typing import Any, Iterator, List, Optional
+
+from app.core import config
+from app.core.parser.parser import Parameter
+from app.core.storage_layer.columnar import SidecarCache, csv_path, column_kind, _csv_signature
+from app.core.storage_layer.datatypes import DBTypeObject
+from app.core.storage_layer.metadata import DB_DIR
+from app.core.storage_layer.predicate import is_quoted, parse_literal
+
+ROW_INDEX_DIR = ".rowindex"
+FORMAT_VERSION = 2
+DEFAULT_STRIDE = 1024
+
+# Loaded row indexes, see SidecarCache
+_CACHE = SidecarCache()
+
+# Length prefix of the JSON header
+_HEADER_LENGTH = struct.Struct("<Q")
+
+# Comparison with the column on the left -> the same comparison with the operands swapped
+_SWAPPED = {"=": "=", "==": "==", "!=": "!=", "<>": "<>", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+
+def row_index_path(schema: str, table: str) -> str:
+    return os.path.join(DB_DIR, schema.lower(), ROW_INDEX_DIR, table.lower() + ".idx")
+
+
+class RowIndex:
+    """Byte offsets of every `stride`-th data row of a CSV, and per column min/max/NULL count of each block."""
+
+    def __init__(self, header: dict, offsets: array, column_types: dict[str, str]):
+        self.row_count: int = header["row_count"]
+        self.stride: int = header["stride"]
+        self._first_bad_rows: dict[str, int] = header["first_bad_rows"]
+        self._offsets = offsets
+        # Column -> [min, max, null_count] per block, None for a block whose values do not compare
+        self._zones: dict[str, list] = {}
+        for name, zones in header["zones"].items():
+            if column_kind(column_types.get(name, "")) == "date":
+                zones = [[_date(zone[0]), _date(zone[1]), zone[2]] if zone is not None else None for zone in zones]
+            self._zones[name] = zones
+
+    @property
+    def block_count(self) -> int:
+        return len(self._offsets)
+
+    def readable_rows(self, columns: List[str]) -> int:
+        """Rows a scan decoding `columns` returns before it stops."""
+        return min([self.row_count] + [self._first_bad_rows[col] for col in columns if col in self._first_bad_rows])
+
+    @classmethod
+    def open(cls, schema: str, table: str, metadata: dict[str, str]) -> Optional['RowIndex']:
+        """The index of a table if it exists and is fresh, otherwise None, loaded once per version of the files."""
+        return _CACHE.load((row_index_path(schema, table), tuple(metadata.items())),
+                           [row_index_path(schema, table), csv_path(schema, table)],
+                           lambda: cls._load(schema, table, metadata))
+
+    @classmethod
+    def _load(cls, schema: str, table: str, metadata: dict[str, str]) -> Optional['RowIndex']:
+        try:
+            with open(row_index_path(schema, table), "rb") as f:
+                (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+                header = json.loads(f.read(length))
+                offsets = array("q")
+                offsets.frombytes(f.read())
+            size, mtime_ns = _csv_signature(csv_path(schema, table))
+        except (OSError, ValueError, struct.error):
+            return None
+        if header.get("version") != FORMAT_VERSION \
+                or header.get("csv_size") != size or header.get("csv_mtime_ns") != mtime_ns \
+                or header.get("column_types") != list(metadata.values()):
+            return None
+        if len(offsets) != (header["row_count"] + header["stride"] - 1) // header["stride"]:
+            return None
+        return cls(header, offsets, metadata)
+
+    def seek_position(self, row: int) -> tuple[int, int]:
+        """(byte offset, rows still to step over) to position a reader on data row `row` < row_count."""
+        block = row // self.stride
+        return self._offsets[block], row - block * self.stride
+
+    def block_may_match(self, condition: dict, block: int) -> bool:
+        """
+        Whether some row of `block` may satisfy a WHERE condition (with its placeholders bound), False
+        only when the zone maps rule every row out. Comparisons between a column and a literal are
+        checked against the block's value range, anything else (two columns, unknown columns, values
+        of another type) may match. NULLs match ``!=``, which the compiled predicate evaluates as
+        Python does, and a block with NULLs is read for ``<``/``>`` comparisons so that the predicate
+        still reports them.
+        """
+        op = condition['op'].upper()
+        if op == 'AND':
+            return self.block_may_match(condition['left'], block) and self.block_may_match(condition['right'], block)
+        if op == 'OR':
+            return self.block_may_match(condition['left'], block) or self.block_may_match(condition['right'], block)
+        left, right = condition['left_operand'], condition['right_operand']
+        op = condition['op']
+        if _is_column(right) and not _is_column(left):
+            left, right, op = right, left, _SWAPPED.get(op, op)
+        if not _is_column(left) or _is_column(right) or right is None or isinstance(right, Parameter):
+            return True
+        zones = self._zones.get(left)
+        if zones is None or zones[block] is None:
+            return True
+        low, high, null_count = zones[block]
+        value = parse_literal(right[1:-1]) if isinstance(right, str) else right
+        try:
+            if op in ("!=", "<>"):
+                return null_count > 0 or not (low == high == value)
+            if low is None:
+                # Only NULLs, which no other comparison matches
+                return op not in ("=", "==") and null_count > 0
+            if op in ("=", "=="):
+                return low <= value <= high
+            if null_count:
+                return True
+            if op == "<":
+                return low < value
+            if op == "<=":
+                return low <= value
+            if op == ">":
+                return high > value
+            if op == ">=":
+                return high >= value
+        except TypeError:
+            return True
+        return True
+
+
+def open_row_index(schema: str, table: str, metadata: dict[str, str]) -> Optional[RowIndex]:
+    """The fresh index of a table, built first when it has none and ROW_INDEX_AUTO_BUILD is set."""
+    index = RowIndex.open(schema, table, metadata)
+    if index is None and config.ROW_INDEX_AUTO_BUILD:
+        try:
+            if build_row_index(schema, table, metadata):
+                index = RowIndex.open(schema, table, metadata)
+        except OSError:
+            index = None
+    return index
+
+
+def build_row_index(schema: str, table: str, metadata: dict[str, str], stride: int = DEFAULT_STRIDE) -> bool:
+    """(Re)build the row index of a table. Returns False when the CSV header does not match the metadata."""
+    columns = list(metadata.keys())
+    column_types = list(metadata.values())
+    decoders = DBTypeObject.build_decoders(column_types)
+    source = csv_path(schema, table)
+    size, mtime_ns = _csv_signature(source)
+    offsets = array("q")
+    row_count = 0
+    first_bad_rows: dict[str, int] = {}
+    zones: dict[str, list] = {column: [] for column in columns}
+    # [min, max, null_count] of each column in the current block
+    block: List[Optional[list]] = []
+
+    # Byte offset of every line handed to csv.reader. The reader takes exactly the lines of one
+    # record per row, so a row starts at the first line it pulls.
+    starts = []
+
+    def lines(f) -> Iterator[str]:
+        position = 0
+        for line in f:
+            starts.append(position)
+            position += len(line)
+            yield line.decode("utf-8")
+
+    with open(source, "rb") as f:
+        reader = csv.reader(lines(f))
+        header = next(reader, [])
+        if [col.lower() for col in header] != [col.lower() for col in columns]:
+            return False
+        while True:
+            consumed = len(starts)
+            raw = next(reader, None)
+            if raw is None:
+                break
+            if len(raw) != len(columns):
+                break
+            if row_count % stride == 0:
+                offsets.append(starts[consumed])
+                block = [[None, None, 0] for _ in columns]
+                for column, zone in zip(columns, block):
+                    zones[column].append(zone)
+            for i, (column, decode, data) in enumerate(zip(columns, decoders, raw)):
+                if column in first_bad_rows:
+                    continue
+                try:
+                    value = decode(data)
+                except (ValueError, OverflowError, TypeError):
+                    first_bad_rows[column] = row_count
+                    continue
+                zone = block[i]
+                if zone is None:
+                    continue
+                if value is None:
+                    zone[2] += 1
+                    continue
+                try:
+                    if value != value:
+                        # NaN does not order, the block cannot be ruled out on this column
+                        raise TypeError
+                    if zone[0] is None or value < zone[0]:
+                        zone[0] = value
+                    if zone[1] is None or value > zone[1]:
+                        zone[1] = value
+                except TypeError:
+                    block[i] = zones[column][-1] = None
+            row_count += 1
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "csv_size": size,
+        "csv_mtime_ns": mtime_ns,
+        "column_types": column_types,
+        "row_count": row_count,
+        "first_bad_rows": first_bad_rows,
+        "stride": stride,
+        "zones": {column: [[_json_value(zone[0]), _json_value(zone[1]), zone[2]] if zone is not None else None
+                           for zone in column_zones]
+                  for column, column_zones in zones.items()},
+    }).encode("utf-8")
+    final_path = row_index_path(schema, table)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    tmp_path = f"{final_path}.tmp-{uuid.uuid4().hex}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            offsets.tofile(f)
+        os.replace(tmp_path, final_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+def _is_column(operand: Any) -> bool:
+    return isinstance(operand, str) and not is_quoted(operand)
+
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime.date) else value
+
+
+def _date(value: Optional[str]) -> Optional[datetime.date]:
+    return datetime.date.fromisoformat(value) if value is not None else None
+
+
+if __name__ == "__main__":
+    from app.core.storage_layer.metadata import Metadata
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.core.storage_layer.row_index <schema> [<table> ...]")
+        sys.exit(1)
+
+    schema_metadata = Metadata(sys.argv[1])
+    for table_name in sys.argv[2:] or list(schema_metadata.data.keys()):
+        if build_row_index(schema_metadata.name, table_name, schema_metadata.get_table(table_name)):
+            print(f"Built row index for {schema_metadata.name}/{table_name}")
+        else:
+            print(f"Skipped {schema_metadata.name}/{table_name}: the CSV header does not match the metadata")
@@ -0,0 +1,332 @@
+"""
+Secondary indexes of a CSV table, for WHERE clauses that compare an indexed column with a value.
+
+An index is declared per table in metadata.yaml::
+
+    tables:
+      - table_name: people
+        columns: ...
+        indexes:
+          - index_name: people_id
+            column_name: id
+
+or created with ``CREATE INDEX people_id ON people (id)``, which builds it and records it in
+``data/<schema>/.index/indexes.json`` so that metadata.yaml keeps the comments and layout of its author.
+It lives in ``data/<schema>/.index/<table>.<column>.idx``: a JSON header (csv size/mtime and column
+types it was built from, row count, first bad row per column, key count) followed by the row numbers,
+the CSV byte offsets and the keys of the non-NULL values of the column, in ascending key order. A scan
+filtered on ``id = 123`` or ``join_date >= '2024-01-01'`` binary searches the memory-mapped keys and
+seeks straight to the matching rows, so a point lookup reads a few index pages and one CSV row
+whatever the size of the table.
+
+Keys are int64 for INT and BOOLEAN, day ordinals for DATE, float64 for FLOAT and UTF-8 bytes for
+VARCHAR, which order as the strings do. As for the row index, a scan ends at the first row it cannot
+read, so matches at or after that row are never returned.
+
+A declared index whose CSV has changed is rebuilt by the next scan that can use it. Build indexes by
+hand with ``python -m app.core.storage_layer.secondary_index <schema> [<table> ...]``.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+import csv
+import datetime
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+from typing import Any, Iterator, List, Optional
+
+from app.core.parser.parser import Parameter
+from app.core.storage_layer.columnar import csv_path, column_kind, _csv_signature
+from app.core.storage_layer.datatypes import DBTypeObject
+from app.core.storage_layer.metadata import DB_DIR
+from app.core.storage_layer.predicate import is_quoted, parse_literal
+
+INDEX_DIR = ".index"
+FORMAT_VERSION = 1
+
+# Storage of the keys by column kind: array typecode, or "s" for offsets into a UTF-8 blob
+KEY_FORMATS = {"int": "q", "bool": "q", "date": "q", "float": "d", "str": "s"}
+
+# Comparisons an index answers, with the column on the left -> the same comparison with the operands swapped
+RANGE_OPERATORS = {"=": "=", "==": "==", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+# Length prefix of the JSON header
+_HEADER_LENGTH = struct.Struct("<Q")
+
+
+def index_path(schema: str, table: str, column: str) -> str:
+    return os.path.join(DB_DIR, schema.lower(), INDEX_DIR, f"{table.lower()}.{column.lower()}.idx")
+
+
+def index_bounds(condition: dict | None) -> dict[str, List[tuple[str, Any]]]:
+    """
+    Column -> [(operator, value)] of the comparisons of a column with a literal or a placeholder
+    among the conjuncts ANDed at the top of a WHERE condition, with the column on the left. Every row
+    satisfying the condition satisfies all of them.
+    """
+    bounds: dict[str, List[tuple[str, Any]]] = {}
+
+    def visit(node: dict) -> None:
+        if node['op'].upper() == 'AND':
+            visit(node['left'])
+            visit(node['right'])
+            return
+        left, right, op = node.get('left_operand'), node.get('right_operand'), node['op']
+        if op not in RANGE_OPERATORS:
+            return
+        if _is_column(right) and not _is_column(left):
+            left, right, op = right, left, RANGE_OPERATORS[op]
+        if not _is_column(left) or _is_column(right) or right is None:
+            return
+        value = parse_literal(right[1:-1]) if isinstance(right, str) else right
+        bounds.setdefault(left, []).append((op, value))
+
+    if condition is not None:
+        visit(condition)
+    return bounds
+
+
+class SecondaryIndex:
+    """Sorted keys of one column with the row number and CSV byte offset of each, memory-mapped."""
+
+    def __init__(self, header: dict, file):
+        self.column: str = header["column"]
+        self.row_count: int = header["row_count"]
+        self.null_count: int = header["null_count"]
+        self._first_bad_rows: dict[str, int] = header["first_bad_rows"]
+        self._kind: str = header["kind"]
+        self._file = file
+        self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        count = self.key_count = header["key_count"]
+        view = memoryview(self._map)
+        start = _aligned(_HEADER_LENGTH.size + header["header_length"])
+        self._rows = view[start:start + 8 * count].cast("q")
+        self._offsets = view[start + 8 * count:start + 16 * count].cast("q")
+        start += 16 * count
+        key_format = KEY_FORMATS[self._kind]
+        if key_format == "s":
+            self._key_offsets = view[start:start + 8 * (count + 1)].cast("q")
+            self._blob = view[start + 8 * (count + 1):]
+            self._keys = None
+        else:
+            self._keys = view[start:start + 8 * count].cast(key_format)
+
+    @classmethod
+    def open(cls, schema: str, table: str, column: str, metadata: dict[str, str]) -> Optional['SecondaryIndex']:
+        """Load the index of a column if it exists and is fresh, otherwise return None."""
+        try:
+            f = open(index_path(schema, table, column), "rb")
+        except OSError:
+            return None
+        try:
+            (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+            header = json.loads(f.read(length))
+            size, mtime_ns = _csv_signature(csv_path(schema, table))
+            if header.get("version") != FORMAT_VERSION \
+                    or header.get("csv_size") != size or header.get("csv_mtime_ns") != mtime_ns \
+                    or header.get("column_types") != list(metadata.values()) or header.get("column") != column:
+                f.close()
+                return None
+            header["header_length"] = length
+            return cls(header, f)
+        except (OSError, ValueError, struct.error):
+            f.close()
+            return None
+
+    def readable_rows(self, columns: List[str]) -> int:
+        """Rows a scan decoding `columns` returns before it stops."""
+        return min([self.row_count] + [self._first_bad_rows[col] for col in columns if col in self._first_bad_rows])
+
+    def search(self, bounds: List[tuple[str, Any]]) -> Optional[tuple[int, int]]:
+        """
+        [start, stop) key positions of the values satisfying every (operator, value) of `bounds`, None
+        when the index cannot answer them: a value of another type than the column, or an order
+        comparison on a column with NULLs, which the predicate reports rather than skips.
+        """
+        start, stop = 0, self.key_count
+        for op, value in bounds:
+            key = self._key(value)
+            if key is None or (op not in ("=", "==") and self.null_count):
+                return None
+            if op in ("=", "=="):
+                start, stop = max(start, self._left(key)), min(stop, self._right(key))
+            elif op == "<":
+                stop = min(stop, self._left(key))
+            elif op == "<=":
+                stop = min(stop, self._right(key))
+            elif op == ">":
+                start = max(start, self._right(key))
+            else:
+                start = max(start, self._left(key))
+        return start, max(start, stop)
+
+    def matches(self, start: int, stop: int) -> List[tuple[int, int]]:
+        """(row number, byte offset) of the keys from `start` to `stop`, in row order."""
+        return sorted(zip(self._rows[start:stop].tolist(), self._offsets[start:stop].tolist()))
+
+    def close(self) -> None:
+        self._rows.release()
+        self._offsets.release()
+        if self._keys is not None:
+            self._keys.release()
+        else:
+            self._key_offsets.release()
+            self._blob.release()
+        self._map.close()
+        self._file.close()
+
+    def _key(self, value: Any) -> Any:
+        """`value` as a key of this index, None when it does not compare with the column's values."""
+        if self._kind == "str":
+            return value.encode("utf-8") if isinstance(value, str) else None
+        if self._kind == "date":
+            return value.toordinal() if isinstance(value, datetime.date) else None
+        if isinstance(value, (int, float)) and value == value:
+            return value
+        return None
+
+    def _left(self, key: Any) -> int:
+        if self._keys is not None:
+            return bisect_left(self._keys, key)
+        return bisect_left(range(self.key_count), key, key=self._string_key)
+
+    def _right(self, key: Any) -> int:
+        if self._keys is not None:
+            return bisect_right(self._keys, key)
+        return bisect_right(range(self.key_count), key, key=self._string_key)
+
+    def _string_key(self, position: int) -> bytes:
+        return self._blob[self._key_offsets[position]:self._key_offsets[position + 1]].tobytes()
+
+
+def build_index(schema: str, table: str, column: str, metadata: dict[str, str]) -> int:
+    """(Re)build the index of a column, returns the number of keys. Raises ValueError when the column
+    cannot be indexed or the CSV header does not match the metadata."""
+    if column not in metadata:
+        raise ValueError(f"Column '{column}' not found in table {table}")
+    kind = column_kind(metadata[column])
+    if kind not in KEY_FORMATS:
+        raise ValueError(f"Cannot index column '{column}' of type {metadata[column]}")
+    columns = list(metadata.keys())
+    column_types = list(metadata.values())
+    decoders = DBTypeObject.build_decoders(column_types)
+    key_position = columns.index(column)
+    source = csv_path(schema, table)
+    size, mtime_ns = _csv_signature(source)
+    entries = []
+    row_count = null_count = 0
+    first_bad_rows: dict[str, int] = {}
+
+    # Byte offset of every line handed to csv.reader, see build_row_index
+    starts = []
+
+    def lines(f) -> Iterator[str]:
+        position = 0
+        for line in f:
+            starts.append(position)
+            position += len(line)
+            yield line.decode("utf-8")
+
+    with open(source, "rb") as f:
+        reader = csv.reader(lines(f))
+        header = next(reader, [])
+        if [col.lower() for col in header] != [col.lower() for col in columns]:
+            raise ValueError(f"The CSV header of {schema}/{table} does not match its metadata")
+        while True:
+            consumed = len(starts)
+            raw = next(reader, None)
+            if raw is None or len(raw) != len(columns):
+                break
+            for i, (name, decode, data) in enumerate(zip(columns, decoders, raw)):
+                if name in first_bad_rows:
+                    continue
+                try:
+                    value = decode(data)
+                except (ValueError, OverflowError, TypeError):
+                    first_bad_rows[name] = row_count
+                    continue
+                if i != key_position:
+                    continue
+                if value is None:
+                    null_count += 1
+                elif value == value:
+                    # NaN satisfies no comparison, it is left out like NULL
+                    entries.append((_stored_key(kind, value), row_count, starts[consumed]))
+            row_count += 1
+    entries.sort()
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "csv_size": size,
+        "csv_mtime_ns": mtime_ns,
+        "column_types": column_types,
+        "column": column,
+        "kind": kind,
+        "row_count": row_count,
+        "null_count": null_count,
+        "first_bad_rows": first_bad_rows,
+        "key_count": len(entries),
+    }).encode("utf-8")
+    final_path = index_path(schema, table, column)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    tmp_path = f"{final_path}.tmp-{uuid.uuid4().hex}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            f.write(b"\0" * (_aligned(_HEADER_LENGTH.size + len(header)) - _HEADER_LENGTH.size - len(header)))
+            array("q", (row for _, row, _ in entries)).tofile(f)
+            array("q", (offset for _, _, offset in entries)).tofile(f)
+            if KEY_FORMATS[kind] == "s":
+                key_offsets = array("q", [0])
+                for key, _, _ in entries:
+                    key_offsets.append(key_offsets[-1] + len(key))
+                key_offsets.tofile(f)
+                f.write(b"".join(key for key, _, _ in entries))
+            else:
+                array(KEY_FORMATS[kind], (key for key, _, _ in entries)).tofile(f)
+        os.replace(tmp_path, final_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(entries)
+
+
+def _stored_key(kind: str, value: Any) -> Any:
+    if kind == "str":
+        return value.encode("utf-8")
+    if kind == "date":
+        return value.toordinal()
+    if kind == "bool":
+        return int(value)
+    return value
+
+
+def _aligned(position: int) -> int:
+    return (position + 7) // 8 * 8
+
+
+def _is_column(operand: Any) -> bool:
+    return isinstance(operand, str) and not is_quoted(operand)
+
+
+if __name__ == "__main__":
+    from app.core.storage_layer.metadata import Metadata
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.core.storage_layer.secondary_index <schema> [<table> ...]")
+        sys.exit(1)
+
+    schema_metadata = Metadata(sys.argv[1])
+    for table_name in sys.argv[2:] or list(schema_metadata.data.keys()):
+        for index_column in schema_metadata.get_indexes(table_name).values():
+            try:
+                keys = build_index(schema_metadata.name, table_name, index_column, schema_metadata.get_table(table_name))
+            except ValueError as e:
+                print(f"Skipped {schema_metadata.name}/{table_name}.{index_column}: {e}")
+                continue
+            print(f"Built index on {schema_metadata.name}/{table_name}.{index_column}: {keys} keys")
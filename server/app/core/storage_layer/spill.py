@@ -0,0 +1,49 @@
+"""
+Temporary files for operators that outgrow their memory budget (sort runs, and later hash partitions).
+
+Rows are written as pickled batches, so typed values (dates, None, floats) come back exactly as
+``DBTypeObject`` decoded them. Files are anonymous temporary files, removed on close or at exit.
+"""
+import pickle
+import sys
+import tempfile
+from typing import Any, Iterator, List
+
+from app.core import config
+
+
+def estimate_size(rows: List[List[Any]]) -> int:
+    """Approximate memory held by a list of rows: the row lists and their values."""
+    getsizeof = sys.getsizeof
+    return sum(getsizeof(row) + sum(map(getsizeof, row)) for row in rows)
+
+
+class SpillFile:
+    """An append-then-read file of row batches."""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix="dbcsv-spill-", dir=config.SPILL_DIR or None)
+        self.row_count = 0
+
+    def write(self, rows: List[List[Any]]) -> None:
+        if rows:
+            pickle.dump(rows, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+            self.row_count += len(rows)
+
+    def batches(self) -> Iterator[List[List[Any]]]:
+        """Read the batches back in write order, from the start of the file."""
+        self._file.flush()
+        self._file.seek(0)
+        load = pickle.load
+        while True:
+            try:
+                yield load(self._file)
+            except EOFError:
+                return
+
+    def rows(self) -> Iterator[List[Any]]:
+        for batch in self.batches():
+            yield from batch
+
+    def close(self) -> None:
+        self._file.close()
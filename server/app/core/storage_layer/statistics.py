@@ -0,0 +1,397 @@
+"""
+Per-table statistics collected by ``ANALYZE <table>``: row count and, per column, min, max, null
+count, an approximate distinct count, an equi-depth histogram and whether the column is in ascending
+order.
+
+The statistics live next to metadata.yaml in ``data/<schema>/<table>.stats.json`` together with the
+size/mtime of the CSV and the column types they were computed from; a file that no longer matches is
+stale and ignored. The planner answers ``COUNT(*)``, ``COUNT(col)``, ``MIN(col)`` and ``MAX(col)``
+without a WHERE or GROUP BY from them instead of scanning the table, joins use them to pick the
+build side of a hash join and to merge inputs that are already sorted on the join key, and the
+optimizer (optimizer.py) estimates the selectivity of WHERE conditions from them.
+
+The numbers follow what a scan returns: the table ends at the first malformed row, and the values of
+a column stop at its first cell that fails to decode (``rows``), as a scan reading that column stops
+there. Distinct counts are HyperLogLog estimates (about 1.6% error) and histograms are built from a
+sample of the values, they are meant for the planner and are never returned as query results.
+
+Collect them with ``ANALYZE <table>`` or ``python -m app.core.storage_layer.statistics <schema> [<table> ...]``.
+"""
+import csv
+import datetime
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+from bisect import bisect_right
+import uuid
+from typing import Any, List, Optional
+
+from app.core.storage_layer.columnar import SidecarCache, csv_path, column_kind, _csv_signature
+from app.core.storage_layer.datatypes import DBTypeObject
+from app.core.storage_layer.metadata import DB_DIR
+
+STATISTICS_SUFFIX = ".stats.json"
+FORMAT_VERSION = 3
+
+# Loaded statistics and row count estimates, see SidecarCache
+_CACHE = SidecarCache()
+
+# Bytes read from the start of a CSV to estimate its row count when it has no statistics
+ROW_SAMPLE_BYTES = 64 * 1024
+
+# Registers of the distinct count sketch, 2 ** SKETCH_PRECISION
+SKETCH_PRECISION = 12
+
+# Values sampled per column for its histogram, and buckets of the histogram, each holding as many values
+HISTOGRAM_SAMPLE = 10000
+HISTOGRAM_BUCKETS = 32
+
+# Columns of the result of ANALYZE, one row per table column
+ANALYZE_COLUMNS = {
+    "column": "VARCHAR",
+    "type": "VARCHAR",
+    "rows": "INT",
+    "null_count": "INT",
+    "distinct_count": "INT",
+    "min": "VARCHAR",
+    "max": "VARCHAR",
+}
+
+
+def statistics_path(schema: str, table: str) -> str:
+    return os.path.join(DB_DIR, schema.lower(), table.lower() + STATISTICS_SUFFIX)
+
+
+class DistinctSketch:
+    """HyperLogLog estimate of the number of distinct values added."""
+
+    def __init__(self, precision: int = SKETCH_PRECISION):
+        self._precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add(self, value: Any) -> None:
+        h = int.from_bytes(hashlib.blake2b(repr(value).encode("utf-8"), digest_size=8).digest(), "little")
+        index = h & ((1 << self._precision) - 1)
+        rest = h >> self._precision
+        # Position of the lowest set bit of the remaining 64 - precision bits
+        rank = (rest & -rest).bit_length() if rest else 64 - self._precision + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def estimate(self) -> int:
+        m = len(self._registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+
+class _ColumnCollector:
+    """Folds the decoded values of one column, MIN/MAX compare as the aggregate functions do."""
+
+    def __init__(self):
+        self.rows = 0
+        self.null_count = 0
+        self.min = None
+        self.max = None
+        self.ordered = True
+        # Whether the values are in ascending order without NULLs, which lets a join merge the column
+        self.sorted = True
+        self._last = None
+        self.sketch = DistinctSketch()
+        # Reservoir sample of the non-NULL values, seeded so that ANALYZE is repeatable
+        self.sample: List[Any] = []
+        self._seen = 0
+        self._random = random.Random(0)
+
+    def add(self, value: Any) -> None:
+        self.rows += 1
+        if value is None:
+            self.null_count += 1
+            self.sorted = False
+            return
+        self.sketch.add(value)
+        if not self.ordered:
+            return
+        self._seen += 1
+        if len(self.sample) < HISTOGRAM_SAMPLE:
+            self.sample.append(value)
+        else:
+            slot = self._random.randrange(self._seen)
+            if slot < HISTOGRAM_SAMPLE:
+                self.sample[slot] = value
+        try:
+            if self.sorted and self._last is not None and value < self._last:
+                self.sorted = False
+            self._last = value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+        except TypeError:
+            # Values of an untyped column that do not compare with each other: no MIN/MAX
+            self.ordered = self.sorted = False
+            self.min = self.max = None
+            self.sample = []
+
+    def histogram(self) -> Optional[List[Any]]:
+        """HISTOGRAM_BUCKETS + 1 bounds, bucket i holds the values from bounds[i] to bounds[i + 1]."""
+        if not self.ordered or not self.sample:
+            return None
+        values = sorted(self.sample)
+        if any(value != value for value in values):
+            # NaN does not order, the bounds would be meaningless
+            return None
+        last = len(values) - 1
+        bounds = [values[last * i // HISTOGRAM_BUCKETS] for i in range(HISTOGRAM_BUCKETS)]
+        # The sample may miss the extremes, which MIN/MAX have exactly
+        return [self.min] + bounds[1:] + [self.max]
+
+
+class TableStatistics:
+    """Statistics of one table, see the module docstring."""
+
+    def __init__(self, header: dict, column_types: dict[str, str]):
+        self.row_count: int = header["row_count"]
+        self.columns: dict[str, dict] = {}
+        for name, stats in header["columns"].items():
+            stats = dict(stats)
+            if column_kind(column_types.get(name, "")) == "date":
+                stats["min"], stats["max"] = _date(stats["min"]), _date(stats["max"])
+                if stats["histogram"] is not None:
+                    stats["histogram"] = [_date(bound) for bound in stats["histogram"]]
+            self.columns[name] = stats
+
+    @classmethod
+    def open(cls, schema: str, table: str, metadata: dict[str, str]) -> Optional['TableStatistics']:
+        """The statistics of a table if they exist and are fresh, otherwise None, loaded once per version of the files."""
+        return _CACHE.load((statistics_path(schema, table), tuple(metadata.items())),
+                           [statistics_path(schema, table), csv_path(schema, table)],
+                           lambda: cls._load(schema, table, metadata))
+
+    @classmethod
+    def _load(cls, schema: str, table: str, metadata: dict[str, str]) -> Optional['TableStatistics']:
+        try:
+            with open(statistics_path(schema, table), "r", encoding="utf-8") as f:
+                header = json.load(f)
+            size, mtime_ns = _csv_signature(csv_path(schema, table))
+        except (OSError, ValueError):
+            return None
+        if header.get("version") != FORMAT_VERSION \
+                or header.get("csv_size") != size or header.get("csv_mtime_ns") != mtime_ns \
+                or header.get("column_types") != list(metadata.values()):
+            return None
+        return cls(header, metadata)
+
+    def aggregate_row(self, aggregates: List[dict]) -> Optional[List[Any]]:
+        """
+        The result row of aggregates without GROUP BY over the whole table, or None when they cannot
+        be answered from the statistics.
+        """
+        columns = [agg['column'] for agg in aggregates if agg['column'] != '*']
+        if any(col not in self.columns for col in columns):
+            return None
+        # A scan decoding these columns stops at the first bad cell of any of them, the statistics
+        # of each column only cover the rows before its own first bad cell
+        rows = {self.columns[col]["rows"] for col in columns}
+        if len(rows) > 1:
+            return None
+        readable = rows.pop() if rows else self.row_count
+        row = []
+        for agg in aggregates:
+            function, column = agg['function'], agg['column']
+            if function == "COUNT":
+                row.append(readable if column == '*' else readable - self.columns[column]["null_count"])
+            elif function in ("MIN", "MAX") and self.columns[column]["ordered"]:
+                row.append(self.columns[column]["min" if function == "MIN" else "max"])
+            else:
+                return None
+        return row
+
+    def is_sorted(self, column: str) -> bool:
+        """Whether the rows a scan returns are in ascending order of `column`, without NULLs."""
+        stats = self.columns.get(column)
+        return stats is not None and stats["sorted"]
+
+    def selectivity(self, column: str, op: str, value: Any) -> Optional[float]:
+        """
+        Estimated fraction of the rows for which ``column <op> value`` holds, None when the statistics
+        say nothing about it (no such column, or a value that does not compare with the column's).
+        ``=`` assumes the distinct values are equally frequent, ranges interpolate in the histogram.
+        """
+        stats = self.columns.get(column)
+        if stats is None or not stats["rows"]:
+            return None
+        values = (stats["rows"] - stats["null_count"]) / stats["rows"]
+        distinct = max(1, stats["distinct_count"])
+        try:
+            if op in ("=", "=="):
+                if stats["ordered"] and stats["min"] is not None and not stats["min"] <= value <= stats["max"]:
+                    return 0.0
+                return values / distinct
+            if op in ("!=", "<>"):
+                # NULL != value holds as the compiled predicate evaluates it
+                return 1 - values / distinct
+            if stats["histogram"] is None:
+                return None
+            below = _fraction_below(stats["histogram"], value)
+            if op in ("<=", ">"):
+                # The values equal to `value` are below for <=, not above for >
+                below = min(1.0, below + 1 / distinct)
+            return values * (below if op in ("<", "<=") else 1 - below)
+        except TypeError:
+            return None
+
+    def analyze_rows(self, metadata: dict[str, str]) -> List[List[Any]]:
+        """Rows of the ANALYZE result, see ANALYZE_COLUMNS."""
+        rows = []
+        for name, dtype in metadata.items():
+            stats = self.columns[name]
+            rows.append([name, dtype, stats["rows"], stats["null_count"], stats["distinct_count"],
+                         _text(stats["min"]), _text(stats["max"])])
+        return rows
+
+
+def analyze_table(schema: str, table: str, metadata: dict[str, str]) -> TableStatistics:
+    """Scan a table, (re)write its statistics file and return the statistics."""
+    columns = list(metadata.keys())
+    column_types = list(metadata.values())
+    decoders = DBTypeObject.build_decoders(column_types)
+    source = csv_path(schema, table)
+    size, mtime_ns = _csv_signature(source)
+    collectors = [_ColumnCollector() for _ in columns]
+    # Collectors of the columns that have not hit a bad cell yet
+    live = list(zip(collectors, decoders, range(len(columns))))
+    row_count = 0
+
+    with open(source, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if [col.lower() for col in header] != [col.lower() for col in columns]:
+            raise ValueError(f"The CSV header of {schema}/{table} does not match its metadata")
+        while True:
+            try:
+                raw = next(reader, None)
+            except csv.Error:
+                break
+            if raw is None or len(raw) != len(columns):
+                break
+            for entry in list(live):
+                collector, decode, i = entry
+                try:
+                    value = decode(raw[i])
+                except (ValueError, OverflowError, TypeError):
+                    live.remove(entry)
+                    continue
+                collector.add(value)
+            row_count += 1
+
+    header = {
+        "version": FORMAT_VERSION,
+        "csv_size": size,
+        "csv_mtime_ns": mtime_ns,
+        "column_types": column_types,
+        "row_count": row_count,
+        "columns": {
+            name: {
+                "rows": collector.rows,
+                "null_count": collector.null_count,
+                "distinct_count": collector.sketch.estimate(),
+                "min": _json_value(collector.min),
+                "max": _json_value(collector.max),
+                "ordered": collector.ordered,
+                "sorted": collector.sorted,
+                "histogram": _json_histogram(collector.histogram()),
+            } for name, collector in zip(columns, collectors)
+        },
+    }
+    final_path = statistics_path(schema, table)
+    tmp_path = f"{final_path}.tmp-{uuid.uuid4().hex}"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        os.replace(tmp_path, final_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return TableStatistics(header, metadata)
+
+
+def estimate_rows(schema: str, table: str, metadata: dict[str, str]) -> int:
+    """Rows of a table: exact from fresh statistics, otherwise the CSV size over the length of its first rows."""
+    statistics = TableStatistics.open(schema, table, metadata)
+    if statistics is not None:
+        return statistics.row_count
+    return _CACHE.load(csv_path(schema, table), [csv_path(schema, table)],
+                       lambda: _sample_rows(schema, table))
+
+
+def _sample_rows(schema: str, table: str) -> int:
+    try:
+        with open(csv_path(schema, table), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            sample = f.read(ROW_SAMPLE_BYTES)
+    except OSError:
+        return 0
+    lines = sample.count(b"\n")
+    if len(sample) >= size:
+        # The whole file, one line per row after the header
+        return max(0, lines - 1 if sample.endswith(b"\n") else lines)
+    return max(1, round(size * lines / len(sample)) - 1)
+
+
+def _fraction_below(bounds: List[Any], value: Any) -> float:
+    """Fraction of the values of an equi-depth histogram below `value`, linear within a numeric or date bucket."""
+    if value <= bounds[0]:
+        return 0.0
+    if value > bounds[-1]:
+        return 1.0
+    buckets = len(bounds) - 1
+    bucket = min(bisect_right(bounds, value) - 1, buckets - 1)
+    low, high = bounds[bucket], bounds[bucket + 1]
+    if isinstance(low, datetime.date):
+        low, high, value = low.toordinal(), high.toordinal(), value.toordinal()
+    if isinstance(low, (int, float)) and not isinstance(low, bool) and high > low:
+        within = (value - low) / (high - low)
+    else:
+        within = 0.5
+    return min(1.0, (bucket + within) / buckets)
+
+
+def _json_histogram(bounds: Optional[List[Any]]) -> Optional[List[Any]]:
+    return [_json_value(bound) for bound in bounds] if bounds is not None else None
+
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime.date) else value
+
+
+def _date(value: Optional[str]) -> Optional[datetime.date]:
+    return datetime.date.fromisoformat(value) if value is not None else None
+
+
+def _text(value: Any) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+if __name__ == "__main__":
+    from app.core.storage_layer.metadata import Metadata
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.core.storage_layer.statistics <schema> [<table> ...]")
+        sys.exit(1)
+
+    schema_metadata = Metadata(sys.argv[1])
+    for table_name in sys.argv[2:] or list(schema_metadata.data.keys()):
+        try:
+            statistics = analyze_table(schema_metadata.name, table_name, schema_metadata.get_table(table_name))
+        except ValueError as e:
+            print(f"Skipped {schema_metadata.name}/{table_name}: {e}")
+            continue
+        print(f"Analyzed {schema_metadata.name}/{table_name}: {statistics.row_count} rows")
@@ -1,11 +1,26 @@
 from typing import List, Any, Callable
 import datetime
 
+from app.core import config
+from app.core.parser.parser import Parameter, conjunction
 from app.core.storage_layer.logical_plan.logical_plan import LogicalPlan
 from app.core.storage_layer.logical_plan.scan import Scan
 from app.core.storage_layer.logical_plan.filter import Filter
 from app.core.storage_layer.logical_plan.project import Project
+from app.core.storage_layer.logical_plan.limit import Limit
+from app.core.storage_layer.logical_plan.sort import Sort
+from app.core.storage_layer.logical_plan.top_n import TopN
+from app.core.storage_layer.logical_plan.hash_aggregate import HashAggregate
+from app.core.storage_layer.logical_plan.statistics_aggregate import StatisticsAggregate
+from app.core.storage_layer.logical_plan.analyze import Analyze
+from app.core.storage_layer.logical_plan.create_index import CreateIndex
+from app.core.storage_layer.logical_plan.join import Join
+from app.core.storage_layer.logical_plan.distinct import Distinct
+from app.core.storage_layer.logical_plan.explain import Explain
 from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.optimizer import reorder_condition
+from app.core.storage_layer.predicate import compile_predicate, is_quoted, referenced_columns
+from app.core.storage_layer.statistics import TableStatistics
 OPERATORS = {
     "=": lambda x, y: x == y,
     "==": lambda x, y: x == y,
@@ -17,26 +32,261 @@ OPERATORS = {
     ">=": lambda x, y: x >= y,
 }
 
+# Aggregates of a whole table that the ANALYZE statistics answer
+STATISTICS_FUNCTIONS = ("COUNT", "MIN", "MAX")
+
 
 def sql_to_logical_plan(parsed_query: dict, metadata: Metadata) -> LogicalPlan:
+    if parsed_query['type'].upper() == 'EXPLAIN':
+        return Explain(sql_to_logical_plan(parsed_query['query'], metadata), parsed_query['analyze'])
     schema = metadata.name
     table_metadata = metadata.get_table(parsed_query['table'])
 
+    if parsed_query['type'].upper() == 'ANALYZE':
+        return Analyze(schema, parsed_query['table'], table_metadata)
+    if parsed_query['type'].upper() == 'CREATE_INDEX':
+        return CreateIndex(metadata, parsed_query['table'], parsed_query['column'], parsed_query['name'])
     if parsed_query['type'].upper() != 'SELECT':
         raise ValueError(f"Unsupported query type: {parsed_query['type']}")
-    
-    plan = Scan(schema, parsed_query['table'], table_metadata)
-    
-    if parsed_query['where'] is not None:
-        predicate = build_predicate(parsed_query['where'])
+
+    joins = parsed_query.get('joins', [])
+    # Column references become the scan's column names, or alias.column over a join
+    parsed_query = resolve_column_names(parsed_query, metadata)
+
+    # The scan decodes predicate columns for every row and projection-only columns after the filter
+    predicate_columns = referenced_columns(parsed_query['where'])
+    order_by = parsed_query.get('order_by', [])
+    group_by, aggregates = parsed_query.get('group_by', []), parsed_query.get('aggregates', [])
+    distinct = parsed_query.get('distinct', False)
+    is_aggregate = bool(group_by or aggregates)
+    required_columns = None
+    if is_aggregate:
+        if parsed_query['columns'] == ['*']:
+            raise ValueError("SELECT * cannot be combined with GROUP BY")
+        aggregate_names = [aggregate['name'] for aggregate in aggregates]
+        ungrouped = [col for col in parsed_query['columns'] if col not in aggregate_names and col not in group_by]
+        if ungrouped:
+            raise ValueError(f"Columns {ungrouped} must appear in the GROUP BY clause or be used in an aggregate function")
+        # The scan only reads the grouping columns and the aggregate arguments
+        argument_columns = [aggregate['column'] for aggregate in aggregates if aggregate['column'] != '*']
+        required_columns = list(dict.fromkeys(group_by + argument_columns + predicate_columns))
+    elif parsed_query['columns'] != ['*']:
+        order_columns = [item['column'] for item in order_by]
+        required_columns = list(dict.fromkeys(parsed_query['columns'] + predicate_columns + order_columns))
+    limit, offset = parsed_query.get('limit'), parsed_query.get('offset', 0)
+    batch_size = 1000
+    if limit is not None and parsed_query['where'] is None and not order_by and not is_aggregate and not joins \
+            and not distinct:
+        # Every scanned row is a result row, do not read (and decode) a full batch for a small LIMIT
+        batch_size = max(1, min(batch_size, limit + offset))
+    if joins:
+        # WHERE conditions on one table are filtered below the joins, the rest after them
+        plan, where = join_plan(parsed_query, metadata, required_columns)
+    else:
+        where = parsed_query['where']
+        if where is not None:
+            # The cheapest and most selective conditions are evaluated first
+            statistics = TableStatistics.open(schema, parsed_query['table'], table_metadata)
+            where = reorder_condition(where, statistics, table_metadata)
+        plan = Scan(schema, parsed_query['table'], table_metadata, batch_size=batch_size,
+                    required_columns=required_columns, predicate_columns=predicate_columns,
+                    indexes=list(metadata.get_indexes(parsed_query['table']).values()), condition=where)
+
+    if where is not None:
+        # Compiled against the scan's columns, so an unknown column fails here rather than at the first row
+        predicate = compile_predicate(where, plan.columns)
         plan = Filter(plan, predicate)
+
+    if is_aggregate:
+        # Streams the filtered rows into a hash table of groups, later operators see one row per group
+        plan = HashAggregate(plan, group_by, aggregates)
+        if not group_by and parsed_query['where'] is None and not joins \
+                and all(aggregate['function'] in STATISTICS_FUNCTIONS for aggregate in aggregates):
+            # Whole-table COUNT/MIN/MAX come from the ANALYZE statistics while they are fresh
+            plan = StatisticsAggregate(plan)
     
+    if order_by and limit is not None and limit + offset <= config.TOP_N_MAX_ROWS and not distinct:
+        # ORDER BY ... LIMIT keeps only the rows it returns (and skips) in a bounded heap, which
+        # may be fewer than it needs once DISTINCT drops duplicates
+        plan = TopN(plan, order_by, limit + offset)
+    elif order_by:
+        # Sorted before the projection, ORDER BY may name columns the SELECT list leaves out
+        plan = Sort(plan, order_by)
+
     plan = Project(plan, parsed_query['columns'])
+
+    if distinct:
+        # Streams the first occurrence of every projected row, a LIMIT above it stops the scan early
+        plan = Distinct(plan)
+
+    if limit is not None:
+        plan = Limit(plan, limit, offset)
     
     return plan
 
 
 
+def table_aliases(parsed_query: dict) -> List[tuple[str, str]]:
+    """(alias, table) of the FROM table and the joined tables, a table without AS is its own alias."""
+    tables = [parsed_query] + parsed_query.get('joins', [])
+    aliases = [((ref.get('alias') or ref['table']).lower(), ref['table']) for ref in tables]
+    duplicates = sorted({alias for alias, _ in aliases if [a for a, _ in aliases].count(alias) > 1})
+    if duplicates:
+        raise ValueError(f"Table names {duplicates} appear more than once, give them different aliases with AS")
+    return aliases
+
+
+def resolve_column_names(parsed_query: dict, metadata: Metadata) -> dict:
+    """
+    Copy of a SELECT with its column references resolved. Without joins a ``table.column`` reference
+    becomes ``column`` (unknown columns are left for the operators to report). With joins every
+    reference becomes ``alias.column``, a bare name must belong to exactly one of the tables.
+    """
+    aliases = table_aliases(parsed_query)
+    if not parsed_query.get('joins'):
+        prefix = aliases[0][0] + "."
+
+        def resolve(name: str) -> str:
+            return name[len(prefix):] if name.lower().startswith(prefix) else name
+    else:
+        table_columns = [(alias, metadata.get_table(table)) for alias, table in aliases]
+
+        def resolve(name: str) -> str:
+            qualifier, _, column = name.rpartition(".")
+            matches = [alias for alias, columns in table_columns
+                       if (not qualifier or alias == qualifier.lower()) and column in columns]
+            if not matches:
+                raise ValueError(f"Column '{name}' not found in tables {[alias for alias, _ in aliases]}")
+            if len(matches) > 1:
+                raise ValueError(f"Column '{name}' is ambiguous, qualify it with one of {matches}")
+            return f"{matches[0]}.{column}"
+
+    aggregate_names = {aggregate['name'] for aggregate in parsed_query.get('aggregates', [])}
+    return {
+        **parsed_query,
+        'columns': [col if col == '*' or col in aggregate_names else resolve(col) for col in parsed_query['columns']],
+        'where': rename_columns(parsed_query['where'], resolve),
+        'joins': [{**join, 'on': rename_columns(join['on'], resolve)} for join in parsed_query.get('joins', [])],
+        'group_by': [resolve(col) for col in parsed_query.get('group_by', [])],
+        'aggregates': [aggregate if aggregate['column'] == '*' else {**aggregate, 'column': resolve(aggregate['column'])}
+                       for aggregate in parsed_query.get('aggregates', [])],
+        'order_by': [item if 'aggregate' in item else {**item, 'column': resolve(item['column'])}
+                     for item in parsed_query.get('order_by', [])],
+    }
+
+
+def join_plan(parsed_query: dict, metadata: Metadata, required_columns: List[str] | None) -> tuple[LogicalPlan, dict | None]:
+    """
+    Left-deep joins of the tables of a SELECT whose columns are resolved to alias.column, and the part
+    of the WHERE clause left to filter the joined rows.
+
+    Equalities of ON between a column of the joined table and one of the tables before it are join keys,
+    other ON conditions behave as WHERE conditions. A condition on the columns of one table without
+    placeholders filters that table's scan (placeholder values are bound for the whole statement).
+    """
+    aliases = table_aliases(parsed_query)
+    key_pairs: List[List[tuple[str, str]]] = []
+    conditions = split_conjuncts(parsed_query['where'])
+    for n, join in enumerate(parsed_query['joins'], start=1):
+        alias, earlier = aliases[n][0], {alias for alias, _ in aliases[:n]}
+        pairs = []
+        for condition in split_conjuncts(join['on']):
+            sides = [condition.get('left_operand'), condition.get('right_operand')]
+            if condition.get('op') in ('=', '==') and all(_is_column(side) for side in sides):
+                owners = [side.split(".")[0] for side in sides]
+                if owners[1] == alias and owners[0] in earlier:
+                    pairs.append((sides[0], sides[1]))
+                    continue
+                if owners[0] == alias and owners[1] in earlier:
+                    pairs.append((sides[1], sides[0]))
+                    continue
+            conditions.append(condition)
+        if not pairs:
+            raise ValueError(f"JOIN {join['table']} needs an ON equality between its columns and a table before it")
+        key_pairs.append(pairs)
+
+    pushed: dict[str, List[dict]] = {alias: [] for alias, _ in aliases}
+    residual = []
+    for condition in conditions:
+        owners = {col.split(".")[0] for col in referenced_columns(condition)}
+        if len(owners) == 1 and not _has_parameters(condition):
+            pushed[owners.pop()].append(condition)
+        else:
+            residual.append(condition)
+
+    # Read by the joins and the filters, whatever the SELECT list needs
+    join_columns = [col for pairs in key_pairs for pair in pairs for col in pair] + \
+        [col for condition in conditions for col in referenced_columns(condition)]
+
+    def table_input(alias: str, table: str) -> tuple[LogicalPlan, List[str]]:
+        prefix = alias + "."
+
+        def unqualify(name: str) -> str:
+            return name[len(prefix):]
+        table_metadata = metadata.get_table(table)
+        where = rename_columns(conjunction(pushed[alias]), unqualify)
+        if where is not None:
+            where = reorder_condition(where, TableStatistics.open(metadata.name, table, table_metadata), table_metadata)
+        predicate_columns = referenced_columns(where)
+        required = None
+        if required_columns is not None:
+            required = list(dict.fromkeys(unqualify(col) for col in required_columns + join_columns
+                                          if col.startswith(prefix)))
+        plan = Scan(metadata.name, table, table_metadata,
+                    required_columns=required, predicate_columns=predicate_columns,
+                    indexes=list(metadata.get_indexes(table).values()), condition=where)
+        if where is not None:
+            plan = Filter(plan, compile_predicate(where, plan.columns))
+        return plan, [prefix + col for col in plan.columns]
+
+    plan, columns = table_input(*aliases[0])
+    for (alias, table), pairs in zip(aliases[1:], key_pairs):
+        right, right_columns = table_input(alias, table)
+        plan = Join(plan, right, columns, right_columns, pairs)
+        columns = columns + right_columns
+    return plan, conjunction(residual)
+
+
+def split_conjuncts(condition: dict | None) -> List[dict]:
+    """The conditions AND-ed together at the top of `condition`."""
+    if condition is None:
+        return []
+    if condition.get('op', '').upper() == 'AND':
+        return split_conjuncts(condition['left']) + split_conjuncts(condition['right'])
+    return [condition]
+
+
+def rename_columns(condition: dict | None, rename: Callable[[str], str]) -> dict | None:
+    """Copy of a WHERE condition with every column operand passed through `rename`."""
+    if condition is None:
+        return None
+    if condition.get('op', '').upper() in ('AND', 'OR'):
+        return {**condition, 'left': rename_columns(condition['left'], rename),
+                'right': rename_columns(condition['right'], rename)}
+    result = dict(condition)
+    for key in ('left_operand', 'right_operand'):
+        if _is_column(condition.get(key)):
+            result[key] = rename(condition[key])
+    return result
+
+
+def _is_column(operand: Any) -> bool:
+    return isinstance(operand, str) and not is_quoted(operand)
+
+
+def _has_parameters(condition: dict) -> bool:
+    if condition.get('op', '').upper() in ('AND', 'OR'):
+        return _has_parameters(condition['left']) or _has_parameters(condition['right'])
+    return any(isinstance(condition.get(key), Parameter) for key in ('left_operand', 'right_operand'))
+
+
+def referenced_tables(parsed_query: dict) -> List[str]:
+    """Tables whose CSV files a statement reads."""
+    if parsed_query['type'] == 'explain':
+        return referenced_tables(parsed_query['query'])
+    tables = [parsed_query['table']] + [join['table'] for join in parsed_query.get('joins', [])]
+    return list(dict.fromkeys(table.lower() for table in tables))
+
 def build_predicate(condition: dict) -> Callable[[List[Any], List[str]], bool]:
     if 'op' in condition:
         if condition['op'].upper() in ('AND', 'OR'):
@@ -63,8 +313,7 @@ def build_predicate(condition: dict) -> Callable[[List[Any], List[str]], bool]:
 def build_expression(operand: Any) -> Callable[[List[Any], List[str]], Any]:
     # operand can be a column name, a literal value, or None
     if isinstance(operand, str):
-        if (operand.startswith("'") and operand.endswith("'")) or \
-           (operand.startswith('"') and operand.endswith('"')):
+        if is_quoted(operand):
             literal = operand[1:-1]
             try:
                 literal = datetime.datetime.strptime(literal, "%Y-%m-%d").date()
@@ -0,0 +1,107 @@
+"""
+NumPy helpers of the columnar executor: typed column arrays and WHERE conditions evaluated as boolean masks.
+
+NumPy is optional. Without it ``np`` is None and the planner keeps every query on the iterator engine.
+"""
+import datetime
+from typing import Any, Callable, List
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from app.core.storage_layer.columnar import ColumnReader, column_kind
+from app.core.storage_layer.predicate import COMPARISON_OPERATORS, is_quoted, parse_literal, resolve_column
+
+# Column kinds (see columnar.column_kind) that have a NumPy representation
+NUMERIC_KINDS = ("int", "float", "bool", "date")
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+class UnsupportedExpression(Exception):
+    """The condition needs Python semantics the masks do not reproduce, use the iterator engine."""
+    pass
+
+
+def numeric_kinds(column_types: List[str]) -> List[str | None]:
+    kinds = [column_kind(dtype) for dtype in column_types]
+    return [kind if kind in NUMERIC_KINDS else None for kind in kinds]
+
+
+def compile_mask(condition: dict, columns: List[str], kinds: List[str | None]) -> Callable[[dict], Any]:
+    """
+    Compile a WHERE condition into a function of ``{column index: array}`` that returns a boolean mask,
+    or a plain bool when the condition folds to a constant. Raises UnsupportedExpression for operators,
+    column types or literal types that would not compare exactly like Python values do.
+    """
+    op = condition.get('op', '').upper()
+    if op in ('AND', 'OR'):
+        left = compile_mask(condition['left'], columns, kinds)
+        right = compile_mask(condition['right'], columns, kinds)
+        combine = np.logical_and if op == 'AND' else np.logical_or
+        return lambda arrays: combine(left(arrays), right(arrays))
+
+    if condition.get('op') not in COMPARISON_OPERATORS:
+        raise UnsupportedExpression(f"Operator {condition.get('op')} is not vectorized")
+    op_func = COMPARISON_OPERATORS[condition['op']][1]
+    left_kind, left = _compile_operand(condition['left_operand'], columns, kinds)
+    right_kind, right = _compile_operand(condition['right_operand'], columns, kinds)
+
+    # Dates only compare with dates; int, float and bool compare with each other like Python numbers
+    if (left_kind == "date") != (right_kind == "date"):
+        raise UnsupportedExpression("Dates can only be compared with dates")
+    if callable(left) and callable(right):
+        return lambda arrays: op_func(left(arrays), right(arrays))
+    if callable(left):
+        return lambda arrays: op_func(left(arrays), right)
+    if callable(right):
+        return lambda arrays: op_func(left, right(arrays))
+    value = bool(op_func(left, right))
+    return lambda arrays: value
+
+
+def _compile_operand(operand: Any, columns: List[str], kinds: List[str | None]) -> tuple[str, Any]:
+    """Returns (kind, array getter) for a column and (kind, value) for a literal."""
+    if isinstance(operand, str) and not is_quoted(operand):
+        index = resolve_column(operand, columns)
+        if kinds[index] is None:
+            raise UnsupportedExpression(f"Column {operand} has no NumPy representation")
+        return kinds[index], lambda arrays: arrays[index]
+    if isinstance(operand, str):
+        value = parse_literal(operand[1:-1])
+        if not isinstance(value, datetime.date):
+            raise UnsupportedExpression("String literals are not vectorized")
+        return "date", np.datetime64(value, "D")
+    if isinstance(operand, bool) or not isinstance(operand, (int, float)):
+        raise UnsupportedExpression(f"Literal {operand!r} is not vectorized")
+    return "float" if isinstance(operand, float) else "int", operand
+
+
+# NumPy dtype of each column kind
+DTYPES = {
+    "int": "int64",
+    "float": "float64",
+    "bool": "bool",
+    "date": "datetime64[D]",
+}
+
+
+def parse_column(values: List[str], decode: Callable[[str], Any], kind: str):
+    """
+    Convert the raw CSV cells of one column with the column's own decoder, so cells are accepted or
+    rejected exactly as in the iterator engine. Raises ValueError (or OverflowError for integers that
+    do not fit in int64); the caller then filters that chunk row by row.
+    """
+    return np.fromiter(map(decode, values), dtype=DTYPES[kind], count=len(values))
+
+
+def sidecar_column(reader: ColumnReader, start: int, stop: int):
+    """Typed array of a sidecar column row range. Copied, so no view into the mapped file outlives the scan."""
+    values = np.array(reader.view(start, stop))
+    if reader.kind == "bool":
+        return values != 0
+    elif reader.kind == "date":
+        return (values.astype(np.int64) - _EPOCH_ORDINAL).astype("datetime64[D]")
+    return values
@@ -1,4 +1,25 @@
+from typing import Annotated, Optional
+
 from app.security.auth import auth_manager
-from fastapi import Depends
+from fastapi import Depends, Header, HTTPException
 
 current_user_dependency = Depends(auth_manager.get_current_user)
+
+
+def cursor_owner(authorization: Annotated[str | None, Header()] = None) -> Optional[str]:
+    """
+    User the cursors a request opens count against: the one of its bearer token, or None for a
+    request without one, whose cursors are bounded by the total limit only.
+    """
+    if authorization is None:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=403, detail="Token verification failed")
+    user = auth_manager.get_current_user(token)
+    if user is None:
+        raise HTTPException(status_code=403, detail="Token verification failed")
+    return user.username
+
+
+cursor_owner_dependency = Depends(cursor_owner)
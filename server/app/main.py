@@ -1,15 +1,28 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 from app.api.routes import auth, query, websocket
+from app.core import config
 from app.security.auth import auth_manager
 
 
+async def sweep_cursors() -> None:
+    """Close the expired cursors of clients that went away without closing them."""
+    while True:
+        await asyncio.sleep(config.CURSOR_SWEEP_SECONDS)
+        query.QUERY_CURSORS.sweep()
+
+
 @asynccontextmanager
 async def life_span(app: FastAPI):
     auth_manager.read_accounts_json()
+    sweeper = asyncio.create_task(sweep_cursors())
     yield
+    sweeper.cancel()
+    if query.PREFETCH_WORKERS is not None:
+        query.PREFETCH_WORKERS.shutdown(wait=False, cancel_futures=True)
 
 
 app = FastAPI(lifespan=life_span)
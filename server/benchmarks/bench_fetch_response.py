@@ -0,0 +1,87 @@
+"""
+Benchmark: the fetch response pipeline, from the rows of a cursor to the rows in the client.
+
+Serves the same rows (an INT, two FLOAT, a VARCHAR and a DATE column) through a FastAPI app in
+three ways and times the server side (building the response body) and the client side (turning
+the body back into rows) of each:
+
+    pydantic   the FetchResponse model, validated and serialized by FastAPI, parsed into the
+               client's FetchResponse model
+    fast json  json_fetch_response bytes, parsed by pydantic-core with no validation of the rows
+    columnar   the binary columnar encoding, decoded into rows
+
+Run from the server folder:  python -m benchmarks.bench_fetch_response [rows ...]
+"""
+import datetime
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client"))
+
+from app.api.schemas.response import FetchResponse
+from app.api.wire_format import MEDIA_TYPE, column_kinds, encode_frame, json_fetch_response
+from dbcsv.schemas.response import FetchResponse as ClientFetchResponse
+from dbcsv.utils import _fetch_response
+from dbcsv.wire_format import decode_frame
+
+COLUMNS = {"id": "INT", "score": "FLOAT", "ratio": "FLOAT", "name": "VARCHAR", "joined": "DATE"}
+
+
+def generate_rows(count: int) -> list:
+    rng = random.Random(42)
+    start = datetime.date(2020, 1, 1)
+    return [[i, rng.uniform(0, 100), rng.random(), f"name{i}", start + datetime.timedelta(days=i % 2000)]
+            for i in range(count)]
+
+
+def build_app(rows: list) -> FastAPI:
+    app = FastAPI()
+    kinds = column_kinds(list(COLUMNS.values()))
+
+    @app.get("/pydantic")
+    def pydantic_response() -> FetchResponse:
+        return FetchResponse(data=rows, position=len(rows))
+
+    @app.get("/fast_json")
+    def fast_json_response():
+        return Response(content=json_fetch_response(rows, len(rows)), media_type="application/json")
+
+    @app.get("/columnar")
+    def columnar_response():
+        return Response(content=encode_frame(rows, list(COLUMNS), kinds, len(rows)), media_type=MEDIA_TYPE)
+
+    return app
+
+
+def measure(client: TestClient, path: str, decode) -> tuple:
+    start = time.perf_counter()
+    response = client.get(path)
+    served = time.perf_counter()
+    rows = decode(response.content)
+    decoded = time.perf_counter()
+    return served - start, decoded - served, len(response.content), rows
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for count in counts:
+        rows = generate_rows(count)
+        client = TestClient(build_app(rows))
+        print(f"{count:,} rows")
+        results = {}
+        for label, path, decode in [
+            ("pydantic", "/pydantic", lambda body: ClientFetchResponse(**json.loads(body)).data),
+            ("fast json", "/fast_json", lambda body: _fetch_response(body).data),
+            ("columnar", "/columnar", lambda body: decode_frame(body).rows()),
+        ]:
+            server, client_side, size, results[label] = measure(client, path, decode)
+            print(f"  {label:<10} server {server:>7.3f}s  client {client_side:>7.3f}s  "
+                  f"total {server + client_side:>7.3f}s  {size / 1024 / 1024:>7.1f} MiB")
+        assert results["pydantic"] == results["fast json"]
+        assert [row[:4] for row in results["columnar"]] == [row[:4] for row in results["fast json"]]
@@ -0,0 +1,49 @@
+"""
+Micro-benchmark: WHERE evaluation with the build_predicate closures vs the compiled predicate.
+
+Run from the server folder:  python -m benchmarks.bench_predicate [rows]
+"""
+import random
+import sys
+import time
+
+from app.core.storage_layer.predicate import compile_predicate
+from app.core.storage_layer.utils import build_predicate
+
+COLUMNS = ["id", "name", "age", "department", "salary"]
+
+# WHERE (age > 30 AND salary >= 60000) OR department = 'Engineering'
+CONDITION = {
+    'op': 'OR',
+    'left': {
+        'op': 'AND',
+        'left': {'left_operand': 'age', 'op': '>', 'right_operand': 30},
+        'right': {'left_operand': 'salary', 'op': '>=', 'right_operand': 60000},
+    },
+    'right': {'left_operand': 'department', 'op': '=', 'right_operand': "'Engineering'"},
+}
+
+
+def generate_rows(count: int) -> list[list]:
+    rng = random.Random(42)
+    departments = ["Engineering", "Marketing", "Sales", "Finance"]
+    return [[i, f"name{i}", rng.randint(18, 65), rng.choice(departments), rng.randint(30000, 120000)]
+            for i in range(count)]
+
+
+def measure(label: str, predicate, rows: list[list]) -> int:
+    start = time.perf_counter()
+    matched = sum(1 for row in rows if predicate(row, COLUMNS))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(rows) / elapsed:>14,.0f} rows/s  ({elapsed:.3f}s, {matched} matched)")
+    return matched
+
+
+if __name__ == "__main__":
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = generate_rows(row_count)
+    compiled = compile_predicate(CONDITION, COLUMNS)
+
+    baseline = measure("build_predicate", build_predicate(CONDITION), rows)
+    assert measure("compile_predicate", compiled, rows) == baseline
+    assert measure("compiled .function", compiled.function, rows) == baseline
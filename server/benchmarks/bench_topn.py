@@ -0,0 +1,69 @@
+"""
+Benchmark: ORDER BY ... LIMIT with the bounded-heap TopN operator vs a full Sort followed by Limit.
+
+Generates a CSV table in a temporary data directory, then runs the same query with both plans and
+reports the time of a run and the peak traced memory of another.
+
+Run from the server folder:  python -m benchmarks.bench_topn [rows] [limit]
+"""
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from lark import Lark
+
+from app.core import config
+from app.core.parser.parser import SQLTransformer, grammar
+from app.core.storage_layer import columnar, metadata, row_index
+from app.core.storage_layer.iterator import table_iterator
+from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.query_executor import QueryExecutor
+
+COLUMNS = {"id": "INT", "name": "VARCHAR", "department": "VARCHAR", "salary": "INT"}
+
+
+def generate_table(data_dir: Path, count: int) -> None:
+    rng = random.Random(42)
+    departments = ["Engineering", "Marketing", "Sales", "Finance"]
+    schema_dir = data_dir / "bench"
+    schema_dir.mkdir()
+    with open(schema_dir / "employees.csv", "w", encoding="utf-8") as f:
+        f.write(",".join(COLUMNS) + "\n")
+        for i in range(count):
+            f.write(f"{i},name{i},{rng.choice(departments)},{rng.randint(30000, 500000)}\n")
+    columns = "".join(f"      - column_name: {name}\n        column_type: {dtype}\n" for name, dtype in COLUMNS.items())
+    (schema_dir / "metadata.yaml").write_text(f"tables:\n  - table_name: employees\n    columns:\n{columns}")
+    for module in (columnar, metadata, row_index, table_iterator):
+        module.DB_DIR = str(data_dir)
+
+
+def measure(label: str, sql: str, parser: Lark) -> list:
+    plan = QueryExecutor.plan(QueryExecutor.parse_sql(sql, parser), Metadata("bench"))
+    start = time.perf_counter()
+    rows = plan.execute().fetch_all()
+    elapsed = time.perf_counter() - start
+    # Second run under tracemalloc, which slows allocation down too much to time the first
+    tracemalloc.start()
+    plan.execute().fetch_all()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12} {elapsed:>8.3f}s  peak {peak / 1024 / 1024:>8.1f} MiB  plan {type(plan.child.child).__name__}")
+    return rows
+
+
+if __name__ == "__main__":
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    parser = Lark(grammar, parser='lalr', transformer=SQLTransformer(), start='start')
+    sql = f"SELECT id, name, salary FROM employees ORDER BY salary DESC LIMIT {limit}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_table(Path(tmp), row_count)
+        print(f"{row_count:,} rows, {sql}")
+        top_n = measure("TopN", sql, parser)
+        config.TOP_N_MAX_ROWS = 0
+        full_sort = measure("Sort+Limit", sql, parser)
+        assert top_n == full_sort
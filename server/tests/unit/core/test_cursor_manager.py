@@ -0,0 +1,155 @@
+import pytest
+
+from app.core.cursor_manager import CursorLimitError, CursorManager
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.iterator.recording_iterator import RecordingIterator
+
+ROWS = [[i, f"name {i}"] for i in range(100)]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TrackedIterator(MaterializedIterator):
+    def __init__(self, rows=ROWS):
+        super().__init__(rows, batch_size=10)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+def manager(clock=None, capacity=10, per_owner=10, idle_ttl=60, memory_budget=10**9):
+    return CursorManager(capacity, per_owner, idle_ttl, memory_budget, clock=clock or Clock())
+
+
+def open_cursor(cursors, owner="alice", iterator=None):
+    return cursors.open(owner, "schema", iterator or TrackedIterator(), ["id", "name"], ["int", "str"])
+
+
+def test_idle_cursors_expire_after_the_ttl():
+    clock = Clock()
+    cursors = manager(clock)
+    idle, used, busy = (open_cursor(cursors) for _ in range(3))
+    clock.now = 40
+    cursors.release(cursors.acquire(used.cursor_id))
+    cursors.acquire(busy.cursor_id)
+    clock.now = 70
+    cursors.sweep()
+
+    assert cursors.acquire(idle.cursor_id) is None and idle.iterator.closed
+    assert cursors.acquire(used.cursor_id) is used
+    # In use while the TTL ran out, it expires only once released and idle again
+    assert cursors.acquire(busy.cursor_id) is busy
+    assert cursors.stats()["expired"] == 1
+
+
+def test_a_long_request_does_not_keep_a_shorter_one_from_expiring():
+    clock = Clock()
+    cursors = manager(clock)
+    long, short = open_cursor(cursors), open_cursor(cursors)
+    cursors.acquire(long.cursor_id)
+    cursors.acquire(short.cursor_id)
+    clock.now = 1
+    cursors.release(short)
+    clock.now = 50
+    cursors.release(long)
+    clock.now = 70
+    cursors.sweep()
+    # Released earlier, the short request's cursor expires although the long one's is fresh
+    assert short.iterator.closed and not long.iterator.closed
+
+
+def test_limits_evict_the_least_recently_used_idle_cursor():
+    clock = Clock()
+    cursors = manager(clock, capacity=2, per_owner=2)
+    first = open_cursor(cursors, "alice")
+    clock.now = 1
+    second = open_cursor(cursors, "alice")
+    clock.now = 2
+    cursors.release(cursors.acquire(first.cursor_id))
+    third = open_cursor(cursors, "alice")
+
+    assert second.iterator.closed and not first.iterator.closed
+    open_cursor(cursors, "bob")
+    assert first.iterator.closed and not third.iterator.closed
+    stats = cursors.stats()
+    assert stats["owners"] == {"alice": 1, "bob": 1}
+    assert stats["open"] == 2 and stats["evictions"] == 2
+
+
+def test_open_fails_when_every_cursor_is_in_use():
+    cursors = manager(per_owner=1)
+    busy = open_cursor(cursors, "alice")
+    cursors.acquire(busy.cursor_id)
+    iterator = TrackedIterator()
+    with pytest.raises(CursorLimitError):
+        open_cursor(cursors, "alice", iterator)
+    assert iterator.closed and not busy.iterator.closed
+    # Another user is not limited by alice's cursors
+    open_cursor(cursors, "bob")
+    assert cursors.stats()["rejections"] == 1
+
+
+def test_cursors_without_owner_share_no_per_owner_quota():
+    cursors = manager(capacity=3, per_owner=1)
+    anonymous = [open_cursor(cursors, None) for _ in range(3)]
+    for cursor in anonymous:
+        cursors.acquire(cursor.cursor_id)
+    assert not any(cursor.iterator.closed for cursor in anonymous)
+    stats = cursors.stats()
+    assert stats["owners"] == {} and stats["anonymous"] == 3
+    # The total limit still bounds them
+    with pytest.raises(CursorLimitError):
+        open_cursor(cursors, None)
+    cursors.release(anonymous[0])
+    assert cursors.close(anonymous[0].cursor_id) and cursors.stats()["anonymous"] == 2
+
+
+def test_buffered_rows_are_accounted_and_bounded():
+    cursors = manager(memory_budget=5_000)
+    first = open_cursor(cursors)
+    cursors.acquire(first.cursor_id)
+    first.iterator.fetch(5)
+    cursors.release(first)
+    assert first.buffered_bytes == first.iterator.buffered_bytes() > 0
+    assert cursors.stats()["buffered_bytes"] == first.buffered_bytes
+
+    # A result recorded for the result cache is held as long as the cursor
+    second = open_cursor(cursors, iterator=RecordingIterator(TrackedIterator(), 10**6, lambda rows, size: None))
+    cursors.acquire(second.cursor_id)
+    second.iterator.fetch(95)
+    cursors.release(second)
+    assert second.buffered_bytes > 5_000
+    # Over the budget the other idle cursors are closed, not the one just fetched from
+    assert first.iterator.closed and not second.iterator.child_iter.closed
+    assert cursors.stats()["buffered_bytes"] == second.buffered_bytes
+
+
+def test_close_releases_the_iterator():
+    cursors = manager()
+    cursor = open_cursor(cursors)
+    assert cursors.close(cursor.cursor_id) and cursor.iterator.closed
+    assert not cursors.close(cursor.cursor_id)
+    assert cursors.stats()["closed"] == 1 and cursors.stats()["open"] == 0
+
+
+def test_a_cursor_closed_in_use_is_closed_by_its_last_release():
+    cursors = manager()
+    cursor = open_cursor(cursors)
+    cursors.acquire(cursor.cursor_id)
+    cursors.acquire(cursor.cursor_id)
+    assert cursors.close(cursor.cursor_id) and cursors.acquire(cursor.cursor_id) is None
+    # The requests still reading it keep its table file open
+    assert not cursor.iterator.closed
+    cursors.release(cursor)
+    assert not cursor.iterator.closed and cursor.iterator.fetch(5) == ROWS[:5]
+    cursors.release(cursor)
+    assert cursor.iterator.closed
+    assert cursors.stats()["open"] == 0 and cursors.stats()["buffered_bytes"] == 0
@@ -0,0 +1,27 @@
+from app.core.plan_cache import PlanCache, normalize_sql
+
+
+def test_normalize_sql_keeps_literals():
+    assert normalize_sql("  SELECT id,\n\tname FROM t  WHERE name = 'a  b' ") == \
+        "SELECT id, name FROM t WHERE name = 'a  b'"
+
+
+def test_lru_eviction_and_counters():
+    cache = PlanCache(capacity=2)
+    cache.put("s", "SELECT 1", {"q": 1}, "plan1")
+    cache.put("s", "SELECT 2", {"q": 2}, "plan2")
+    assert cache.get("s", "SELECT   1") == ({"q": 1}, "plan1")
+    cache.put("s", "SELECT 3", {"q": 3}, "plan3")
+
+    assert cache.get("s", "SELECT 2") is None
+    assert cache.stats() == {"size": 2, "capacity": 2, "hits": 1, "misses": 1, "evictions": 1}
+
+
+def test_invalidate_drops_only_that_schema():
+    cache = PlanCache(capacity=4)
+    cache.put("s1", "SELECT 1", {}, "plan")
+    cache.put("s2", "SELECT 1", {}, "plan")
+    cache.invalidate("s1")
+
+    assert cache.get("s1", "SELECT 1") is None
+    assert cache.get("s2", "SELECT 1") is not None
@@ -0,0 +1,51 @@
+from app.core.result_cache import ResultCache
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.iterator.recording_iterator import RecordingIterator
+from app.core.storage_layer.spill import estimate_size
+
+ROWS = [[i, f"name {i}"] for i in range(10)]
+
+
+def test_key_normalizes_sql_and_parameters():
+    assert ResultCache.key("s", "SELECT  id\nFROM t") == ResultCache.key("s", "SELECT id FROM t")
+    assert ResultCache.key("s", "SELECT id FROM t WHERE id = ?", [1]) != \
+        ResultCache.key("s", "SELECT id FROM t WHERE id = ?", [2])
+
+
+def test_stale_signature_invalidates_entry():
+    cache = ResultCache(budget=10_000)
+    key = ResultCache.key("s", "SELECT id FROM t")
+    cache.put(key, (1, 2), ROWS, 100)
+
+    assert cache.get(key, (1, 2)) is ROWS
+    assert cache.get(key, (1, 3)) is None
+    assert cache.get(key, (1, 2)) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_lru_eviction_within_budget():
+    cache = ResultCache(budget=250)
+    for i in range(3):
+        cache.put(i, "sig", ROWS, 100)
+    assert cache.get(0, "sig") is None
+    assert cache.get(2, "sig") is ROWS
+    cache.put(3, "sig", ROWS, 1000)  # larger than the whole budget, never stored
+    assert cache.stats()["size"] == 200
+
+
+def test_recording_iterator_records_complete_results_only():
+    recorded = []
+    full = RecordingIterator(MaterializedIterator(ROWS, batch_size=3), 10_000,
+                             lambda rows, size: recorded.append((rows, size)))
+    assert full.fetch_all() == ROWS
+    assert recorded == [(ROWS, estimate_size(ROWS))]
+
+    recorded.clear()
+    closed_early = RecordingIterator(MaterializedIterator(ROWS, batch_size=3), 10_000,
+                                     lambda rows, size: recorded.append(rows))
+    closed_early.fetch(4)
+    closed_early.close()
+    over_budget = RecordingIterator(MaterializedIterator(ROWS, batch_size=3), 100,
+                                    lambda rows, size: recorded.append(rows))
+    assert over_budget.fetch_all() == ROWS
+    assert recorded == []
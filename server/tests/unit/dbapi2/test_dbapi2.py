@@ -1,7 +1,9 @@
 import pytest
+import requests
 from dbcsv.connection import Connection
 from dbcsv.exception import *
 from dbcsv import connect
+from dbcsv.utils import _raise_for_fetch_status
 
 # Arrange
 valid_dsn = "http://127.0.0.1:8001/schema1"
@@ -160,4 +162,123 @@ def test_use_cursor_after_connection_close():
     conn.close()
     
     with pytest.raises(InternalError):
-        cursor.execute("SELECT 1")  # Mong đợi lỗi khi connection đã đóng
\ No newline at end of file
+        cursor.execute("SELECT 1")  # Mong đợi lỗi khi connection đã đóng
+
+
+def test_execute_with_parameters():
+    """
+    Test execute() với tham số: câu lệnh được prepare một lần và thực thi lại với giá trị mới
+    """
+    conn = connect(dsn=valid_dsn, user=valid_user, password=valid_password)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT id FROM table1 WHERE age > ?", [30])
+    first = cursor.fetchall()
+    cursor.execute("SELECT id FROM table1 WHERE age > ?", (100,))
+    assert cursor.fetchall() == []
+    cursor.execute("SELECT id FROM table1 WHERE age > 30")
+    assert cursor.fetchall() == first
+
+    with pytest.raises(ProgrammingError):
+        cursor.execute("SELECT id FROM table1 WHERE age > ?", [])
+
+    cursor.executemany("SELECT id FROM table1 WHERE id = :id", [{"id": 2}, {"id": 1}])
+    assert cursor.fetchall() == [[2], [1]]
+    conn.close()
+
+
+def test_fetchall_and_iteration():
+    """
+    Test fetchall() và duyệt cursor: duyệt theo từng trang, thoát sớm không làm mất dòng
+    """
+    conn = connect(dsn=valid_dsn, user=valid_user, password=valid_password)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT id, name FROM table1")
+    expected = cursor.fetchall()
+    assert expected and cursor.rowcount == len(expected)
+
+    cursor.execute("SELECT id, name FROM table1")
+    first = cursor.fetchone()
+    assert [first] + [row for row in cursor] == expected
+    assert cursor.rowcount == len(expected)
+    assert cursor.fetchall() == []
+
+    # Leaving the loop early leaves the other rows to the next fetches
+    cursor.execute("SELECT id, name FROM table1")
+    for row in cursor:
+        break
+    assert [row, cursor.fetchone()] == expected[:2]
+    assert cursor.fetchall() == expected[2:]
+    conn.close()
+
+
+def test_fetch_errors_raise_database_errors():
+    """
+    Test phản hồi lỗi của fetch (không phải 404, thân không phải JSON) được báo bằng DatabaseError
+    """
+    response = requests.Response()
+    response.status_code, response.reason, response._content = 500, "Internal Server Error", b"Internal Server Error"
+    with pytest.raises(DatabaseError, match="Internal Server Error") as error:
+        _raise_for_fetch_status(response)
+    assert not isinstance(error.value, OperationalError)
+    response.status_code, response._content = 404, b'{"detail": "Cursor id=x not found"}'
+    with pytest.raises(OperationalError, match="not found"):
+        _raise_for_fetch_status(response)
+
+
+def test_columnar_and_json_fetches_agree():
+    """
+    Test định dạng nhị phân theo cột: kết quả giống JSON, có description và lấy được theo cột
+    """
+    json_conn = connect(dsn=valid_dsn, user=valid_user, password=valid_password, columnar=False)
+    json_cursor = json_conn.cursor()
+    json_cursor.execute("SELECT id, name, age FROM table1")
+    expected = json_cursor.fetchall()
+    json_conn.close()
+
+    conn = connect(dsn=valid_dsn, user=valid_user, password=valid_password)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name, age FROM table1")
+    assert cursor.fetchmany(2) + cursor.fetchall() == expected
+    assert [column[0] for column in cursor.description] == ["id", "name", "age"]
+
+    cursor.execute("SELECT id, name, age FROM table1")
+    first = cursor.fetchmany_columns(1)
+    rest = cursor.fetchall_columns()
+    assert first["id"] + rest["id"] == [row[0] for row in expected]
+    assert first["name"] + rest["name"] == [row[1] for row in expected]
+    conn.close()
+
+
+def test_cursors_count_against_their_user():
+    """
+    Test cursor phía server được tính cho user của token và được giải phóng khi đóng
+    """
+    conn = connect(dsn=valid_dsn, user=valid_user, password=valid_password)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM table1")
+    stats = requests.get("http://127.0.0.1:8001/query/cursors/stats").json()
+    assert stats["owners"].get(valid_user, 0) >= 1
+    cursor.close()
+    after = requests.get("http://127.0.0.1:8001/query/cursors/stats").json()
+    assert after["owners"].get(valid_user, 0) == stats["owners"][valid_user] - 1
+    assert after["closed"] == stats["closed"] + 1
+    conn.close()
+
+
+def test_columnar_fetches_agree_on_column_types():
+    """
+    Test các hàm fetch của cùng một cursor trả về cùng kiểu cho một cột, description có sau execute()
+    """
+    conn = connect(dsn=valid_dsn.replace("schema1", "schema2"), user=valid_user, password=valid_password)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, join_date, last_login, score FROM table1")
+    assert [column[:2] for column in cursor.description] == \
+        [("id", "INT"), ("join_date", "DATE"), ("last_login", "DATETIME"), ("score", "FLOAT")]
+    first = cursor.fetchone()
+    second = cursor.fetchmany(1)[0]
+    rest = cursor.fetchall()
+    for row in [second] + rest:
+        assert [type(value) for value in row] == [type(value) for value in first]
+    conn.close()
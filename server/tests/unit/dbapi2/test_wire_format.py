@@ -0,0 +1,47 @@
+import datetime
+
+from app.api.schemas.response import FetchResponse
+from app.api.wire_format import column_kinds, encode_frame, json_fetch_response, json_rows, stream_frame
+from dbcsv.wire_format import decode_frame, iter_stream_frames
+
+COLUMNS = ["id", "name", "score", "is_member", "join_date"]
+KINDS = column_kinds(["INT", "VARCHAR", "FLOAT", "BOOLEAN", "DATE"])
+ROWS = [
+    [1, "John Doe", 85.5, True, datetime.date(2023, 1, 15)],
+    [2, None, None, False, None],
+    [None, "Émilie", 1e300, None, datetime.date(1, 1, 1)],
+]
+
+
+def test_round_trip_keeps_types_and_nulls():
+    frame = decode_frame(encode_frame(ROWS, COLUMNS, KINDS, position=3))
+    assert frame.kinds == ["int", "str", "float", "bool", "date"]
+    assert frame.rows() == ROWS
+    assert frame.as_dict()["name"] == ["John Doe", None, "Émilie"]
+    assert frame.position == 3 and frame.row_count == 3 and not frame.end
+
+
+def test_values_that_do_not_fit_the_column_type_are_sent_as_json():
+    rows = [[1.5, datetime.datetime(2024, 1, 2, 3, 4)], [2, None]]
+    frame = decode_frame(encode_frame(rows, ["avg", "at"], column_kinds(["INT", "DATE"]), position=2))
+    assert frame.kinds == ["json", "json"]
+    assert frame.rows() == [[1.5, "2024-01-02T03:04:00"], [2, None]]
+    # DATETIME columns always go as json, the date layout would drop their time of day
+    assert column_kinds(["DATETIME", "timestamp", "DATE"]) == ["json", "json", "date"]
+
+
+def test_empty_frame_and_stream_framing():
+    frames = [stream_frame(encode_frame(ROWS[:2], COLUMNS, KINDS, position=2)),
+              stream_frame(encode_frame([], COLUMNS, KINDS, position=2, end=True))]
+    body = b"".join(frames)
+    # Chunk boundaries fall anywhere in the body
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    decoded = list(iter_stream_frames(iter(chunks)))
+    assert [frame.rows() for frame in decoded] == [ROWS[:2], []]
+    assert decoded[-1].end and decoded[-1].names == COLUMNS
+
+
+def test_fast_json_matches_fetch_response():
+    rows = ROWS + [[4, "x", float("nan"), True, datetime.datetime(2024, 1, 2, 3, 4)]]
+    assert json_fetch_response(rows, 4) == FetchResponse(data=rows, position=4).model_dump_json().encode()
+    assert json_rows(rows[0]) == b'[1,"John Doe",85.5,true,"2023-01-15"]'
@@ -0,0 +1,61 @@
+import pytest
+from lark import Lark
+
+from app.core.parser.parser import SQLTransformer, grammar
+from app.core.storage_layer import columnar, metadata, optimizer, row_index, secondary_index, statistics
+from app.core.storage_layer.iterator import table_iterator
+from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.query_executor import QueryExecutor
+
+TABLE_METADATA = {
+    "id": "INT",
+    "name": "VARCHAR",
+    "score": "FLOAT",
+    "is_member": "BOOLEAN",
+    "join_date": "DATE",
+}
+
+TABLE_CSV = """id,name,score,is_member,join_date
+1,John Doe,85.5,true,2023-01-15
+2,Jane Smith,90.0,false,2022-11-03
+3,Michael Brown,77.25,true,2024-05-10
+4,Emily Davis,88.0,false,2021-09-12
+5,Chris Wilson,95.75,true,2025-02-20
+"""
+
+PARSER = Lark(grammar, parser='lalr', transformer=SQLTransformer(), start='start')
+
+
+def parse(sql):
+    return QueryExecutor.parse_sql(sql, PARSER)
+
+
+def plan_of(sql):
+    """Plan of a statement over the schema `test` of the data_dir fixture."""
+    return QueryExecutor.plan(parse(sql), Metadata("test"))
+
+
+def run(sql, parameters=None):
+    return plan_of(sql).execute(parameters).fetch_all()
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """A throwaway data directory holding schema `test` with one table `people`."""
+    schema_dir = tmp_path / "test"
+    schema_dir.mkdir()
+    (schema_dir / "people.csv").write_text(TABLE_CSV, encoding="utf-8")
+    columns = "".join(f"      - column_name: {name}\n        column_type: {dtype}\n"
+                      for name, dtype in TABLE_METADATA.items())
+    (schema_dir / "metadata.yaml").write_text(f"tables:\n  - table_name: people\n    columns:\n{columns}",
+                                              encoding="utf-8")
+    for module in (columnar, metadata, row_index, secondary_index, statistics, table_iterator):
+        monkeypatch.setattr(module, "DB_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def free_seeks(monkeypatch):
+    """Index lookups and block seeks cost nothing, so scans of the 5-row table use an index or zone maps whenever one applies."""
+    for name in ("INDEX_LOOKUP_COST", "INDEX_ROW_COST", "BLOCK_SEEK_COST"):
+        monkeypatch.setattr(optimizer, name, 0.0)
@@ -0,0 +1,68 @@
+import datetime
+import random
+
+import pytest
+
+from app.core import config
+from app.core.storage_layer.aggregate import CompiledAggregate
+from app.core.storage_layer.iterator.hash_aggregate_iterator import HashAggregateIterator
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from tests.unit.storage_layer.conftest import run
+
+
+def test_aggregates_without_group_by(data_dir):
+    assert run("SELECT COUNT(*), SUM(id), AVG(score), MIN(join_date), MAX(name) FROM people") == [
+        [5, 15, 87.3, datetime.date(2021, 9, 12), "Michael Brown"]]
+    # No input rows still gives one row
+    assert run("SELECT COUNT(*), SUM(score), AVG(score) FROM people WHERE id > 10") == [[0, None, None]]
+
+
+def test_group_by_with_order_and_limit(data_dir):
+    assert run("SELECT is_member, COUNT(*), MAX(score) FROM people GROUP BY is_member ORDER BY is_member") == [
+        [False, 2, 90.0], [True, 3, 95.75]]
+    assert run("SELECT is_member FROM people WHERE score > 80 GROUP BY is_member "
+               "ORDER BY COUNT(*) DESC LIMIT 1") == [[True]]
+
+
+@pytest.mark.parametrize("sql, message", [
+    ("SELECT name, COUNT(*) FROM people GROUP BY is_member", "GROUP BY"),
+    ("SELECT SUM(name) FROM people", "numeric"),
+    ("SELECT * FROM people GROUP BY id", "GROUP BY"),
+    ("SELECT COUNT(salary) FROM people", "salary"),
+])
+def test_invalid_aggregates_fail_at_plan_time(data_dir, sql, message):
+    with pytest.raises(ValueError, match=message):
+        run(sql)
+
+
+def test_nulls_are_skipped():
+    aggregate = CompiledAggregate(["g"], [
+        {'function': 'COUNT', 'column': 'v', 'name': 'COUNT(v)'},
+        {'function': 'COUNT', 'column': '*', 'name': 'COUNT(*)'},
+        {'function': 'AVG', 'column': 'v', 'name': 'AVG(v)'},
+        {'function': 'MIN', 'column': 'v', 'name': 'MIN(v)'},
+    ], ["g", "v"])
+    rows = [["a", None], ["a", 4], ["b", None], ["a", 2]]
+    assert HashAggregateIterator(MaterializedIterator(rows), aggregate, 1 << 20).fetch_all() == [
+        ["a", 2, 3, 3.0, 2], ["b", 0, 1, None, None]]
+
+
+def test_spilled_partitions_give_the_same_groups():
+    rng = random.Random(3)
+    rows = [[rng.randint(0, 2000), rng.randint(0, 2), rng.random()] for _ in range(20000)]
+    aggregate = CompiledAggregate(["k", "j"], [
+        {'function': 'COUNT', 'column': '*', 'name': 'COUNT(*)'},
+        {'function': 'SUM', 'column': 'v', 'name': 'SUM(v)'},
+    ], ["k", "j", "v"])
+
+    def groups(budget):
+        iterator = HashAggregateIterator(MaterializedIterator([row[:] for row in rows], batch_size=500),
+                                         aggregate, budget)
+        result = {(k, j): (count, round(total, 6)) for k, j, count, total in iterator.fetch_all()}
+        return result, iterator
+
+    in_memory, _ = groups(1 << 30)
+    spilled, iterator = groups(20_000)
+    assert spilled == in_memory
+    assert len(in_memory) > 5000
+    assert iterator._partitions == []
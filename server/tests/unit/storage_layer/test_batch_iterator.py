@@ -0,0 +1,32 @@
+from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.utils import sql_to_logical_plan
+
+
+def execute(where=None, batch_size=2):
+    parsed = {'type': 'select', 'columns': ['id', 'name'], 'table': 'people', 'where': where}
+    plan = sql_to_logical_plan(parsed, Metadata("test"))
+    scan = plan
+    while hasattr(scan, "child"):
+        scan = scan.child
+    scan.batch_size = batch_size
+    return plan.execute()
+
+
+def test_operators_exchange_batches(data_dir):
+    iterator = execute()
+    assert [len(batch) for batch in iter(iterator.next_batch, [])] == [2, 2, 1]
+    assert iterator.next_batch() == []
+
+
+def test_filter_skips_empty_batches(data_dir):
+    iterator = execute({'left_operand': 'id', 'op': '>', 'right_operand': 4})
+    assert iterator.next_batch() == [[5, "Chris Wilson"]]
+    assert iterator.next_batch() == []
+
+
+def test_row_and_fetch_adapters_share_buffer(data_dir):
+    iterator = execute(batch_size=3)
+    assert next(iterator) == [1, "John Doe"]
+    assert iterator.fetch(2) == [[2, "Jane Smith"], [3, "Michael Brown"]]
+    assert iterator.fetch_all() == [[4, "Emily Davis"], [5, "Chris Wilson"]]
+    assert iterator.fetch(1) == []
@@ -0,0 +1,32 @@
+import os
+
+from app.core.storage_layer.columnar import ColumnarTable, build_sidecar
+from app.core.storage_layer.iterator.table_iterator import TableIterator
+from tests.unit.storage_layer.conftest import TABLE_METADATA
+
+
+def test_sidecar_scan_matches_csv_scan(data_dir):
+    expected = list(TableIterator("test", "people", TABLE_METADATA))
+
+    assert build_sidecar("test", "people", TABLE_METADATA)
+    sidecar_iter = TableIterator("test", "people", TABLE_METADATA, batch_size=2)
+    assert sidecar_iter._sidecar is not None
+    assert list(sidecar_iter) == expected
+
+
+def test_sidecar_reads_only_required_columns(data_dir):
+    build_sidecar("test", "people", TABLE_METADATA)
+    rows = list(TableIterator("test", "people", TABLE_METADATA, required_columns=["name"]))
+    assert rows[0] == [None, "John Doe", None, None, None]
+    assert len(rows) == 5
+
+
+def test_sidecar_is_stale_after_csv_change(data_dir):
+    build_sidecar("test", "people", TABLE_METADATA)
+    csv_file = data_dir / "test" / "people.csv"
+    with open(csv_file, "a", encoding="utf-8") as f:
+        f.write("6,New Person,50.0,false,2020-01-01\n")
+    os.utime(csv_file, ns=(0, 0))
+
+    assert ColumnarTable.open("test", "people", TABLE_METADATA) is None
+    assert len(list(TableIterator("test", "people", TABLE_METADATA))) == 6
@@ -0,0 +1,24 @@
+import datetime
+
+import pytest
+
+from app.core.storage_layer.datatypes import DBTypeObject, decode_date
+
+
+def test_decoders_resolved_per_column_type():
+    decoders = DBTypeObject.build_decoders(["INT", "VARCHAR", "FLOAT", "BOOLEAN", "DATE", "NULL", "unknown"])
+    row = ["7", "'quoted'", "1.5", "TRUE", "2024-05-10", "null", "3.0"]
+
+    assert [decode(data) for decode, data in zip(decoders, row)] == \
+        [7, "quoted", 1.5, True, datetime.date(2024, 5, 10), None, 3.0]
+
+
+@pytest.mark.parametrize("data", ["2023-01-15", "2023-1-5", "0001-01-01", "9999-12-31"])
+def test_decode_date_matches_strptime(data):
+    assert decode_date(data) == datetime.datetime.strptime(data, "%Y-%m-%d").date()
+
+
+@pytest.mark.parametrize("data", ["2024--05-10", "2023-W01-1", "2023-02-30", "20230115", ""])
+def test_decode_date_rejects_invalid(data):
+    with pytest.raises(ValueError):
+        decode_date(data)
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from app.core import config
+from app.core.storage_layer.iterator.distinct_iterator import DistinctIterator
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.logical_plan.top_n import TopN
+from tests.unit.storage_layer.conftest import parse, plan_of, run
+
+
+def test_distinct_keeps_first_occurrences(data_dir):
+    assert run("SELECT DISTINCT is_member FROM people") == [[True], [False]]
+    assert run("select distinct is_member FROM people WHERE id > 1") == [[False], [True]]
+    assert run("SELECT DISTINCT is_member FROM people WHERE score > 80 ORDER BY is_member") == [[False], [True]]
+    assert len(run("SELECT DISTINCT * FROM people")) == 5
+    assert not parse("SELECT id FROM people")['distinct']
+
+
+def test_distinct_with_order_by_and_limit(data_dir):
+    sql = "SELECT DISTINCT is_member FROM people ORDER BY id LIMIT 2"
+    # A heap of the first 2 rows by id would only hold one distinct value
+    assert not isinstance(plan_of(sql).child.child.child, TopN)
+    assert run(sql) == [[True], [False]]
+    assert run("SELECT DISTINCT is_member FROM people LIMIT 1 OFFSET 1") == [[False]]
+
+
+def test_distinct_returns_rows_before_the_input_ends():
+    child = MaterializedIterator([[1], [1], [2], [3], [2], [4]], batch_size=2)
+    distinct = DistinctIterator(child, memory_budget=1 << 20)
+    assert distinct.next_batch() == [[1]]
+    assert child._position == 2
+    assert distinct.fetch_all() == [[2], [3], [4]]
+
+
+@pytest.mark.parametrize("budget", [1 << 20, 3000])
+def test_distinct_spills_partitions(budget):
+    rng = random.Random(3)
+    rows = [[rng.randrange(300), rng.choice(["a", "b", None])] for _ in range(5000)]
+    result = DistinctIterator(MaterializedIterator([list(row) for row in rows]), budget).fetch_all()
+    # First occurrences in input order, spilled or not
+    assert result == [list(row) for row in dict.fromkeys(map(tuple, rows))]
+
+
+def test_distinct_spills_through_the_plan(data_dir, monkeypatch):
+    monkeypatch.setattr(config, "DISTINCT_MEMORY_BYTES", 1)
+    assert sorted(run("SELECT DISTINCT is_member FROM people")) == [[False], [True]]
+    # The sort below the distinct still orders the result
+    assert run("SELECT DISTINCT id FROM people ORDER BY id") == [[1], [2], [3], [4], [5]]
+    assert run("SELECT DISTINCT name FROM people ORDER BY name DESC") == \
+        [["Michael Brown"], ["John Doe"], ["Jane Smith"], ["Emily Davis"], ["Chris Wilson"]]
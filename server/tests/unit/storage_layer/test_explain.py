@@ -0,0 +1,57 @@
+import os
+
+
+from app.core.storage_layer.iterator.table_iterator import TableIterator
+from app.core.storage_layer.logical_plan.explain import Explain, EXPLAIN_ANALYZE_COLUMNS
+from tests.unit.storage_layer.conftest import plan_of
+
+
+def test_explain_returns_the_plan_tree(data_dir):
+    plan = plan_of("EXPLAIN SELECT name FROM people WHERE name = 'Jane Smith' ORDER BY id LIMIT 2")
+    assert isinstance(plan, Explain) and plan.columns == ["plan"]
+    assert [row[0] for row in plan.execute().fetch_all()] == [
+        "Limit(limit=2, offset=0)",
+        "  -> Project(columns=['name'])",
+        "    -> TopN(order_by=[id ASC], count=2)",
+        "      -> Filter((row[1] == _c0))",
+        "        -> Scan(table=people, columns=['name', 'id'], access=full scan, rows=1, cost=5)",
+    ]
+
+
+def test_explain_analyze_reports_every_operator(data_dir):
+    plan = plan_of("EXPLAIN ANALYZE SELECT name FROM people WHERE name <> 'Jane Smith' LIMIT 3")
+    assert plan.columns == list(EXPLAIN_ANALYZE_COLUMNS)
+    rows = {row[0].strip(" ->").split("(")[0]: row[1:] for row in plan.execute().fetch_all()}
+    # The filter hands over all 4 rows in one batch, LIMIT keeps 3
+    assert rows["Limit"][:2] == [4, 3]
+    assert rows["Filter"][:2] == [5, 4]
+    rows_in, rows_out, time_ms, bytes_read, decode_ms, blocks_skipped = rows["Scan"]
+    assert rows_in is None and rows_out == 5 and time_ms >= 0 and decode_ms >= 0
+    # No row index, so no zone maps to skip blocks with
+    assert blocks_skipped is None
+    assert bytes_read == os.path.getsize(data_dir / "test" / "people.csv")
+
+
+def test_explain_analyze_profiles_the_scan_of_a_vectorized_filter(data_dir):
+    plan = plan_of("EXPLAIN ANALYZE SELECT id FROM people WHERE score > 80")
+    rows = {row[0].strip(" ->").split("(")[0]: row[1:] for row in plan.execute().fetch_all()}
+    assert rows["VectorizedFilter"][:2] == [5, 4]
+    rows_in, rows_out, time_ms, bytes_read, decode_ms, blocks_skipped = rows["Scan"]
+    assert rows_in is None and rows_out == 5 and time_ms >= 0
+    # The filter converts the score column with the scan's decoders, which are timed
+    assert decode_ms > 0
+    assert bytes_read == os.path.getsize(data_dir / "test" / "people.csv")
+
+
+def test_explain_analyze_leaves_the_plan_uninstrumented(data_dir):
+    plan = plan_of("EXPLAIN ANALYZE SELECT COUNT(*), MAX(score) FROM people")
+    rows = plan.execute().fetch_all()
+    assert rows[-1][2] == 5
+    node = plan.child
+    while node.children:
+        assert "execute" not in vars(node)
+        node = node.children[0]
+    # Without EXPLAIN ANALYZE scans are not profiled
+    scan = node.execute()
+    assert scan.decode_seconds is None and "_next_batch" not in vars(scan)
+    assert isinstance(scan, TableIterator) and scan.fetch_all()
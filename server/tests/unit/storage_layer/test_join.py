@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+from app.core import config
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.iterator.merge_join_iterator import MergeJoinIterator
+from app.core.storage_layer.logical_plan.join import Join, MERGE, HASH_BUILD_LEFT, HASH_BUILD_RIGHT
+from app.core.storage_layer.utils import referenced_tables
+from tests.unit.storage_layer.conftest import parse, plan_of, run
+
+ORDERS_CSV = """order_id,person_id,amount
+10,2,15.5
+11,1,3.0
+12,2,7.25
+13,9,1.0
+14,5,20.0
+"""
+
+
+def add_table(data_dir, name, columns, rows):
+    schema_dir = data_dir / "test"
+    (schema_dir / f"{name}.csv").write_text(
+        ",".join(columns) + "\n" + "".join(",".join(map(str, row)) + "\n" for row in rows), encoding="utf-8")
+    definition = "".join(f"      - column_name: {col}\n        column_type: {dtype}\n" for col, dtype in columns.items())
+    with open(schema_dir / "metadata.yaml", "a", encoding="utf-8") as f:
+        f.write(f"  - table_name: {name}\n    columns:\n{definition}")
+
+
+@pytest.fixture
+def orders(data_dir):
+    add_table(data_dir, "orders", {"order_id": "INT", "person_id": "INT", "amount": "FLOAT"},
+              [row.split(",") for row in ORDERS_CSV.splitlines()[1:]])
+    return data_dir
+
+
+def find_join(plan):
+    while not isinstance(plan, Join):
+        plan = plan.child
+    return plan
+
+
+def test_join_with_aliases_and_qualified_names(orders):
+    rows = run("SELECT p.name, o.amount FROM people AS p JOIN orders AS o ON p.id = o.person_id "
+               "WHERE o.amount > 5 ORDER BY o.order_id")
+    assert rows == [["Jane Smith", 15.5], ["Jane Smith", 7.25], ["Chris Wilson", 20.0]]
+    # Unqualified names that belong to one table, table names as qualifiers, INNER JOIN
+    rows = run("SELECT name, order_id FROM orders INNER JOIN people ON people.id = orders.person_id "
+               "ORDER BY order_id DESC LIMIT 2")
+    assert rows == [["Chris Wilson", 14], ["Jane Smith", 12]]
+
+
+def test_join_with_aggregates_and_parameters(orders):
+    rows = run("SELECT p.name, COUNT(*), SUM(o.amount) FROM people AS p JOIN orders AS o ON o.person_id = p.id "
+               "GROUP BY p.name ORDER BY p.name")
+    assert rows == [["Chris Wilson", 1, 20.0], ["Jane Smith", 2, 22.75], ["John Doe", 1, 3.0]]
+    sql = "SELECT o.order_id FROM people AS p JOIN orders AS o ON p.id = o.person_id AND o.amount < ? WHERE p.score > ?"
+    assert parse(sql)['parameters'] == [0, 1]
+    assert sorted(run(sql, [10, 80])) == [[11], [12]]
+    assert run(sql, [10, 88]) == [[12]]
+
+
+@pytest.mark.parametrize("sql, message", [
+    ("SELECT name FROM people AS a JOIN people AS b ON a.id = b.id", "ambiguous"),
+    ("SELECT p.id FROM people AS p JOIN orders AS o ON p.nope = o.person_id", "not found"),
+    ("SELECT p.id FROM people AS p JOIN orders AS o ON p.id > o.person_id", "ON equality"),
+    ("SELECT p.id FROM people AS p JOIN people AS p ON p.id = p.id", "aliases"),
+])
+def test_join_errors(orders, sql, message):
+    with pytest.raises(ValueError, match=message):
+        plan_of(sql)
+
+
+def test_self_join_and_referenced_tables(orders):
+    sql = "SELECT a.name, b.name FROM people AS a JOIN people AS b ON a.is_member = b.is_member WHERE a.id < b.id AND a.id = 1"
+    assert run(sql) == [["John Doe", "Michael Brown"], ["John Doe", "Chris Wilson"]]
+    parsed = parse("SELECT * FROM people AS p JOIN orders AS o ON p.id = o.person_id")
+    assert referenced_tables(parsed) == ["people", "orders"]
+
+
+def test_hash_join_spills_partitions(data_dir, monkeypatch):
+    rng = random.Random(7)
+    left = [[i, rng.randrange(40), rng.randrange(3)] for i in range(600)]
+    right = [[i, rng.randrange(50), rng.randrange(3)] for i in range(400)]
+    add_table(data_dir, "l", {"lid": "INT", "k": "INT", "k2": "INT"}, left)
+    add_table(data_dir, "r", {"rid": "INT", "k": "INT", "k2": "INT"}, right)
+    expected = sorted([a[0], b[0]] for a in left for b in right if a[1] == b[1] and a[2] == b[2])
+    sql = "SELECT lid, rid FROM l JOIN r ON l.k = r.k AND r.k2 = l.k2"
+
+    assert sorted(run(sql)) == expected
+    monkeypatch.setattr(config, "JOIN_MEMORY_BYTES", 2000)
+    assert sorted(run(sql)) == expected
+    # The smaller input is the build side
+    assert find_join(plan_of(sql)).strategy() == HASH_BUILD_RIGHT
+    assert find_join(plan_of("SELECT lid FROM r JOIN l ON l.k = r.k")).strategy() == HASH_BUILD_LEFT
+
+
+def test_sorted_inputs_use_merge_join(orders, monkeypatch):
+    add_table(orders, "visits", {"person_id": "INT", "page": "VARCHAR"},
+              [[1, "home"], [2, "cart"], [2, "home"], [4, "faq"], [7, "home"]])
+    sql = "SELECT p.name, v.page FROM people AS p JOIN visits AS v ON p.id = v.person_id"
+    hash_rows = run(sql)
+    assert find_join(plan_of(sql)).strategy() != MERGE
+
+    run("ANALYZE people")
+    run("ANALYZE visits")
+    assert find_join(plan_of(sql)).strategy() == MERGE
+    assert run(sql) == hash_rows == [["John Doe", "home"], ["Jane Smith", "cart"], ["Jane Smith", "home"],
+                                     ["Emily Davis", "faq"]]
+    # orders is not sorted on person_id
+    run("ANALYZE orders")
+    assert find_join(plan_of("SELECT * FROM people JOIN orders ON id = person_id")).strategy() != MERGE
+
+
+def test_merge_join_rejects_unsorted_input():
+    join = MergeJoinIterator(MaterializedIterator([[1], [3], [2]]), MaterializedIterator([[1], [2], [3]]), 0, 0)
+    with pytest.raises(ValueError, match="ascending"):
+        join.fetch_all()
@@ -0,0 +1,63 @@
+import pytest
+
+from app.core import config
+from app.core.storage_layer.columnar import build_sidecar
+from app.core.storage_layer.row_index import RowIndex, build_row_index
+from tests.unit.storage_layer.conftest import TABLE_METADATA, plan_of
+
+ALL_IDS = [[1], [2], [3], [4], [5]]
+
+
+def run(sql):
+    return plan_of(sql).execute()
+
+
+def scan_of(iterator):
+    while hasattr(iterator, "child_iter"):
+        iterator = iterator.child_iter
+    return iterator
+
+
+def test_limit_closes_the_scan_once_satisfied(data_dir):
+    iterator = run("SELECT id, name FROM people LIMIT 2")
+    assert iterator.fetch(2) == [[1, "John Doe"], [2, "Jane Smith"]]
+    assert scan_of(iterator)._file.closed
+    assert iterator.fetch_all() == []
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT id FROM people LIMIT 0", []),
+    ("SELECT id FROM people LIMIT 10", ALL_IDS),
+    ("SELECT id FROM people LIMIT 2 OFFSET 1", [[2], [3]]),
+    ("SELECT id FROM people LIMIT 2 OFFSET 9", []),
+    ("SELECT id FROM people WHERE score > 80 LIMIT 2 OFFSET 1", [[2], [4]]),
+])
+@pytest.mark.parametrize("access", ["csv", "row_index", "sidecar"])
+def test_limit_offset(data_dir, sql, expected, access):
+    if access == "row_index":
+        assert build_row_index("test", "people", TABLE_METADATA, stride=2)
+    elif access == "sidecar":
+        assert build_sidecar("test", "people", TABLE_METADATA)
+    assert run(sql).fetch_all() == expected
+
+
+def test_offset_through_row_index_skips_reading(data_dir, monkeypatch):
+    monkeypatch.setattr(config, "ROW_INDEX_AUTO_BUILD", True)
+    csv_file = data_dir / "test" / "people.csv"
+    csv_file.write_text(csv_file.read_text().replace("Jane Smith", '"Jane\nSmith"'))
+
+    assert run("SELECT id, name FROM people LIMIT 2 OFFSET 1").fetch_all() == [[2, "Jane\nSmith"], [3, "Michael Brown"]]
+    index = RowIndex.open("test", "people", TABLE_METADATA)
+    assert index.row_count == 5
+    assert run("SELECT id FROM people LIMIT 1 OFFSET 3").fetch_all() == [[4]]
+
+
+def test_offset_past_a_bad_row_matches_full_scan(data_dir):
+    csv_file = data_dir / "test" / "people.csv"
+    csv_file.write_text(csv_file.read_text().replace("77.25", "7x.25"))
+    build_row_index("test", "people", TABLE_METADATA)
+
+    # The scan stops at the bad score only when it decodes that column
+    assert run("SELECT score FROM people LIMIT 5 OFFSET 1").fetch_all() == [[90.0]]
+    assert run("SELECT score FROM people LIMIT 5 OFFSET 3").fetch_all() == []
+    assert run("SELECT id FROM people LIMIT 5 OFFSET 3").fetch_all() == [[4], [5]]
@@ -0,0 +1,59 @@
+import datetime
+
+import pytest
+
+from app.core import config
+from app.core.storage_layer.columnar import build_sidecar
+from app.core.storage_layer.logical_plan.vectorized_filter import VectorizedFilter
+from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.numpy_executor import NumpyExecutor
+from app.core.storage_layer.utils import sql_to_logical_plan
+from tests.unit.storage_layer.conftest import TABLE_METADATA
+
+pytest.importorskip("numpy")
+
+
+def comparison(left, op, right):
+    return {'left_operand': left, 'op': op, 'right_operand': right}
+
+
+NUMERIC_WHERE = {
+    'op': 'OR',
+    'left': {'op': 'AND', 'left': comparison('score', '>=', 88), 'right': comparison('is_member', '=', 1)},
+    'right': comparison('join_date', '<', "'2022-01-01'"),
+}
+
+
+def plans(columns, where):
+    parsed = {'type': 'select', 'columns': columns, 'table': 'people', 'where': where}
+    return sql_to_logical_plan(parsed, Metadata("test")), \
+        NumpyExecutor.optimize(sql_to_logical_plan(parsed, Metadata("test")))
+
+
+@pytest.mark.parametrize("sidecar", [False, True])
+def test_numeric_filter_matches_iterator_engine(data_dir, monkeypatch, sidecar):
+    monkeypatch.setattr(config, "NUMPY_EXECUTOR", True)
+    if sidecar:
+        build_sidecar("test", "people", TABLE_METADATA)
+    iterator_plan, numpy_plan = plans(["name", "score", "join_date"], NUMERIC_WHERE)
+
+    assert isinstance(numpy_plan.child, VectorizedFilter)
+    assert numpy_plan.execute().fetch_all() == iterator_plan.execute().fetch_all() == [
+        ["Emily Davis", 88.0, datetime.date(2021, 9, 12)],
+        ["Chris Wilson", 95.75, datetime.date(2025, 2, 20)],
+    ]
+
+
+def test_varchar_predicate_stays_on_iterator_engine(data_dir, monkeypatch):
+    monkeypatch.setattr(config, "NUMPY_EXECUTOR", True)
+    _, numpy_plan = plans(["id"], comparison('name', '=', "'Jane Smith'"))
+    assert not isinstance(numpy_plan.child, VectorizedFilter)
+
+
+def test_bad_cell_ends_scan_like_iterator_engine(data_dir, monkeypatch):
+    monkeypatch.setattr(config, "NUMPY_EXECUTOR", True)
+    csv_file = data_dir / "test" / "people.csv"
+    csv_file.write_text(csv_file.read_text().replace("77.25", "7x.25"))
+    iterator_plan, numpy_plan = plans(["id"], comparison('score', '>', 0))
+
+    assert numpy_plan.execute().fetch_all() == iterator_plan.execute().fetch_all() == [[1], [2]]
@@ -0,0 +1,98 @@
+import pytest
+
+from app.core.parser.parser import Parameter
+from app.core.storage_layer.optimizer import FULL_SCAN, INDEX_SCAN, ZONE_MAP_SCAN, choose_access_path, \
+    estimate_selectivity, reorder_condition
+from app.core.storage_layer.row_index import RowIndex, build_row_index
+from app.core.storage_layer.statistics import TableStatistics, analyze_table
+from tests.unit.storage_layer.conftest import TABLE_METADATA, parse, run
+
+
+def where(sql):
+    return parse(sql)['where']
+
+
+@pytest.fixture
+def big_table(data_dir):
+    """people with 1000 rows, ids 1-1000 in order, an index on id and fresh statistics."""
+    rows = "".join(f"{i},Person {i % 50},{i % 100}.5,{'true' if i % 2 else 'false'},2020-01-{i % 28 + 1:02d}\n"
+                   for i in range(1, 1001))
+    (data_dir / "test" / "people.csv").write_text("id,name,score,is_member,join_date\n" + rows, encoding="utf-8")
+    path = data_dir / "test" / "metadata.yaml"
+    path.write_text(path.read_text(encoding="utf-8")
+                    + "    indexes:\n      - index_name: people_id\n        column_name: id\n", encoding="utf-8")
+    analyze_table("test", "people", TABLE_METADATA)
+    return data_dir
+
+
+def test_selectivity_from_histograms_and_distinct_counts(big_table):
+    statistics = analyze_table("test", "people", TABLE_METADATA)
+    assert statistics.selectivity("id", "<", 251) == pytest.approx(0.25, abs=0.02)
+    assert statistics.selectivity("id", ">=", 901) == pytest.approx(0.1, abs=0.02)
+    assert statistics.selectivity("name", "=", "Person 7") == pytest.approx(1 / 50, rel=0.1)
+    assert statistics.selectivity("id", "=", 5000) == 0
+    assert statistics.selectivity("id", "<", "x") is None
+    condition = where("SELECT id FROM people WHERE id < 251 OR id >= 901")
+    assert estimate_selectivity(condition, statistics) == pytest.approx(0.325, abs=0.03)
+
+
+def test_selectivity_defaults_without_statistics():
+    assert estimate_selectivity(where("SELECT id FROM people WHERE id = 1"), None) == pytest.approx(0.1)
+    assert estimate_selectivity(where("SELECT id FROM people WHERE id > 1 AND id < 9"), None) == pytest.approx(1 / 9)
+
+
+def test_reorder_puts_the_cheapest_most_selective_conditions_first(big_table):
+    statistics = analyze_table("test", "people", TABLE_METADATA)
+    condition = where("SELECT id FROM people WHERE id > 10 AND name = 'Person 7' AND score < 20.0")
+    reordered = reorder_condition(condition, statistics, TABLE_METADATA)
+    assert reordered == {'op': 'AND',
+                         'left': {'op': 'AND', 'left': {'op': '<', 'left_operand': 'score', 'right_operand': 20.0},
+                                  'right': {'op': '=', 'left_operand': 'name', 'right_operand': "'Person 7'"}},
+                         'right': {'op': '>', 'left_operand': 'id', 'right_operand': 10}}
+    # OR evaluates the likeliest condition first
+    condition = where("SELECT id FROM people WHERE id = 3 OR id > 100")
+    assert reorder_condition(condition, statistics, TABLE_METADATA)['left']['op'] == '>'
+
+
+@pytest.mark.parametrize("sql, method, count", [
+    ("SELECT id FROM people WHERE id = 500", INDEX_SCAN, 1),
+    ("SELECT id FROM people WHERE id >= 990", INDEX_SCAN, 11),
+    ("SELECT id FROM people WHERE id >= 700", ZONE_MAP_SCAN, 301),
+    ("SELECT id FROM people WHERE score > 10.0", FULL_SCAN, 900),
+    ("SELECT id FROM people WHERE name = 'Person 7'", FULL_SCAN, 20),
+])
+def test_access_path_follows_the_estimates(big_table, sql, method, count):
+    assert build_row_index("test", "people", TABLE_METADATA, stride=100)
+    path = choose_access_path("test", "people", TABLE_METADATA, ["id"], where(sql))
+    assert path.method == method
+    assert len(run(sql)) == count
+
+
+def test_placeholders_use_distinct_counts(big_table):
+    condition = where("SELECT id FROM people WHERE id = ?")
+    assert condition['right_operand'] == Parameter(0)
+    path = choose_access_path("test", "people", TABLE_METADATA, ["id"], condition)
+    assert path.method == INDEX_SCAN and path.rows == pytest.approx(1, rel=0.01)
+    assert run("SELECT name FROM people WHERE id = ?", [42]) == [["Person 42"]]
+
+
+def test_explain_shows_the_access_path(big_table):
+    rows = run("EXPLAIN SELECT name FROM people WHERE id = 42")
+    assert rows[-1][0].strip() == "-> Scan(table=people, columns=['name', 'id'], access=index scan on id, rows=1, cost=24)"
+    rows = run("EXPLAIN SELECT name FROM people WHERE score > 10.0")
+    assert "access=full scan, rows=" in rows[-1][0]
+
+
+def test_statistics_and_row_index_are_loaded_once_per_version(big_table, monkeypatch):
+    assert build_row_index("test", "people", TABLE_METADATA, stride=100)
+    first = TableStatistics.open("test", "people", TABLE_METADATA)
+    assert TableStatistics.open("test", "people", TABLE_METADATA) is first
+    assert RowIndex.open("test", "people", TABLE_METADATA) is RowIndex.open("test", "people", TABLE_METADATA)
+    loads = []
+    with monkeypatch.context() as patch:
+        patch.setattr(TableStatistics, "_load", classmethod(lambda cls, *args: loads.append(args)))
+        choose_access_path("test", "people", TABLE_METADATA, ["id"], where("SELECT id FROM people WHERE id = 5"))
+    assert loads == []
+    # A new ANALYZE is a new version of the file
+    analyze_table("test", "people", TABLE_METADATA)
+    assert TableStatistics.open("test", "people", TABLE_METADATA) is not first
@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+from app.core import config
+from app.core.storage_layer.iterator.chain_iterator import ChainIterator
+from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.predicate import compile_predicate
+from app.core.storage_layer.query_executor import QueryExecutor
+from tests.unit.storage_layer.conftest import parse
+
+
+def prepare(sql):
+    parsed = parse(sql)
+    return parsed, QueryExecutor.plan(parsed, Metadata("test"))
+
+
+def test_placeholders_are_numbered_in_textual_order():
+    parsed = parse("SELECT id FROM people WHERE id > ? AND (score = ? OR id < ?)")
+    assert parsed['parameters'] == [0, 1, 2]
+    parsed = parse("SELECT id FROM people WHERE id > :lo AND id < :hi OR id = :lo")
+    assert parsed['parameters'] == ['lo', 'hi']
+
+
+def test_mixed_placeholders_are_rejected():
+    with pytest.raises(Exception, match="mix"):
+        parse("SELECT id FROM people WHERE id > ? AND id < :hi")
+
+
+def test_bound_predicate_reuses_compiled_code():
+    condition = parse("SELECT id FROM people WHERE id > ? AND join_date < ?")['where']
+    predicate = compile_predicate(condition, ["id", "join_date"])
+    assert predicate.expression == "((row[0] > _p0) and (row[1] < _p1))"
+
+    bound = predicate.bind([1, "2024-01-01"])
+    assert bound(([2, datetime.date(2023, 5, 1)]))
+    assert not bound(([2, datetime.date(2024, 5, 1)]))
+    with pytest.raises(ValueError, match="expects 2 parameters"):
+        predicate.bind([1])
+    with pytest.raises(ValueError, match="bind"):
+        predicate([2, datetime.date(2023, 5, 1)])
+
+
+@pytest.mark.parametrize("numpy_executor", [False, True])
+def test_prepared_plan_executes_with_each_binding(data_dir, monkeypatch, numpy_executor):
+    monkeypatch.setattr(config, "NUMPY_EXECUTOR", numpy_executor)
+    _, plan = prepare("SELECT name FROM people WHERE score >= :min AND join_date < :before")
+
+    assert plan.execute({'min': 88, 'before': '2024-01-01'}).fetch_all() == [["Jane Smith"], ["Emily Davis"]]
+    assert plan.execute({'min': 90.5, 'before': '2030-01-01'}).fetch_all() == [["Chris Wilson"]]
+    # A value the masks cannot compare falls back to the iterator engine
+    _, plan = prepare("SELECT id FROM people WHERE id = ?")
+    assert plan.execute(["3"]).fetch_all() == []
+    assert plan.execute([3]).fetch_all() == [[3]]
+
+
+def test_varchar_parameter(data_dir):
+    _, plan = prepare("SELECT id FROM people WHERE name = ?")
+    assert plan.execute(["Jane Smith"]).fetch_all() == [[2]]
+
+
+def test_chain_iterator_concatenates_runs(data_dir):
+    _, plan = prepare("SELECT id FROM people WHERE id = ?")
+    chained = ChainIterator(lambda value=value: plan.execute([value]) for value in (4, 1, 9, 2))
+    assert chained.fetch_all() == [[4], [1], [2]]
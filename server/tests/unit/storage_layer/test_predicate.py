@@ -0,0 +1,40 @@
+import datetime
+
+import pytest
+
+from app.core.storage_layer.predicate import compile_predicate
+from app.core.storage_layer.utils import build_predicate
+
+COLUMNS = ["id", "name", "age", "join_date"]
+ROWS = [
+    [1, "John Doe", 28, datetime.date(2023, 1, 15)],
+    [2, "Jane Smith", 34, datetime.date(2022, 11, 3)],
+    [3, "Michael Brown", 22, datetime.date(2024, 5, 10)],
+]
+
+
+def comparison(left, op, right):
+    return {'left_operand': left, 'op': op, 'right_operand': right}
+
+
+@pytest.mark.parametrize("condition", [
+    comparison("age", ">", 25),
+    comparison("name", "=", "'Jane Smith'"),
+    comparison("join_date", ">=", "'2023-01-01'"),
+    {'op': 'OR', 'left': comparison("id", "<", 2), 'right': comparison("age", "<>", 34)},
+])
+def test_compiled_predicate_matches_closures(condition):
+    closure = build_predicate(condition)
+    compiled = compile_predicate(condition, COLUMNS)
+    assert [compiled(row, COLUMNS) for row in ROWS] == [closure(row, COLUMNS) for row in ROWS]
+
+
+def test_literal_comparisons_are_folded():
+    condition = {'op': 'AND', 'left': comparison(1, "=", 1), 'right': comparison("age", ">", 30)}
+    assert compile_predicate(condition, COLUMNS).expression == "(row[2] > 30)"
+    assert compile_predicate(comparison(1, "=", 0), COLUMNS).expression == "False"
+
+
+def test_unknown_column_fails_at_compile_time():
+    with pytest.raises(ValueError, match="salary"):
+        compile_predicate(comparison("salary", ">", 1), COLUMNS)
@@ -0,0 +1,143 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.iterator.prefetch_iterator import PrefetchIterator
+
+ROWS = [[i, f"name {i}"] for i in range(100)]
+
+
+class CountingIterator(MaterializedIterator):
+    """Records how many batches were read and on which threads, and fails at `fail_at` rows."""
+    def __init__(self, rows=ROWS, batch_size=10, fail_at=None):
+        super().__init__(rows, batch_size)
+        self.batches = 0
+        self.threads = set()
+        self.closed = False
+        self._fail_at = fail_at
+
+    def _next_batch(self):
+        if self._fail_at is not None and self._position >= self._fail_at:
+            raise ValueError("broken row")
+        self.batches += 1
+        self.threads.add(threading.current_thread().name)
+        return super()._next_batch()
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch") as pool:
+        yield pool
+
+
+def wait_for_worker(iterator):
+    with iterator._ready:
+        iterator._ready.wait_for(lambda: not iterator._running)
+
+
+def test_reads_ahead_up_to_the_capacity(executor):
+    child = CountingIterator()
+    iterator = PrefetchIterator(child, 25, executor)
+    wait_for_worker(iterator)
+    # Stops once the capacity is reached, one batch past it at most
+    assert child.batches == 3 and all(name.startswith("prefetch") for name in child.threads)
+    assert iterator.buffered_bytes() > 0
+
+    assert iterator.fetch(15) == ROWS[:15]
+    wait_for_worker(iterator)
+    assert child.batches == 5
+    assert iterator.fetch_all() == ROWS[15:]
+    assert iterator.next_batch() == []
+
+
+def test_errors_reach_the_consumer_after_the_rows_before_them(executor):
+    iterator = PrefetchIterator(CountingIterator(fail_at=30), 1000, executor)
+    assert iterator.fetch(30) == ROWS[:30]
+    with pytest.raises(ValueError, match="broken row"):
+        iterator.next_batch()
+    assert iterator.next_batch() == []
+
+
+def test_close_stops_the_worker_and_closes_the_child(executor):
+    release = threading.Event()
+
+    class SlowIterator(CountingIterator):
+        def _next_batch(self):
+            release.wait()
+            return super()._next_batch()
+
+    child = SlowIterator()
+    iterator = PrefetchIterator(child, 1000, executor)
+    iterator.close()
+    # The worker owns the child until it stops, it closes it then
+    assert not child.closed
+    release.set()
+    wait_for_worker(iterator)
+    assert child.closed and child.batches <= 1
+    assert iterator.next_batch() == []
+
+
+def test_reads_in_the_consumer_when_the_executor_is_shut_down():
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.shutdown()
+    child = CountingIterator()
+    iterator = PrefetchIterator(child, 25, executor)
+    assert iterator.fetch_all() == ROWS
+    assert child.threads == {threading.current_thread().name}
+
+
+def test_a_queued_task_does_not_hold_back_its_consumer():
+    release = threading.Event()
+
+    class SlowIterator(CountingIterator):
+        def _next_batch(self):
+            release.wait()
+            return super()._next_batch()
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+    try:
+        slow = PrefetchIterator(SlowIterator(), 1000, executor)
+        child = CountingIterator()
+        cheap = PrefetchIterator(child, 1000, executor)
+        # The only worker reads the slow cursor, the cheap one reads its rows itself meanwhile
+        assert cheap.fetch(10) == ROWS[:10]
+        assert threading.current_thread().name in child.threads
+        release.set()
+        assert slow.fetch_all() == ROWS and cheap.fetch_all() == ROWS[10:]
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_tasks_cancelled_by_a_shutdown_leave_the_child_to_the_consumer():
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.submit(release.wait)
+    child, closed_child = CountingIterator(), CountingIterator()
+    iterator = PrefetchIterator(child, 25, executor)
+    closed = PrefetchIterator(closed_child, 25, executor)
+    executor.shutdown(wait=False, cancel_futures=True)
+    release.set()
+
+    assert not iterator._running and iterator.fetch_all() == ROWS
+    assert child.threads == {threading.current_thread().name}
+    closed.close()
+    assert closed_child.closed and closed_child.batches == 0
+
+
+def test_close_cancels_a_queued_task():
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(release.wait)
+        child = CountingIterator()
+        iterator = PrefetchIterator(child, 25, executor)
+        iterator.close()
+        assert child.closed and not iterator._running
+        release.set()
+    assert child.batches == 0
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.secondary_index import SecondaryIndex, build_index, index_bounds, index_path
+from tests.unit.storage_layer.conftest import TABLE_METADATA, plan_of
+
+pytestmark = pytest.mark.usefixtures("free_seeks")
+
+
+def execute(sql, parameters=None):
+    return plan_of(sql).execute(parameters)
+
+
+def run(sql, parameters=None):
+    return execute(sql, parameters).fetch_all()
+
+
+def scan_of(iterator):
+    while hasattr(iterator, "child_iter"):
+        iterator = iterator.child_iter
+    return iterator
+
+
+def declare_indexes(data_dir, *columns):
+    path = data_dir / "test" / "metadata.yaml"
+    entries = "".join(f"      - index_name: people_{col}\n        column_name: {col}\n" for col in columns)
+    path.write_text(path.read_text(encoding="utf-8") + "    indexes:\n" + entries, encoding="utf-8")
+
+
+def test_metadata_reads_declared_indexes(data_dir):
+    declare_indexes(data_dir, "id", "name")
+    assert Metadata("test").get_indexes("people") == {"people_id": "id", "people_name": "name"}
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT name FROM people WHERE id = 3", [["Michael Brown"]]),
+    ("SELECT id FROM people WHERE id > 3", [[4], [5]]),
+    ("SELECT id FROM people WHERE 2 >= id", [[1], [2]]),
+    ("SELECT id FROM people WHERE id >= 2 AND id < 4 AND score > 80", [[2]]),
+    ("SELECT id FROM people WHERE join_date < '2023-01-15'", [[2], [4]]),
+    ("SELECT id FROM people WHERE name = 'Emily Davis'", [[4]]),
+    ("SELECT id FROM people WHERE id = 7", []),
+    ("SELECT id FROM people WHERE id = 1 OR id = 5", [[1], [5]]),
+])
+def test_index_scans_keep_results(data_dir, sql, expected):
+    full_scan = run(sql)
+    declare_indexes(data_dir, "id", "name", "join_date")
+    assert run(sql) == full_scan == expected
+
+
+def test_point_lookup_reads_only_the_matching_row(data_dir):
+    declare_indexes(data_dir, "id")
+    iterator = execute("SELECT name FROM people WHERE id = ?", [4])
+    scan = scan_of(iterator)
+    assert iterator.fetch_all() == [["Emily Davis"]]
+    assert scan.index_column == "id"
+    # The index was built on first use, later lookups open it as it is
+    assert os.path.exists(index_path("test", "people", "id"))
+
+
+def test_index_is_rebuilt_when_the_csv_changes(data_dir):
+    declare_indexes(data_dir, "id")
+    assert run("SELECT name FROM people WHERE id = 6") == []
+    with open(data_dir / "test" / "people.csv", "a", encoding="utf-8") as f:
+        f.write("6,Ann Lee,70.0,true,2025-06-01\n")
+    assert SecondaryIndex.open("test", "people", "id", TABLE_METADATA) is None
+    assert run("SELECT name FROM people WHERE id = 6") == [["Ann Lee"]]
+
+
+def test_matches_after_the_first_unreadable_row_are_not_returned(data_dir):
+    path = data_dir / "test" / "people.csv"
+    lines = path.read_text(encoding="utf-8").splitlines()
+    lines.insert(3, "9,Bad Row,x,true,2020-01-01")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    # The bad score ends a full scan before the rows after it
+    full_scan = run("SELECT id FROM people WHERE score > 80")
+    declare_indexes(data_dir, "score")
+    assert run("SELECT id FROM people WHERE score > 80") == full_scan == [[1], [2]]
+
+
+def test_search_ranges(data_dir):
+    assert build_index("test", "people", "name", TABLE_METADATA) == 5
+    index = SecondaryIndex.open("test", "people", "name", TABLE_METADATA)
+    try:
+        # Chris Wilson, Emily Davis, Jane Smith, John Doe, Michael Brown
+        assert index.search([("=", "Jane Smith")]) == (2, 3)
+        assert index.search([(">=", "D"), ("<", "K")]) == (1, 4)
+        assert index.search([("=", 5)]) is None
+        assert index.matches(1, 4) == sorted(index.matches(1, 4))
+    finally:
+        index.close()
+
+
+def test_index_bounds_takes_conjuncts_with_literals():
+    condition = {'op': 'AND',
+                 'left': {'op': '>', 'left_operand': 5, 'right_operand': 'id'},
+                 'right': {'op': 'OR', 'left': {'op': '=', 'left_operand': 'a', 'right_operand': 1},
+                           'right': {'op': '=', 'left_operand': 'a', 'right_operand': 2}}}
+    assert index_bounds(condition) == {"id": [("<", 5)]}
+
+
+def test_create_index_builds_and_declares_it(data_dir):
+    metadata_yaml = (data_dir / "test" / "metadata.yaml").read_text(encoding="utf-8")
+    assert run("CREATE INDEX people_score ON people (score)") == [["people_score", "people", "score", 5]]
+    assert Metadata("test").get_indexes("people") == {"people_score": "score"}
+    # Recorded in a sidecar, the hand-written metadata.yaml is left as it was
+    assert (data_dir / "test" / "metadata.yaml").read_text(encoding="utf-8") == metadata_yaml
+    assert SecondaryIndex.open("test", "people", "score", TABLE_METADATA) is not None
+    assert run("SELECT id FROM people WHERE score >= 90") == [[2], [5]]
+    with pytest.raises(ValueError):
+        run("CREATE INDEX people_score ON people (id)")
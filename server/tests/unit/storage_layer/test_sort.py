@@ -0,0 +1,68 @@
+import datetime
+import random
+
+import pytest
+
+from app.core import config
+from app.core.storage_layer.iterator import sort_iterator
+from app.core.storage_layer.iterator.materialized_iterator import MaterializedIterator
+from app.core.storage_layer.iterator.sort_iterator import SortIterator
+from app.core.storage_layer.iterator.top_n_iterator import TopNIterator
+
+
+@pytest.mark.parametrize("budget", [64 * 1024 * 1024, 1])
+def test_order_by_keeps_typed_values(data_dir, monkeypatch, budget):
+    monkeypatch.setattr(config, "SORT_MEMORY_BYTES", budget)
+    assert run("SELECT name, join_date FROM people WHERE score > 80 ORDER BY join_date DESC LIMIT 3") == [
+        ["Chris Wilson", datetime.date(2025, 2, 20)],
+        ["John Doe", datetime.date(2023, 1, 15)],
+        ["Jane Smith", datetime.date(2022, 11, 3)],
+    ]
+    # Sorted on a column the SELECT list leaves out, with mixed directions
+    assert run("SELECT id FROM people ORDER BY is_member, score DESC") == [[2], [4], [5], [1], [3]]
+
+
+def test_unknown_order_column_fails_at_plan_time(data_dir):
+    with pytest.raises(ValueError, match="salary"):
+        run("SELECT id FROM people ORDER BY salary")
+
+
+def test_nulls_sort_last_ascending_and_first_descending():
+    rows = [[3], [None], [1]]
+    assert SortIterator(MaterializedIterator([r[:] for r in rows]), [0], [False], 1 << 20).fetch_all() == \
+        [[1], [3], [None]]
+    assert SortIterator(MaterializedIterator([r[:] for r in rows]), [0], [True], 1 << 20).fetch_all() == \
+        [[None], [3], [1]]
+from tests.unit.storage_layer.conftest import plan_of, run
+
+
+def test_external_merge_matches_in_memory_sort(monkeypatch):
+    monkeypatch.setattr(sort_iterator, "MERGE_FAN_IN", 3)
+    rng = random.Random(7)
+    rows = [[rng.randint(0, 50), f"row {i}", rng.random()] for i in range(5000)]
+    expected = sorted(rows, key=lambda row: (row[0], -row[2]))
+
+    spilling = SortIterator(MaterializedIterator([row[:] for row in rows], batch_size=100),
+                            [0, 2], [False, True], memory_budget=20_000, batch_size=100)
+    assert spilling.fetch_all() == expected
+    assert spilling._runs == []
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT id, score FROM people ORDER BY score DESC LIMIT 2",
+    "SELECT id FROM people ORDER BY is_member, score DESC LIMIT 2 OFFSET 2",
+    "SELECT id FROM people WHERE score < 90 ORDER BY join_date LIMIT 10",
+    "SELECT id FROM people ORDER BY id LIMIT 0",
+])
+def test_top_n_matches_full_sort(data_dir, monkeypatch, sql):
+    plan = plan_of(sql)
+    assert type(plan.child.child).__name__ == "TopN"
+    top_n = plan.execute().fetch_all()
+    monkeypatch.setattr(config, "TOP_N_MAX_ROWS", 0)
+    assert run(sql) == top_n
+
+
+def test_top_n_keeps_ties_in_input_order():
+    rows = [[1, "a"], [0, "b"], [1, "c"], [1, "d"]]
+    top = TopNIterator(MaterializedIterator(rows), [0], [True], count=2)
+    assert top.fetch_all() == [[1, "a"], [1, "c"]]
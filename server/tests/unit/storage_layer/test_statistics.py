@@ -0,0 +1,69 @@
+import datetime
+import os
+
+import pytest
+
+from app.core.storage_layer.logical_plan.hash_aggregate import HashAggregate
+from app.core.storage_layer.logical_plan.statistics_aggregate import StatisticsAggregate
+from app.core.storage_layer.statistics import DistinctSketch, statistics_path
+from tests.unit.storage_layer.conftest import plan_of, run
+
+
+def no_scan(monkeypatch):
+    monkeypatch.setattr(HashAggregate, "execute", lambda self, parameters=None: pytest.fail("scanned the table"))
+
+
+def test_analyze_returns_and_stores_column_statistics(data_dir):
+    rows = run("analyze people")
+    assert rows[0] == ["id", "INT", 5, 0, 5, "1", "5"]
+    assert rows[4] == ["join_date", "DATE", 5, 0, 5, "2021-09-12", "2025-02-20"]
+    assert [row[4] for row in rows] == [5, 5, 5, 2, 5]
+    assert os.path.exists(statistics_path("test", "people"))
+
+
+def test_whole_table_aggregates_come_from_statistics(data_dir, monkeypatch):
+    sql = "SELECT COUNT(*), MIN(join_date), MAX(name), COUNT(score) FROM people"
+    expected = [[5, datetime.date(2021, 9, 12), "Michael Brown", 5]]
+    plan = plan_of(sql)
+    assert isinstance(plan.child, StatisticsAggregate)
+    # No statistics yet: the plan scans
+    assert plan.execute().fetch_all() == expected
+
+    run("ANALYZE people")
+    with monkeypatch.context() as m:
+        no_scan(m)
+        assert plan.execute().fetch_all() == expected
+    # WHERE, GROUP BY and other functions are never planned on the statistics
+    assert not isinstance(plan_of("SELECT COUNT(*) FROM people WHERE id > 2").child, StatisticsAggregate)
+    assert not isinstance(plan_of("SELECT SUM(id) FROM people").child, StatisticsAggregate)
+
+
+def test_stale_statistics_are_ignored(data_dir):
+    run("ANALYZE people")
+    with open(data_dir / "test" / "people.csv", "a", encoding="utf-8") as f:
+        f.write("6,Ann Lee,99.5,false,2020-01-01\n")
+    assert run("SELECT COUNT(*), MIN(join_date), MAX(score) FROM people") == [
+        [6, datetime.date(2020, 1, 1), 99.5]]
+
+
+def test_statistics_follow_the_scan_at_bad_cells(data_dir, monkeypatch):
+    csv_file = data_dir / "test" / "people.csv"
+    csv_file.write_text(csv_file.read_text(encoding="utf-8").replace("77.25", "n/a"), encoding="utf-8")
+    queries = ["SELECT COUNT(*) FROM people", "SELECT MAX(score) FROM people",
+               "SELECT COUNT(*), MAX(score) FROM people", "SELECT MIN(id), MAX(score) FROM people"]
+    expected = [run(sql) for sql in queries]
+    assert expected[:2] == [[[5]], [[90.0]]]
+
+    run("ANALYZE people")
+    with monkeypatch.context() as m:
+        no_scan(m)
+        assert [run(sql) for sql in queries[:2]] == expected[:2]
+    # Columns that stop at different rows need the scan
+    assert [run(sql) for sql in queries] == expected
+
+
+def test_distinct_sketch_estimate():
+    sketch = DistinctSketch()
+    for i in range(50000):
+        sketch.add(i % 20000)
+    assert abs(sketch.estimate() - 20000) < 20000 * 0.05
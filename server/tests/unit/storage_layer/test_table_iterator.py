@@ -0,0 +1,39 @@
+import datetime
+
+from app.core.storage_layer.metadata import Metadata
+from app.core.storage_layer.utils import sql_to_logical_plan
+from app.core.storage_layer.iterator.table_iterator import TableIterator
+from tests.unit.storage_layer.conftest import TABLE_METADATA
+
+
+def plan(columns, where=None):
+    parsed = {'type': 'select', 'columns': columns, 'table': 'people', 'where': where}
+    return sql_to_logical_plan(parsed, Metadata("test"))
+
+
+def test_scan_decodes_only_predicate_columns(data_dir):
+    iterator = TableIterator("test", "people", TABLE_METADATA,
+                             required_columns=["name", "join_date", "score"], predicate_columns=["score"])
+    row = next(iterator)
+
+    assert row[2] == 85.5
+    assert row[4] == "2023-01-15"
+    assert set(iterator.deferred_decoders) == {1, 4}
+
+
+def test_projection_decodes_deferred_columns(data_dir):
+    where = {'left_operand': 'score', 'op': '>', 'right_operand': 88}
+    rows = list(plan(["name", "join_date"], where).execute())
+
+    assert rows == [
+        ["Jane Smith", datetime.date(2022, 11, 3)],
+        ["Chris Wilson", datetime.date(2025, 2, 20)],
+    ]
+
+
+def test_unreferenced_bad_value_does_not_end_scan(data_dir):
+    csv_file = data_dir / "test" / "people.csv"
+    csv_file.write_text(csv_file.read_text().replace("2024-05-10", "2024--05-10"))
+
+    assert len(list(plan(["id", "name"]).execute())) == 5
+    assert len(list(plan(["id", "join_date"]).execute())) == 2
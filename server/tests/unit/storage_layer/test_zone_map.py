@@ -0,0 +1,89 @@
+import pytest
+
+from app.core import config
+from app.core.storage_layer.iterator.table_iterator import TableIterator
+from app.core.storage_layer.row_index import RowIndex, build_row_index
+from tests.unit.storage_layer.conftest import TABLE_METADATA, plan_of, run
+
+pytestmark = pytest.mark.usefixtures("free_seeks")
+
+
+def scan_of(sql):
+    plan = plan_of(sql)
+    while plan.children:
+        plan = plan.children[0]
+    return plan
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT id FROM people WHERE id > 3", [[4], [5]]),
+    ("SELECT id FROM people WHERE 2 >= id", [[1], [2]]),
+    ("SELECT id FROM people WHERE id = 3 OR id = 5", [[3], [5]]),
+    ("SELECT id FROM people WHERE join_date < '2022-01-01'", [[4]]),
+    ("SELECT id FROM people WHERE id > 1 AND score < 80", [[3]]),
+    ("SELECT id FROM people WHERE id != 1", [[2], [3], [4], [5]]),
+    ("SELECT id FROM people WHERE id > 9", []),
+    ("SELECT id FROM people WHERE name = 'Chris Wilson'", [[5]]),
+])
+def test_zone_maps_keep_results(data_dir, sql, expected):
+    full_scan = run(sql)
+    assert build_row_index("test", "people", TABLE_METADATA, stride=2)
+    assert run(sql) == full_scan == expected
+
+
+def test_scan_seeks_past_blocks_out_of_range(data_dir):
+    assert build_row_index("test", "people", TABLE_METADATA, stride=2)
+    table_iter = TableIterator("test", "people", TABLE_METADATA, predicate_columns=["id"])
+    table_iter.skip_blocks({'op': '>=', 'left_operand': 'id', 'right_operand': 4})
+    # Rows of a block that may match are all returned, the filter above drops id 3
+    assert [row[0] for row in table_iter.fetch_all()] == [3, 4, 5]
+    assert (table_iter.blocks_total, table_iter.blocks_skipped) == (3, 1)
+
+
+def test_bound_parameters_are_checked_against_zone_maps(data_dir):
+    assert build_row_index("test", "people", TABLE_METADATA, stride=2)
+    sql = "SELECT id FROM people WHERE join_date >= ? AND id >= ?"
+    assert run(sql, ["2024-01-01", 2]) == [[3], [5]]
+
+
+def test_block_may_match(data_dir):
+    assert build_row_index("test", "people", TABLE_METADATA, stride=2)
+    index = RowIndex.open("test", "people", TABLE_METADATA)
+    assert index.block_count == 3
+
+    def blocks(op, column, value):
+        return [index.block_may_match({'op': op, 'left_operand': column, 'right_operand': value}, block)
+                for block in range(index.block_count)]
+
+    assert blocks("<", "id", 3) == [True, False, False]
+    assert blocks("=", "score", 95.75) == [False, False, True]
+    assert blocks("<>", "id", 5) == [True, True, False]
+    assert blocks(">", "join_date", "'2024-01-01'") == [False, True, True]
+    # Values of another type and column comparisons are left to the predicate
+    assert blocks(">", "id", "'abc'") == [True, True, True]
+    assert blocks("<", "id", "score") == [True, True, True]
+
+
+def test_blocks_after_the_first_unreadable_row_are_not_read(data_dir):
+    path = data_dir / "test" / "people.csv"
+    lines = path.read_text(encoding="utf-8").splitlines()
+    lines.insert(3, "x,Bad Row,1.0,true,2020-01-01")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    full_scan = run("SELECT id FROM people WHERE id > 3")
+    assert build_row_index("test", "people", TABLE_METADATA, stride=2)
+    # The bad id ends the scan before the rows it would match
+    assert run("SELECT id FROM people WHERE id > 3") == full_scan == []
+
+
+def test_explain_analyze_reports_skipped_blocks(data_dir):
+    assert build_row_index("test", "people", TABLE_METADATA, stride=2)
+    rows = run("EXPLAIN ANALYZE SELECT id FROM people WHERE join_date > '2025-01-01'")
+    # Reported on the operator reading the CSV, the scan or the vectorized filter over it
+    assert [row[-1] for row in rows if row[-1] is not None] == [2]
+    assert rows[0][2] == 1
+
+
+def test_first_filtered_scan_builds_the_index(data_dir, monkeypatch):
+    monkeypatch.setattr(config, "ROW_INDEX_AUTO_BUILD", True)
+    assert run("SELECT id FROM people WHERE id > 4") == [[5]]
+    assert RowIndex.open("test", "people", TABLE_METADATA).block_count == 1